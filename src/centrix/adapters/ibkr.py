@@ -2,19 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
-import socket
+import random
 import threading
 import time
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Protocol
 
 from dotenv import load_dotenv
 
+from centrix.adapters.ibkr_history import HistoryCache, HistoryPacer, load_history, to_epoch
+from centrix.adapters.ibkr_portfolio import PortfolioCache
 from centrix.bus import touch_service
-from centrix.core.metrics import KPIStore, METRICS
+from centrix.core.metrics import METRICS, KPIStore, publish_kpis
 from centrix.settings import AppSettings
 from centrix.utils.logging_setup import setup_logging
 
@@ -63,7 +67,11 @@ def _ensure_log_handler() -> logging.Logger:
 
 
 class IbkrGateway(Protocol):
-    """Protocol describing the gateway surface the adapter relies on."""
+    """Protocol describing the gateway surface the adapter relies on.
+
+    Gateways may also offer ``subscribe_portfolio(on_position, on_account)`` to stream
+    portfolio updates; it should return a callable that removes the subscription.
+    """
 
     def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
         ...
@@ -109,6 +117,19 @@ DEFAULT_ERROR_MAP: dict[int, IbkrErrorInfo] = {
 }
 
 DEFAULT_PACING_CODES: frozenset[int] = frozenset({10167, 10168})
+MAX_BACKOFF_SEC = 30.0
+
+
+def backoff_delay(
+    attempt: int,
+    base_sec: float,
+    max_sec: float = MAX_BACKOFF_SEC,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """Exponential backoff with equal jitter for the ``attempt``-th retry (1-based)."""
+
+    ceiling = min(max_sec, base_sec * 2.0 ** max(0, attempt - 1))
+    return ceiling / 2 + rng() * ceiling / 2
 
 
 class IbkrClient:
@@ -124,6 +145,9 @@ class IbkrClient:
         pacing_codes: set[int] | frozenset[int] | None = None,
         time_provider: Callable[[], float] = time.time,
         sleep_fn: Callable[[float], None] = time.sleep,
+        portfolio: PortfolioCache | None = None,
+        history_cache: HistoryCache | None = None,
+        history_pacer: HistoryPacer | None = None,
     ) -> None:
         self._settings = settings
         self._gateway = gateway
@@ -142,6 +166,12 @@ class IbkrClient:
         self._hb_thread: threading.Thread | None = None
         self._hb_stop: threading.Event | None = None
         self._hb_details: dict[str, Any] | None = None
+        self.portfolio = portfolio or PortfolioCache()
+        self._portfolio_live = False
+        self._portfolio_generation = 0
+        self._portfolio_unsubscribe: Callable[[], Any] | None = None
+        self.history_cache = history_cache or HistoryCache(settings.ibkr_history_dir)
+        self._history_pacer = history_pacer or HistoryPacer(sleep=sleep_fn)
 
     @property
     def enabled(self) -> bool:
@@ -161,7 +191,7 @@ class IbkrClient:
         return self._gateway.is_connected()
 
     def connect(self, retries: int = 3, retry_delay_sec: float = 0.5) -> bool:
-        """Try connecting to the configured IBKR endpoint with retry support."""
+        """Try connecting to the configured IBKR endpoint, backing off between attempts."""
 
         if not self.enabled:
             self._connected = False
@@ -194,6 +224,7 @@ class IbkrClient:
                 if self._gateway.is_connected():
                     self._connected = True
                     self._last_error = None
+                    self._subscribe_portfolio()
                     self._start_heartbeat({"host": host, "port": port})
                     CLIENT_LOG.info(
                         "IBKR gateway connection established host=%s port=%s client_id=%s",
@@ -214,7 +245,7 @@ class IbkrClient:
                 self._metrics.update_ibkr_latency(elapsed_ms)
 
             if attempt < max_attempts:
-                self._sleep(retry_delay_sec)
+                self._sleep(backoff_delay(attempt, retry_delay_sec))
 
         CLIENT_LOG.error(
             "Failed to connect to IBKR gateway after %s attempt(s) host=%s port=%s client_id=%s",
@@ -236,6 +267,7 @@ class IbkrClient:
         CLIENT_LOG.info("Disconnecting from IBKR gateway")
         self._gateway.disconnect()
         self._connected = False
+        self._unsubscribe_portfolio()
         self._stop_heartbeat()
         self._mark_down({"reason": "disconnect"})
         CLIENT_LOG.info("IBKR gateway disconnected")
@@ -258,20 +290,65 @@ class IbkrClient:
         }
         return {**gateway_health, **health_snapshot}
 
+    def _subscribe_portfolio(self) -> None:
+        # A reconnect replaces the previous registration instead of stacking another one.
+        self._unsubscribe_portfolio()
+        subscribe = getattr(self._gateway, "subscribe_portfolio", None)
+        if subscribe is None:
+            return
+        generation = self._portfolio_generation
+        cache = self.portfolio
+
+        def on_position(update: dict[str, Any]) -> None:
+            if generation == self._portfolio_generation:
+                cache.apply_position(update)
+
+        def on_account(values: dict[str, Any]) -> None:
+            if generation == self._portfolio_generation:
+                cache.apply_account(values)
+
+        # Gateways with update callbacks keep the cache live; others are re-polled when stale.
+        handle = subscribe(on_position, on_account)
+        self._portfolio_unsubscribe = handle if callable(handle) else None
+        self._portfolio_live = True
+
+    def _unsubscribe_portfolio(self) -> None:
+        # Callbacks from an older registration are ignored even if the gateway cannot
+        # unsubscribe them itself.
+        self._portfolio_generation += 1
+        self._portfolio_live = False
+        unsubscribe, self._portfolio_unsubscribe = self._portfolio_unsubscribe, None
+        if unsubscribe is not None:
+            try:
+                unsubscribe()
+            except Exception:  # pragma: no cover - gateway already gone
+                CLIENT_LOG.debug("Portfolio unsubscribe failed", exc_info=True)
+
+    def _ensure_portfolio(self) -> None:
+        assert self._gateway is not None
+        cache = self.portfolio
+        if cache.loaded and self._portfolio_live:
+            return
+        age = cache.age()
+        if cache.loaded and age is not None and age < self._settings.ibkr_portfolio_max_age_sec:
+            return
+        cache.load(self._gateway.fetch_account(), self._gateway.fetch_positions())
+
     def account(self) -> dict[str, Any]:
-        """Return the current account snapshot or an empty payload when disabled."""
+        """Return the cached account snapshot or an empty payload when disabled."""
 
         if not self.enabled or self._gateway is None:
             return {}
-        return dict(self._gateway.fetch_account())
+        self._ensure_portfolio()
+        return self.portfolio.account()
 
     def positions(self) -> list[dict[str, Any]]:
-        """Return open positions from the gateway."""
+        """Return open positions from the portfolio cache."""
 
         if not self.enabled or self._gateway is None:
             return []
-        positions = self._gateway.fetch_positions()
-        return [dict(item) for item in positions]
+        self._ensure_portfolio()
+        return self.portfolio.positions()
 
     def watch(self, symbol: str) -> dict[str, Any]:
         """Request a market data snapshot for the provided symbol."""
@@ -284,6 +361,41 @@ class IbkrClient:
         self._metrics.update_ibkr_latency(elapsed_ms)
         return dict(snapshot)
 
+    def history(
+        self,
+        symbol: str,
+        bar_size: str,
+        start: float | datetime,
+        end: float | datetime,
+    ) -> list[dict[str, float]]:
+        """Return bars for ``[start, end)``, downloading only ranges missing from the cache.
+
+        Without a connected gateway that supports ``fetch_history`` the cached bars are
+        returned as they are.
+        """
+
+        lo, hi = to_epoch(start), to_epoch(end)
+        fetch = getattr(self._gateway, "fetch_history", None)
+        if not self.is_connected() or fetch is None:
+            return self.history_cache.query(symbol.upper(), bar_size, lo, hi)
+        started = self._time()
+        bars, requests = load_history(
+            self.history_cache,
+            fetch,
+            symbol,
+            bar_size,
+            lo,
+            hi,
+            now=self._time(),
+            pacer=self._history_pacer,
+        )
+        if requests:
+            self._metrics.increment_counter("ibkr_history_requests_total", requests)
+            self._metrics.update_ibkr_latency(max(0.0, (self._time() - started) * 1000.0))
+        else:
+            self._metrics.increment_counter("ibkr_history_cache_hits_total")
+        return bars
+
     def send_order(self, contract: dict[str, Any], order: dict[str, Any]) -> dict[str, Any]:
         """Submit a synthetic order to the gateway."""
 
@@ -386,14 +498,180 @@ class IbkrClient:
         touch_service("ibkr", "down", details)
 
 
-def _probe_gateway(host: str, port: int, timeout: float) -> tuple[bool, str | None]:
+@dataclass(frozen=True, slots=True)
+class GatewayEndpoint:
+    """One gateway the monitor probes; ``ibkr_gateways`` lists them in failover order."""
+
+    name: str
+    host: str
+    port: int
+    client_id: int
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+def parse_gateways(settings: AppSettings) -> list[GatewayEndpoint]:
+    """Return the primary gateway followed by any ``host:port[:client_id]`` backups."""
+
+    endpoints = [
+        GatewayEndpoint("primary", settings.tws_host, settings.tws_port, settings.ibkr_client_id)
+    ]
+    for index, raw in enumerate(filter(None, settings.ibkr_gateways.split(",")), start=1):
+        parts = raw.strip().split(":")
+        if len(parts) < 2 or not parts[1].isdigit():
+            RUNNER_LOG.warning("Ignoring malformed IBKR gateway entry %r", raw)
+            continue
+        client_id = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else None
+        endpoint = GatewayEndpoint(
+            f"backup{index}",
+            parts[0],
+            int(parts[1]),
+            settings.ibkr_client_id if client_id is None else client_id,
+        )
+        if all(item.address != endpoint.address for item in endpoints):
+            endpoints.append(endpoint)
+    return endpoints
+
+
+async def _probe_gateway(host: str, port: int, timeout: float) -> tuple[bool, str | None]:
     """Attempt a TCP connection to the IBKR gateway."""
 
     try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return True, None
-    except OSError as exc:
-        return False, str(exc)
+        _reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, TimeoutError) as exc:
+        return False, str(exc) or type(exc).__name__
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:  # pragma: no cover - peer reset during close
+        pass
+    return True, None
+
+
+class GatewayMonitor:
+    """Probe every configured gateway concurrently and publish the aggregate ``ibkr`` status.
+
+    Each round opens one TCP connection per gateway in parallel and records the connect
+    time in the ``ibkr_connect_ms`` histogram, labelled with the gateway name. The service
+    record is rewritten only when a gateway changes state (or the failover target changes)
+    and otherwise once per ``summary_every`` seconds. With :func:`touch_service` each such
+    beat is older than ``heartbeat_max_interval_sec`` and is written straight through, so
+    ``last_seen`` lags by at most ``summary_every`` plus one probe round; keep that under
+    the dashboard's 10 second health window.
+    """
+
+    def __init__(
+        self,
+        endpoints: list[GatewayEndpoint],
+        *,
+        timeout: float,
+        summary_every: float = 5.0,
+        metrics: KPIStore | None = None,
+        publish: Callable[[str, str, dict[str, Any]], None] = touch_service,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("at least one gateway endpoint is required")
+        self.endpoints = list(endpoints)
+        self._timeout = timeout
+        self._summary_every = summary_every
+        self._metrics = metrics or METRICS
+        self._publish = publish
+        self._clock = clock
+        self._states: dict[str, bool] = {}
+        self._errors: dict[str, str | None] = {}
+        self._last_summary: float | None = None
+        self.rounds = 0
+
+    @property
+    def states(self) -> dict[str, bool]:
+        return dict(self._states)
+
+    @property
+    def active(self) -> GatewayEndpoint | None:
+        """First reachable gateway in failover order."""
+
+        for endpoint in self.endpoints:
+            if self._states.get(endpoint.name):
+                return endpoint
+        return None
+
+    async def _probe(self, endpoint: GatewayEndpoint) -> tuple[bool, str | None, float]:
+        started = self._clock()
+        ok, detail = await _probe_gateway(endpoint.host, endpoint.port, self._timeout)
+        return ok, detail, max(0.0, (self._clock() - started) * 1000.0)
+
+    async def probe_once(self) -> list[GatewayEndpoint]:
+        """Run one probe round; returns the gateways whose state changed."""
+
+        previous = self.active
+        results = await asyncio.gather(*(self._probe(endpoint) for endpoint in self.endpoints))
+        changed: list[GatewayEndpoint] = []
+        for endpoint, (ok, detail, elapsed_ms) in zip(self.endpoints, results, strict=True):
+            if ok:
+                self._metrics.observe(
+                    "ibkr_connect_ms", elapsed_ms, labels={"gateway": endpoint.name}
+                )
+            else:
+                self._metrics.increment_counter("ibkr_probe_failures_total")
+            if self._states.get(endpoint.name) != ok:
+                changed.append(endpoint)
+                if ok:
+                    RUNNER_LOG.info("Gateway %s reachable at %s", endpoint.name, endpoint.address)
+                else:
+                    RUNNER_LOG.warning(
+                        "Gateway %s unreachable at %s (%s)",
+                        endpoint.name,
+                        endpoint.address,
+                        detail or "connection failed",
+                    )
+            self._states[endpoint.name] = ok
+            self._errors[endpoint.name] = detail
+        self.rounds += 1
+        active = self.active
+        if active != previous and self.rounds > 1:
+            self._metrics.increment_counter("ibkr_failovers_total")
+            RUNNER_LOG.warning(
+                "IBKR failover target %s -> %s",
+                previous.name if previous else "none",
+                active.name if active else "none",
+            )
+        now = self._clock()
+        due = self._last_summary is None or now - self._last_summary >= self._summary_every
+        if changed or active != previous or due:
+            self._publish_status()
+            self._last_summary = now
+        return changed
+
+    def _publish_status(self) -> None:
+        active = self.active
+        details: dict[str, Any] = {
+            "host": (active or self.endpoints[0]).host,
+            "port": (active or self.endpoints[0]).port,
+            "active": active.name if active else None,
+            "gateways": {
+                endpoint.name: {
+                    "address": endpoint.address,
+                    "client_id": endpoint.client_id,
+                    "up": self._states.get(endpoint.name, False),
+                    **(
+                        {"error": self._errors[endpoint.name]}
+                        if self._errors.get(endpoint.name)
+                        else {}
+                    ),
+                }
+                for endpoint in self.endpoints
+            },
+        }
+        self._publish("ibkr", "up" if active else "down", details)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            started = self._clock()
+            await self.probe_once()
+            await asyncio.sleep(max(0.0, interval - (self._clock() - started)))
 
 
 def _env_float(name: str, default: float) -> float:
@@ -407,48 +685,66 @@ def _env_float(name: str, default: float) -> float:
         return default
 
 
-def _run_monitor(settings: AppSettings, *, interval: float, timeout: float) -> int:
-    host = settings.tws_host
-    port = settings.tws_port
-    RUNNER_LOG.info(
-        "Monitoring IBKR gateway host=%s port=%s client_id=%s",
-        host,
-        port,
-        settings.ibkr_client_id,
+async def _run_adapter(monitor: GatewayMonitor, interval: float, settings: AppSettings) -> None:
+    if not settings.ibkr_session_enabled:
+        await monitor.run(interval)
+        return
+    from centrix.adapters.ibkr_session import IbkrSession, parse_symbols, session_transport
+    from centrix.core.risk import RISK
+
+    transport = session_transport(settings.ibkr_session_transport)
+    if transport is None:
+        RUNNER_LOG.error(
+            "IBKR session not started: IBKR_SESSION_TRANSPORT=%r names no transport "
+            "(only 'jsonl' for ibkr_sim exists); running the gateway monitor only.",
+            settings.ibkr_session_transport,
+        )
+        await monitor.run(interval)
+        return
+    session = IbkrSession(
+        settings,
+        transport=transport,
+        symbols=parse_symbols(settings.ibkr_md_symbols),
+        risk=RISK,
     )
-    reachable: bool | None = None
+    RUNNER_LOG.info("Starting IBKR session on %s:%s", settings.tws_host, settings.tws_port)
+    await session.start()
+    try:
+        await asyncio.gather(monitor.run(interval), session.run(), _publish_metrics(interval))
+    finally:
+        await session.stop()
+
 
+async def _publish_metrics(interval: float) -> None:
+    # Risk gauges and session counters reach the dashboard through the KPI spool.
+    every = max(1.0, interval)
+    while True:
+        await asyncio.to_thread(publish_kpis, "ibkr")
+        await asyncio.sleep(every)
+
+
+def _run_monitor(
+    settings: AppSettings, *, interval: float, timeout: float, summary_every: float = 5.0
+) -> int:
+    endpoints = parse_gateways(settings)
+    RUNNER_LOG.info(
+        "Monitoring IBKR gateways %s",
+        ", ".join(f"{item.name}={item.address}/{item.client_id}" for item in endpoints),
+    )
+    monitor = GatewayMonitor(endpoints, timeout=timeout, summary_every=summary_every)
     try:
-        while True:
-            ok, detail = _probe_gateway(host, port, timeout)
-            if ok and reachable is not True:
-                RUNNER_LOG.info("Gateway reachable at %s:%s", host, port)
-            if ok:
-                touch_service("ibkr", "up", {"host": host, "port": port})
-            elif not ok and reachable is not False:
-                RUNNER_LOG.warning(
-                    "Gateway unreachable at %s:%s (%s)",
-                    host,
-                    port,
-                    detail or "connection failed",
-                )
-            if not ok:
-                down_payload = {"host": host, "port": port}
-                if detail:
-                    down_payload["error"] = detail
-                touch_service("ibkr", "down", down_payload)
-            reachable = ok
-            time.sleep(interval)
+        asyncio.run(_run_adapter(monitor, interval, settings))
     except KeyboardInterrupt:
         RUNNER_LOG.info("IBKR adapter interrupted; shutting down.")
         return 0
     except Exception:  # pragma: no cover - defensive
         RUNNER_LOG.exception("Unhandled error in IBKR adapter loop")
         return 1
+    return 0  # pragma: no cover - the monitor loop only ends by interruption
 
 
 def main() -> int:
-    """Run the standalone IBKR adapter monitor."""
+    """Run the standalone IBKR adapter: the gateway monitor and, if enabled, the session."""
 
     load_dotenv()
     _ensure_log_handler()
@@ -475,7 +771,10 @@ def main() -> int:
 
     interval = max(1.0, _env_float("IBKR_HEALTH_INTERVAL", 3.0))
     timeout = max(0.5, _env_float("IBKR_CONNECT_TIMEOUT", 2.5))
-    result = _run_monitor(settings, interval=interval, timeout=timeout)
+    summary_every = max(interval, _env_float("IBKR_HEALTH_SUMMARY", 5.0))
+    result = _run_monitor(
+        settings, interval=interval, timeout=timeout, summary_every=summary_every
+    )
     touch_service(
         "ibkr",
         "down",
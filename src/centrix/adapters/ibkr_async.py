@@ -0,0 +1,442 @@
+"""Asyncio IBKR client multiplexing concurrent requests over one connection."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, Protocol
+
+from centrix.adapters.ibkr import (
+    _SEVERITY_TO_LEVEL,
+    CLIENT_LOG,
+    DEFAULT_ERROR_INFO,
+    DEFAULT_ERROR_MAP,
+    DEFAULT_PACING_CODES,
+    IbkrErrorInfo,
+    IbkrGateway,
+)
+from centrix.adapters.ibkr_pacing import PacingLimits, PacingScheduler
+from centrix.core.metrics import METRICS, KPIStore
+from centrix.settings import AppSettings
+
+Frame = dict[str, Any]
+FrameHandler = Callable[[Frame], None]
+
+
+class IbkrRequestError(RuntimeError):
+    """A request answered with an IBKR error frame."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class IbkrTimeoutError(TimeoutError):
+    """A request did not complete within its deadline."""
+
+    def __init__(self, op: str, timeout: float) -> None:
+        super().__init__(f"IBKR {op} timed out after {timeout:.3f}s")
+        self.op = op
+        self.timeout = timeout
+
+
+class AsyncIbkrTransport(Protocol):
+    """Frame transport for the async client.
+
+    Requests are ``{"id", "op", "args"}`` frames; the gateway answers each with
+    ``{"id", "ok": true, "result"}`` or ``{"id", "ok": false, "code", "message"}`` in any
+    order. Frames without an ``id`` are unsolicited events (ticks, order status, errors).
+    """
+
+    async def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+    def is_connected(self) -> bool:
+        ...
+
+    async def send(self, frame: Frame) -> None:
+        ...
+
+    async def recv(self) -> Frame:
+        """Return the next frame; raise :class:`ConnectionError` once the link is gone."""
+        ...
+
+
+class JsonLineTransport:
+    """Newline-delimited JSON frames over a TCP stream."""
+
+    def __init__(self) -> None:
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._write_lock = asyncio.Lock()
+
+    async def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout=timeout_ms / 1000.0
+        )
+        await self.send({"op": "hello", "args": {"client_id": client_id}})
+        return True
+
+    async def close(self) -> None:
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):  # pragma: no cover - peer already gone
+                pass
+
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def send(self, frame: Frame) -> None:
+        if self._writer is None:
+            raise ConnectionError("transport not connected")
+        data = json.dumps(frame, separators=(",", ":")).encode("utf-8") + b"\n"
+        async with self._write_lock:
+            self._writer.write(data)
+            await self._writer.drain()
+
+    async def recv(self) -> Frame:
+        if self._reader is None:
+            raise ConnectionError("transport not connected")
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("gateway closed the connection")
+        frame: Frame = json.loads(line)
+        return frame
+
+
+class GatewayTransport:
+    """Bridge a blocking :class:`IbkrGateway` onto the frame protocol.
+
+    Each request runs in the default executor, so this exists for compatibility with the
+    existing gateways; native transports multiplex on the socket instead.
+    """
+
+    def __init__(
+        self, gateway: IbkrGateway, *, snapshot_sec: int = 10, poll_interval: float = 1.0
+    ) -> None:
+        self._gateway = gateway
+        self._snapshot_sec = snapshot_sec
+        self._poll_interval = poll_interval
+        self._inbox: asyncio.Queue[Frame | None] = asyncio.Queue()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._streams: dict[str, asyncio.Task[None]] = {}
+
+    async def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
+        self._inbox = asyncio.Queue()
+        return bool(
+            await asyncio.to_thread(
+                self._gateway.connect,
+                host=host,
+                port=port,
+                client_id=client_id,
+                timeout_ms=timeout_ms,
+            )
+        )
+
+    async def close(self) -> None:
+        for task in self._streams.values():
+            task.cancel()
+        self._streams.clear()
+        await asyncio.to_thread(self._gateway.disconnect)
+        self._inbox.put_nowait(None)
+
+    def is_connected(self) -> bool:
+        return self._gateway.is_connected()
+
+    def _call(self, op: str, args: dict[str, Any]) -> Any:
+        if op == "account":
+            return self._gateway.fetch_account()
+        if op == "positions":
+            return self._gateway.fetch_positions()
+        if op == "market_data":
+            return self._gateway.stream_market_data(
+                args["symbol"], int(args.get("snapshot_sec", self._snapshot_sec))
+            )
+        if op == "order":
+            return self._gateway.send_order(args["contract"], args["order"])
+        if op == "health":
+            return self._gateway.health()
+        if op == "cancel_order" and hasattr(self._gateway, "cancel_order"):
+            return self._gateway.cancel_order(int(args["order_id"]))
+        if op == "order_status" and hasattr(self._gateway, "order_status"):
+            order_id = args.get("order_id")
+            return self._gateway.order_status(
+                order_id=int(order_id) if order_id is not None else None,
+                client_order_id=args.get("client_order_id"),
+            )
+        if op == "history" and hasattr(self._gateway, "fetch_history"):
+            return self._gateway.fetch_history(
+                args["symbol"], args["bar_size"], float(args["start"]), float(args["end"])
+            )
+        raise IbkrRequestError(-1, f"unsupported op: {op}")
+
+    async def _run(self, frame: Frame) -> None:
+        try:
+            result = await asyncio.to_thread(self._call, frame["op"], frame.get("args") or {})
+            reply: Frame = {"id": frame["id"], "ok": True, "result": result}
+        except Exception as exc:
+            reply = {"id": frame["id"], "ok": False, "code": getattr(exc, "code", -1)}
+            reply["message"] = str(exc)
+        self._inbox.put_nowait(reply)
+
+    async def _poll(self, symbol: str) -> None:
+        # Blocking gateways only offer snapshots, so a stream is emulated by polling.
+        while True:
+            try:
+                quote = await asyncio.to_thread(
+                    self._gateway.stream_market_data, symbol, self._snapshot_sec
+                )
+                self._inbox.put_nowait({**quote, "event": "tick", "symbol": symbol})
+            except Exception as exc:
+                code = getattr(exc, "code", -1)
+                self._inbox.put_nowait({"code": code, "message": str(exc), "symbol": symbol})
+            await asyncio.sleep(self._poll_interval)
+
+    def _stream(self, op: str, symbol: str) -> None:
+        task = self._streams.pop(symbol, None)
+        if task is not None:
+            task.cancel()
+        if op == "subscribe_md":
+            self._streams[symbol] = asyncio.create_task(self._poll(symbol))
+
+    async def send(self, frame: Frame) -> None:
+        if "id" not in frame or frame.get("op") == "cancel":
+            return
+        if frame["op"] in {"subscribe_md", "unsubscribe_md"}:
+            self._stream(frame["op"], str(frame["args"]["symbol"]))
+            self._inbox.put_nowait({"id": frame["id"], "ok": True, "result": None})
+            return
+        task = asyncio.create_task(self._run(frame))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def recv(self) -> Frame:
+        frame = await self._inbox.get()
+        if frame is None:
+            raise ConnectionError("gateway closed")
+        return frame
+
+
+class AsyncIbkrClient:
+    """Concurrent IBKR requests over a single transport.
+
+    Every request gets an id and a future; one reader task routes replies back by id, so a
+    slow market-data snapshot never holds up account or order traffic. Requests time out
+    individually and cancelling an awaiting caller also cancels the request upstream.
+    """
+
+    def __init__(
+        self,
+        *,
+        settings: AppSettings,
+        transport: AsyncIbkrTransport,
+        metrics: KPIStore | None = None,
+        error_map: dict[int, IbkrErrorInfo] | None = None,
+        on_event: FrameHandler | None = None,
+        pacing: PacingScheduler | None = None,
+        time_provider: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._settings = settings
+        self._transport = transport
+        self._metrics = metrics or METRICS
+        self._error_map = {**DEFAULT_ERROR_MAP, **(error_map or {})}
+        self._time = time_provider
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future[Any]] = {}
+        self._handlers: list[FrameHandler] = [on_event] if on_event else []
+        self._reader: asyncio.Task[None] | None = None
+        if pacing is None and settings.ibkr_pacing_enabled:
+            pacing = PacingScheduler(PacingLimits.from_settings(settings), metrics=self._metrics)
+        self._pacing = pacing
+
+    @property
+    def settings(self) -> AppSettings:
+        return self._settings
+
+    def request_timeout(self) -> float:
+        """Default per-request timeout in seconds."""
+
+        return self._settings.ibkr_req_timeout_ms / 1000.0
+
+    @property
+    def pending(self) -> int:
+        """Number of requests awaiting a reply."""
+
+        return len(self._pending)
+
+    def add_event_handler(self, handler: FrameHandler) -> Callable[[], None]:
+        """Receive unsolicited frames; returns a callable that removes the handler."""
+
+        self._handlers.append(handler)
+
+        def _remove() -> None:
+            if handler in self._handlers:
+                self._handlers.remove(handler)
+
+        return _remove
+
+    def is_connected(self) -> bool:
+        reading = self._reader is not None and not self._reader.done()
+        return reading and self._transport.is_connected()
+
+    async def connect(self) -> bool:
+        settings = self._settings
+        ok = await self._transport.connect(
+            settings.tws_host,
+            settings.tws_port,
+            settings.ibkr_client_id,
+            settings.ibkr_req_timeout_ms,
+        )
+        if ok and (self._reader is None or self._reader.done()):
+            self._reader = asyncio.create_task(self._read_loop(), name="centrix-ibkr-reader")
+        CLIENT_LOG.info("Async IBKR client connected=%s", ok)
+        return bool(ok)
+
+    async def close(self) -> None:
+        reader, self._reader = self._reader, None
+        if self._pacing is not None:
+            await self._pacing.close()
+        await self._transport.close()
+        if reader is not None:
+            reader.cancel()
+            try:
+                await reader
+            except asyncio.CancelledError:
+                pass
+        self._fail_pending(ConnectionError("IBKR client closed"))
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                self._dispatch(await self._transport.recv())
+        except ConnectionError as exc:
+            CLIENT_LOG.warning("IBKR connection lost: %s", exc)
+            self._fail_pending(exc)
+            self._dispatch({"event": "disconnected", "message": str(exc)})
+
+    def _dispatch(self, frame: Frame) -> None:
+        req_id = frame.get("id")
+        if req_id is None:
+            if "code" in frame:
+                self._record_error(int(frame["code"]), frame.get("message"))
+            for handler in list(self._handlers):
+                try:
+                    handler(frame)
+                except Exception:  # pragma: no cover - handlers must not kill the reader
+                    CLIENT_LOG.exception("IBKR event handler failed")
+            return
+        future = self._pending.pop(int(req_id), None)
+        if future is None or future.done():
+            return
+        if frame.get("ok", True):
+            future.set_result(frame.get("result"))
+        else:
+            code = int(frame.get("code", -1))
+            message = str(frame.get("message") or "")
+            self._record_error(code, message)
+            future.set_exception(IbkrRequestError(code, message))
+
+    def _record_error(self, code: int, message: str | None) -> None:
+        info = self._error_map.get(code, DEFAULT_ERROR_INFO)
+        self._metrics.increment_counter("ibkr_errors_total", 1)
+        if code in DEFAULT_PACING_CODES:
+            self._metrics.increment_counter("ibkr_pacing_violations_total", 1)
+        CLIENT_LOG.log(
+            _SEVERITY_TO_LEVEL.get(info.severity.upper(), logging.ERROR),
+            "IBKR gateway error code=%s severity=%s detail=%s",
+            code,
+            info.severity,
+            message or info.hint,
+        )
+
+    async def request(
+        self, op: str, args: dict[str, Any] | None = None, *, timeout: float | None = None
+    ) -> Any:
+        """Send one request (through the pacing scheduler, if any) and await its reply."""
+
+        if not self.is_connected():
+            raise ConnectionError("IBKR client not connected")
+        if self._pacing is not None:
+            return await self._pacing.submit(op, args or {}, self._request, timeout=timeout)
+        return await self._request(op, args or {}, timeout)
+
+    async def _request(self, op: str, args: dict[str, Any], timeout: float | None) -> Any:
+        limit = timeout if timeout is not None else self.request_timeout()
+        req_id = next(self._ids)
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        start = self._time()
+        try:
+            await self._transport.send({"id": req_id, "op": op, "args": args})
+            return await asyncio.wait_for(future, timeout=limit)
+        except TimeoutError:
+            self._metrics.increment_counter("ibkr_timeouts_total", 1)
+            await self._cancel_upstream(req_id)
+            raise IbkrTimeoutError(op, limit) from None
+        except asyncio.CancelledError:
+            await self._cancel_upstream(req_id)
+            raise
+        finally:
+            self._pending.pop(req_id, None)
+            self._metrics.update_ibkr_latency(max(0.0, (self._time() - start) * 1000.0))
+
+    async def _cancel_upstream(self, req_id: int) -> None:
+        if self._pending.pop(req_id, None) is None or not self._transport.is_connected():
+            return
+        try:
+            await self._transport.send({"op": "cancel", "args": {"id": req_id}})
+        except ConnectionError:
+            pass
+
+    async def account(self) -> dict[str, Any]:
+        return dict(await self.request("account"))
+
+    async def positions(self) -> list[dict[str, Any]]:
+        return [dict(item) for item in await self.request("positions")]
+
+    async def watch(self, symbol: str, *, timeout: float | None = None) -> dict[str, Any]:
+        args = {"symbol": symbol, "snapshot_sec": self._settings.ibkr_md_snapshot_sec}
+        return dict(await self.request("market_data", args, timeout=timeout))
+
+    async def watch_many(self, symbols: Iterable[str]) -> dict[str, dict[str, Any] | None]:
+        """Snapshot many symbols concurrently; failed or timed-out symbols map to ``None``."""
+
+        names = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(
+            *(self.watch(name) for name in names), return_exceptions=True
+        )
+        return {
+            name: result if isinstance(result, dict) else None
+            for name, result in zip(names, results, strict=True)
+        }
+
+    async def history(
+        self, symbol: str, bar_size: str, start: float, end: float
+    ) -> list[dict[str, Any]]:
+        """Download bars for ``[start, end)``; paced as a historical request."""
+
+        args = {"symbol": symbol, "bar_size": bar_size, "start": start, "end": end}
+        return [dict(bar) for bar in await self.request("history", args)]
+
+    async def send_order(self, contract: dict[str, Any], order: dict[str, Any]) -> dict[str, Any]:
+        return dict(await self.request("order", {"contract": contract, "order": order}))
+
+    async def health(self) -> dict[str, Any]:
+        return dict(await self.request("health"))
+
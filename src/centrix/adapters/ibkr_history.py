@@ -0,0 +1,395 @@
+"""On-disk columnar cache for IBKR historical bars."""
+
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from centrix.adapters.ibkr_pacing import PacingLimits
+from centrix.core.ratelimit import SlidingWindow, WindowMap
+
+BAR_FIELDS = ("ts", "open", "high", "low", "close", "volume")
+MAX_BARS_PER_REQUEST = 2_000
+
+Range = tuple[float, float]
+HistoryFetcher = Callable[[str, str, float, float], Sequence[Mapping[str, Any]]]
+
+_UNIT_SECONDS = {
+    "s": 1,
+    "sec": 1,
+    "secs": 1,
+    "m": 60,
+    "min": 60,
+    "mins": 60,
+    "h": 3_600,
+    "hour": 3_600,
+    "hours": 3_600,
+    "d": 86_400,
+    "day": 86_400,
+    "days": 86_400,
+    "w": 604_800,
+    "week": 604_800,
+    "weeks": 604_800,
+}
+_BAR_RE = re.compile(r"^\s*(\d+)\s*([a-z]+)\s*$")
+
+try:  # numpy is optional; columns are plain memoryviews without it
+    import numpy as np
+
+    HAVE_NUMPY = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAVE_NUMPY = False
+
+
+def bar_seconds(bar_size: str) -> int:
+    """Return the length of an IB bar size such as ``"5 mins"`` or ``"1d"`` in seconds."""
+
+    match = _BAR_RE.match(bar_size.lower())
+    if match is None or match.group(2) not in _UNIT_SECONDS:
+        raise ValueError(f"unsupported bar size: {bar_size!r}")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def to_epoch(value: float | datetime) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+def merge_ranges(ranges: Iterable[Range]) -> list[Range]:
+    merged: list[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(covered: Sequence[Range], start: float, end: float) -> list[Range]:
+    """Return the parts of ``[start, end)`` not covered by the sorted ``covered`` ranges."""
+
+    gaps: list[Range] = []
+    cursor = start
+    for lo, hi in covered:
+        if hi <= cursor:
+            continue
+        if lo >= end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo))
+        cursor = max(cursor, hi)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def split_range(start: float, end: float, step: float) -> list[Range]:
+    chunks: list[Range] = []
+    while start < end:
+        chunks.append((start, min(end, start + step)))
+        start += step
+    return chunks
+
+
+class _Series:
+    """Read-only memory-mapped columns of one published version of a series."""
+
+    __slots__ = ("_maps", "columns", "version")
+
+    def __init__(self, directory: Path | None, version: str) -> None:
+        self.version = version
+        self._maps: list[mmap.mmap] = []
+        # Float64 buffers: a view of the mapped file, or an empty array when there is none.
+        self.columns: dict[str, memoryview[float] | array[float]] = {}
+        for name in BAR_FIELDS:
+            path = directory / f"{name}.f64" if directory is not None else None
+            size = path.stat().st_size if path is not None and path.exists() else 0
+            if path is None or size == 0:
+                self.columns[name] = array("d")
+                continue
+            with path.open("rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ)
+            self._maps.append(mapped)
+            self.columns[name] = memoryview(mapped).cast("d")
+
+    def __len__(self) -> int:
+        return len(self.columns["ts"])
+
+    def bars(self, start: float, end: float) -> list[dict[str, float]]:
+        ts = self.columns["ts"]
+        lo = bisect.bisect_left(ts, start)
+        hi = bisect.bisect_left(ts, end)
+        return [{name: self.columns[name][idx] for name in BAR_FIELDS} for idx in range(lo, hi)]
+
+    def close(self) -> None:
+        try:
+            for view in self.columns.values():
+                if isinstance(view, memoryview):
+                    view.release()
+            for mapped in self._maps:
+                mapped.close()
+        except BufferError:
+            # Arrays handed out by ``HistoryCache.columns`` still point into the mapping;
+            # it is unmapped once they are garbage collected.
+            pass
+        self._maps.clear()
+
+
+def _merge_rows(
+    series: _Series, rows: list[tuple[float, ...]]
+) -> tuple[list[array[float]], int]:
+    """Merge sorted new ``rows`` into the stored columns; newer rows win on equal ``ts``."""
+
+    columns = [array("d", series.columns[name]) for name in BAR_FIELDS]
+    ts = columns[0]
+    if not rows:
+        return columns, len(ts)
+    if not ts or rows[0][0] > ts[-1]:
+        # Common case: the download extends the series, so just append.
+        for pos, column in enumerate(columns):
+            column.extend(row[pos] for row in rows)
+        return columns, len(columns[0])
+    merged: dict[float, tuple[float, ...]] = {
+        ts[idx]: tuple(column[idx] for column in columns) for idx in range(len(ts))
+    }
+    merged.update((row[0], row) for row in rows)
+    ordered = [merged[key] for key in sorted(merged)]
+    merged_columns = [array("d", (row[pos] for row in ordered)) for pos in range(len(columns))]
+    return merged_columns, len(ordered)
+
+
+class HistoryCache:
+    """Bars stored as one float64 file per field under ``root/<SYMBOL>/<bar size>/``.
+
+    Each series also records the time ranges already downloaded, including ranges that
+    legitimately contain no bars (weekends, holidays), so only the gaps are fetched again.
+    Every write publishes a complete new version directory and then swaps the ``CURRENT``
+    pointer file, so readers in any process always map columns of one consistent version.
+    Reads go through memory-mapped files that stay open until a newer version appears.
+    """
+
+    POINTER = "CURRENT"
+
+    def __init__(self, root: str | Path = "runtime/history") -> None:
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        self._series: dict[Path, _Series] = {}
+
+    def _dir(self, symbol: str, bar_size: str) -> Path:
+        slug = re.sub(r"[^a-z0-9]+", "", bar_size.lower())
+        return self.root / symbol.upper() / slug
+
+    def _current(self, directory: Path) -> str:
+        pointer = directory / self.POINTER
+        try:
+            return pointer.read_text("utf-8").strip()
+        except FileNotFoundError:
+            return ""
+
+    def coverage(self, symbol: str, bar_size: str) -> list[Range]:
+        directory = self._dir(symbol, bar_size)
+        version = self._current(directory)
+        if not version:
+            return []
+        path = directory / version / "ranges.json"
+        return [(float(lo), float(hi)) for lo, hi in json.loads(path.read_text("utf-8"))]
+
+    def missing(self, symbol: str, bar_size: str, start: float, end: float) -> list[Range]:
+        return missing_ranges(self.coverage(symbol, bar_size), start, end)
+
+    def _open(self, symbol: str, bar_size: str) -> _Series:
+        directory = self._dir(symbol, bar_size)
+        version = self._current(directory)
+        with self._lock:
+            series = self._series.get(directory)
+            if series is None or series.version != version:
+                if series is not None:
+                    series.close()
+                path = directory / version if version else None
+                series = self._series[directory] = _Series(path, version)
+            return series
+
+    def query(self, symbol: str, bar_size: str, start: float, end: float) -> list[dict[str, float]]:
+        """Return cached bars with ``start <= ts < end``."""
+
+        with self._lock:
+            return self._open(symbol, bar_size).bars(start, end)
+
+    def columns(self, symbol: str, bar_size: str) -> dict[str, Any]:
+        """Return every cached column, as zero-copy NumPy arrays when NumPy is installed."""
+
+        with self._lock:
+            series = self._open(symbol, bar_size)
+            if not HAVE_NUMPY:
+                return dict(series.columns)
+            return {
+                # Hand NumPy the raw bytes; the arrays still share the mapped pages.
+                name: np.frombuffer(
+                    column.cast("B") if isinstance(column, memoryview) else column,
+                    dtype=np.float64,
+                )
+                for name, column in series.columns.items()
+            }
+
+    def store(
+        self,
+        symbol: str,
+        bar_size: str,
+        bars: Iterable[Mapping[str, Any]],
+        covered: Iterable[Range],
+    ) -> int:
+        """Merge ``bars`` into the series, mark ``covered`` as downloaded and publish it.
+
+        Callers downloading several chunks should collect them and store once; each call
+        writes one new version of the whole series.
+        """
+
+        directory = self._dir(symbol, bar_size)
+        rows: dict[float, tuple[float, ...]] = {}
+        for bar in bars:
+            row = tuple(float(bar.get(name) or 0.0) for name in BAR_FIELDS)
+            rows[row[0]] = row
+        with self._lock:
+            series = self._open(symbol, bar_size)
+            columns, count = _merge_rows(series, [rows[ts] for ts in sorted(rows)])
+            ranges = merge_ranges([*self.coverage(symbol, bar_size), *covered])
+            previous = series.version
+            target = self._new_version_dir(directory, previous)
+            version = target.name
+            for name, column in zip(BAR_FIELDS, columns, strict=True):
+                with (target / f"{name}.f64").open("wb") as handle:
+                    column.tofile(handle)
+            (target / "ranges.json").write_text(json.dumps(ranges), "utf-8")
+            self._replace(directory / self.POINTER, version.encode("utf-8"))
+            self._prune(directory, keep={version, previous})
+            return count
+
+    @staticmethod
+    def _new_version_dir(directory: Path, previous: str) -> Path:
+        number = int(previous[1:]) + 1 if previous.startswith("v") else 1
+        directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            target = directory / f"v{number}"
+            try:
+                target.mkdir()
+            except FileExistsError:  # another writer claimed it first
+                number += 1
+                continue
+            return target
+
+    @staticmethod
+    def _prune(directory: Path, keep: set[str]) -> None:
+        # The previous version stays for readers that resolved the pointer just before
+        # the swap; older ones are unlinked (live mappings of them stay valid on POSIX).
+        for path in directory.glob("v*"):
+            if path.name in keep or not path.is_dir():
+                continue
+            for item in path.iterdir():
+                item.unlink(missing_ok=True)
+            try:
+                path.rmdir()
+            except OSError:  # pragma: no cover - another writer is filling it
+                pass
+
+    @staticmethod
+    def _replace(path: Path, data: bytes) -> None:
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("wb") as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+
+    def close(self) -> None:
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            self._series.clear()
+
+
+class HistoryPacer:
+    """Blocking gate applying IB's historical-data pacing limits before each request."""
+
+    def __init__(
+        self,
+        limits: PacingLimits | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.limits = limits or PacingLimits()
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        limits = self.limits
+        self._hist = SlidingWindow(limits.hist_requests, limits.hist_window_sec)
+        self._contracts: WindowMap[str] = WindowMap(
+            limits.hist_contract_requests, limits.hist_contract_window_sec
+        )
+
+    def acquire(self, symbol: str, what_to_show: str = "TRADES") -> float:
+        """Block until a request for ``symbol`` may be sent; returns seconds waited.
+
+        Requests for the same contract and tick type share one window whatever their bar
+        size, as they do on IB's side.
+        """
+
+        waited = 0.0
+        with self._lock:
+            while True:
+                now = self._clock()
+                contract = self._contracts.get(f"{symbol.upper()}|{what_to_show.upper()}", now)
+                wait = max(self._hist.wait_time(now), contract.wait_time(now))
+                if wait <= 0:
+                    self._hist.record(now)
+                    contract.record(now)
+                    return waited
+                self._sleep(wait)
+                waited += wait
+
+
+def load_history(
+    cache: HistoryCache,
+    fetch: HistoryFetcher,
+    symbol: str,
+    bar_size: str,
+    start: float,
+    end: float,
+    *,
+    now: float,
+    pacer: HistoryPacer | None = None,
+    max_bars: int = MAX_BARS_PER_REQUEST,
+) -> tuple[list[dict[str, float]], int]:
+    """Fill the gaps of ``[start, end)`` via ``fetch`` and return ``(bars, requests_sent)``.
+
+    Ranges reaching past the last completed bar are fetched but not marked as covered, so
+    the still-forming bar is downloaded again next time.
+    """
+
+    name = symbol.upper()
+    step = bar_seconds(bar_size)
+    complete = now - step
+    requests = 0
+    fetched: list[Mapping[str, Any]] = []
+    covered: list[Range] = []
+    try:
+        for gap_start, gap_end in cache.missing(name, bar_size, start, end):
+            for lo, hi in split_range(gap_start, gap_end, float(step * max(1, max_bars))):
+                if pacer is not None:
+                    pacer.acquire(name)
+                fetched.extend(fetch(name, bar_size, lo, hi))
+                requests += 1
+                if lo < complete:
+                    covered.append((lo, min(hi, complete)))
+    finally:
+        # One merge per call; chunks already downloaded are kept if a later one fails.
+        if requests:
+            cache.store(name, bar_size, fetched, covered)
+    return cache.query(name, bar_size, start, end), requests
@@ -0,0 +1,336 @@
+"""Reference-counted market-data streams feeding a shared latest-quote cache."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from centrix.adapters.ibkr import CLIENT_LOG
+from centrix.adapters.ibkr_async import AsyncIbkrClient, Frame
+from centrix.core.metrics import METRICS, KPIStore
+from centrix.ipc.bus import Bus
+from centrix.settings import get_settings
+
+QUOTE_FIELDS = ("bid", "ask", "last", "bid_size", "ask_size", "ts")
+QuoteListener = Callable[[dict[str, Any]], None]
+QuotePublisher = Callable[[list[dict[str, Any]]], None]
+
+
+def publish_quotes(quotes: list[dict[str, Any]]) -> None:
+    """Emit one ``md.quote`` event carrying the latest quote of each changed symbol."""
+
+    Bus(get_settings().ipc_db).emit("md.quote", "INFO", {"quotes": quotes})
+
+
+class MarketDataLimitError(RuntimeError):
+    """Raised when a new stream would exceed the market-data line allowance."""
+
+
+class QuoteCache:
+    """Latest quote per symbol stored column-wise in ``array('d')`` slots.
+
+    Each symbol owns one slot index into fixed-width float columns, so a quote costs a few
+    dozen bytes instead of a dict, updates never allocate, and released slots are reused.
+    Missing values are stored as NaN and reported as ``None``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._slots: dict[str, int] = {}
+        self._free: list[int] = []
+        self._columns = {name: array("d") for name in QUOTE_FIELDS}
+        self._seq = array("Q")
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._slots
+
+    def _slot(self, symbol: str) -> int:
+        slot = self._slots.get(symbol)
+        if slot is not None:
+            return slot
+        if self._free:
+            slot = self._free.pop()
+            for column in self._columns.values():
+                column[slot] = math.nan
+            self._seq[slot] = 0
+        else:
+            slot = len(self._seq)
+            for column in self._columns.values():
+                column.append(math.nan)
+            self._seq.append(0)
+        self._slots[symbol] = slot
+        return slot
+
+    def update(self, symbol: str, values: dict[str, Any]) -> int:
+        """Merge the known quote fields from ``values``; returns the symbol's update count."""
+
+        with self._lock:
+            slot = self._slot(symbol)
+            for name in QUOTE_FIELDS:
+                value = values.get(name)
+                if value is not None:
+                    self._columns[name][slot] = float(value)
+            self._seq[slot] += 1
+            return self._seq[slot]
+
+    def get(self, symbol: str) -> dict[str, Any] | None:
+        with self._lock:
+            slot = self._slots.get(symbol)
+            if slot is None or self._seq[slot] == 0:
+                return None
+            quote: dict[str, Any] = {"symbol": symbol, "seq": self._seq[slot]}
+            for name, column in self._columns.items():
+                value = column[slot]
+                quote[name] = None if math.isnan(value) else value
+            return quote
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        quotes = {symbol: self.get(symbol) for symbol in list(self._slots)}
+        return {symbol: quote for symbol, quote in quotes.items() if quote is not None}
+
+    def discard(self, symbol: str) -> None:
+        with self._lock:
+            slot = self._slots.pop(symbol, None)
+            if slot is not None:
+                self._free.append(slot)
+
+
+@dataclass(slots=True)
+class _Stream:
+    symbol: str
+    ready: asyncio.Future[None]
+    refs: int = 0
+    listeners: list[QuoteListener] = field(default_factory=list)
+    first_tick: asyncio.Event = field(default_factory=asyncio.Event)
+    last_watch: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class Subscription:
+    """Handle returned by :meth:`MarketDataManager.subscribe`."""
+
+    symbol: str
+    listener: QuoteListener | None = None
+
+
+class MarketDataManager:
+    """One upstream stream per symbol, shared by every subscriber in the process.
+
+    The first subscriber opens the stream, later ones only bump a reference count, and the
+    stream is closed when the last one leaves. Ticks arrive as unsolicited ``tick`` frames,
+    update the :class:`QuoteCache` and fan out to listeners; :meth:`watch` serves reads
+    from the cache and keeps an idle-expiring stream alive for repeated callers.
+
+    With a ``publisher`` (e.g. :func:`publish_quotes`) the latest quote of every symbol
+    that ticked is also handed over once per ``publish_interval``, so other processes such
+    as the dashboard and TUI see the feed through the bus at a bounded write rate.
+    """
+
+    def __init__(
+        self,
+        client: AsyncIbkrClient,
+        *,
+        max_lines: int | None = None,
+        watch_idle_sec: float = 60.0,
+        cache: QuoteCache | None = None,
+        metrics: KPIStore | None = None,
+        time_provider: Callable[[], float] = time.monotonic,
+        publisher: QuotePublisher | None = None,
+        publish_interval: float = 1.0,
+    ) -> None:
+        self._client = client
+        limit = client.settings.ibkr_md_max_lines if max_lines is None else max_lines
+        self._max_lines = max(1, limit)
+        self._watch_idle = watch_idle_sec
+        self.cache = cache or QuoteCache()
+        self._metrics = metrics or METRICS
+        self._time = time_provider
+        self._streams: dict[str, _Stream] = {}
+        self._watched: set[str] = set()
+        self._publisher = publisher
+        self._publish_interval = publish_interval
+        self._dirty: set[str] = set()
+        self._flusher: asyncio.Task[None] | None = None
+        self._detach = client.add_event_handler(self._on_frame)
+
+    @property
+    def active(self) -> list[str]:
+        return sorted(self._streams)
+
+    def refs(self, symbol: str) -> int:
+        stream = self._streams.get(symbol.upper())
+        return stream.refs if stream else 0
+
+    def _on_frame(self, frame: Frame) -> None:
+        if frame.get("event") != "tick":
+            return
+        symbol = str(frame.get("symbol") or "").upper()
+        stream = self._streams.get(symbol)
+        if stream is None:
+            return
+        self.cache.update(symbol, frame)
+        stream.first_tick.set()
+        self._metrics.increment_counter("md_ticks_total")
+        if self._publisher is not None:
+            self._dirty.add(symbol)
+            if self._flusher is None or self._flusher.done():
+                self._flusher = asyncio.get_running_loop().create_task(
+                    self._run_flusher(), name="centrix-md-publish"
+                )
+        if not stream.listeners:
+            return
+        quote = self.cache.get(symbol)
+        if quote is None:
+            return
+        for listener in list(stream.listeners):
+            try:
+                listener(quote)
+            except Exception:  # pragma: no cover - listeners must not break the feed
+                CLIENT_LOG.exception("Market-data listener failed for %s", symbol)
+
+    async def _run_flusher(self) -> None:
+        while True:
+            await asyncio.sleep(self._publish_interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Hand the latest quote of every symbol that ticked to the publisher."""
+
+        names, self._dirty = self._dirty, set()
+        quotes = [quote for name in sorted(names) if (quote := self.cache.get(name)) is not None]
+        if not quotes or self._publisher is None:
+            return 0
+        try:
+            await asyncio.to_thread(self._publisher, quotes)
+        except Exception:
+            CLIENT_LOG.exception("Failed to publish %s quote(s)", len(quotes))
+            self._dirty |= names
+            return 0
+        self._metrics.increment_counter("md_quote_batches_total")
+        return len(quotes)
+
+    async def _open(self, symbol: str) -> _Stream:
+        stream = self._streams.get(symbol)
+        if stream is not None:
+            # Concurrent first subscribers share the single upstream request.
+            await asyncio.shield(stream.ready)
+            return stream
+        if len(self._streams) >= self._max_lines:
+            self._metrics.increment_counter("md_line_limit_total")
+            raise MarketDataLimitError(f"market-data line limit reached ({self._max_lines})")
+        # Register before subscribing so ticks racing the reply are not dropped.
+        stream = self._streams[symbol] = _Stream(
+            symbol, asyncio.get_running_loop().create_future()
+        )
+        try:
+            await self._client.request("subscribe_md", {"symbol": symbol})
+        except BaseException as exc:
+            del self._streams[symbol]
+            self.cache.discard(symbol)
+            if isinstance(exc, asyncio.CancelledError):
+                stream.ready.cancel()
+            else:
+                stream.ready.set_exception(exc)
+                stream.ready.exception()  # mark retrieved when nobody else is waiting
+            raise
+        stream.ready.set_result(None)
+        self._metrics.increment_counter("md_streams_opened_total")
+        return stream
+
+    async def subscribe(self, symbol: str, listener: QuoteListener | None = None) -> Subscription:
+        """Join (or open) the stream for ``symbol``."""
+
+        name = symbol.upper()
+        stream = await self._open(name)
+        stream.refs += 1
+        if listener is not None:
+            stream.listeners.append(listener)
+        return Subscription(name, listener)
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        """Leave a stream, closing it upstream when the last subscriber is gone."""
+
+        stream = self._streams.get(subscription.symbol)
+        if stream is None:
+            return
+        if subscription.listener is not None and subscription.listener in stream.listeners:
+            stream.listeners.remove(subscription.listener)
+        stream.refs -= 1
+        if stream.refs > 0:
+            return
+        await self._close_stream(subscription.symbol)
+
+    async def _close_stream(self, symbol: str) -> None:
+        del self._streams[symbol]
+        self._watched.discard(symbol)
+        self.cache.discard(symbol)
+        if self._client.is_connected():
+            await self._client.request("unsubscribe_md", {"symbol": symbol})
+
+    async def watch(self, symbol: str, *, timeout: float | None = None) -> dict[str, Any]:
+        """Return the latest quote, opening a shared stream on first use."""
+
+        name = symbol.upper()
+        if name not in self._watched:
+            # Claim the single watch reference before yielding so concurrent first
+            # watchers do not each add one.
+            self._watched.add(name)
+            try:
+                await self.subscribe(name)
+            except BaseException:
+                self._watched.discard(name)
+                raise
+        stream = self._streams[name]
+        await asyncio.shield(stream.ready)
+        stream.last_watch = self._time()
+        quote = self.cache.get(name)
+        if quote is None:
+            wait = timeout if timeout is not None else self._client.request_timeout()
+            await asyncio.wait_for(stream.first_tick.wait(), timeout=wait)
+            quote = self.cache.get(name)
+        return quote or {"symbol": name}
+
+    async def release_idle(self) -> list[str]:
+        """Drop watch-only references that have not been read for ``watch_idle_sec``."""
+
+        cutoff = self._time() - self._watch_idle
+        idle = [
+            name
+            for name in self._watched
+            if name in self._streams and self._streams[name].last_watch <= cutoff
+        ]
+        for name in idle:
+            self._watched.discard(name)
+            await self.unsubscribe(Subscription(name))
+        return idle
+
+    async def resubscribe_all(self) -> int:
+        """Re-open every active stream upstream, e.g. after a reconnect; cached quotes stay."""
+
+        names = list(self._streams)
+        await asyncio.gather(
+            *(self._client.request("subscribe_md", {"symbol": name}) for name in names)
+        )
+        return len(names)
+
+    async def close(self) -> None:
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        for name in list(self._streams):
+            await self._close_stream(name)
+        self._detach()
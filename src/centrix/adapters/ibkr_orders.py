@@ -0,0 +1,436 @@
+"""Non-blocking order routing on top of the async IBKR client."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections.abc import Callable, Coroutine, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from centrix.adapters.ibkr import CLIENT_LOG
+from centrix.adapters.ibkr_async import (
+    AsyncIbkrClient,
+    Frame,
+    IbkrRequestError,
+    IbkrTimeoutError,
+)
+from centrix.adapters.ibkr_supervisor import ReconnectSupervisor
+from centrix.core.metrics import METRICS, KPIStore
+from centrix.core.orders import OrderTransition, transition_orders
+from centrix.core.risk import RiskEngine
+
+# TWS order states reported through ``order_status`` events.
+ACK_STATES = frozenset({"presubmitted", "submitted", "accepted"})
+FILLED_STATES = frozenset({"filled"})
+CANCELLED_STATES = frozenset({"cancelled", "apicancelled"})
+REJECTED_STATES = frozenset({"inactive", "rejected"})
+
+OrderCallback = Callable[["RoutedOrder"], None]
+StatusPublisher = Callable[[list[OrderTransition]], Any]
+
+
+@dataclass(slots=True)
+class RoutedOrder:
+    """Lifecycle of one order sent through the :class:`OrderRouter`."""
+
+    client_order_id: str
+    contract: dict[str, Any]
+    order: dict[str, Any]
+    book_id: int | None = None
+    broker_order_id: int | None = None
+    state: str = "submitted"
+    filled: float = 0.0
+    avg_price: float | None = None
+    error: str | None = None
+    submitted_at: float = 0.0
+    acked_at: float | None = None
+    filled_at: float | None = None
+    done: asyncio.Future[RoutedOrder] | None = field(default=None, repr=False)
+
+    @property
+    def symbol(self) -> str:
+        return str(self.contract.get("symbol") or self.order.get("symbol") or "").upper()
+
+    @property
+    def quantity(self) -> float:
+        return abs(float(self.order.get("qty", self.order.get("quantity", 0)) or 0))
+
+    @property
+    def terminal(self) -> bool:
+        return self.state in ("filled", "cancelled", "rejected")
+
+    @property
+    def unknown(self) -> bool:
+        """The request timed out or the link dropped, so the gateway may hold the order."""
+
+        return self.state == "unknown"
+
+
+class OrderRouter:
+    """Send orders without waiting for the gateway and follow them to a final state.
+
+    :meth:`submit` tags the order with a client order id and returns immediately; the
+    request runs in the background. The ``order`` reply or a ``Submitted`` status event
+    acknowledges it, and ``order_status`` events report fills and cancels. Each stage
+    fires the matching callback, is timed into the ``ibkr_order_ack_ms``,
+    ``ibkr_order_fill_ms`` and ``ibkr_order_total_ms`` histograms, and is queued as an
+    order-book transition. Queued transitions are published to the bus in batches.
+
+    Only an explicit gateway reject finishes an order as rejected. When the request times
+    out or the connection drops the outcome is unknown: the order stays open and its
+    ``order_status`` is polled by client order id until the gateway reports a final state
+    (and again after every reconnect when a supervisor is attached).
+    """
+
+    def __init__(
+        self,
+        client: AsyncIbkrClient,
+        *,
+        supervisor: ReconnectSupervisor | None = None,
+        risk: RiskEngine | None = None,
+        publisher: StatusPublisher = transition_orders,
+        publish_interval: float = 0.05,
+        publish_batch: int = 100,
+        reconcile_interval: float = 0.5,
+        reconcile_attempts: int = 20,
+        on_ack: OrderCallback | None = None,
+        on_fill: OrderCallback | None = None,
+        on_cancel: OrderCallback | None = None,
+        on_reject: OrderCallback | None = None,
+        metrics: KPIStore | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._client = client
+        self._supervisor = supervisor
+        self._risk = risk
+        self._publisher = publisher
+        self._publish_interval = publish_interval
+        self._publish_batch = max(1, publish_batch)
+        self._reconcile_interval = reconcile_interval
+        self._reconcile_attempts = max(1, reconcile_attempts)
+        self._callbacks = {
+            "ack": on_ack,
+            "fill": on_fill,
+            "cancel": on_cancel,
+            "reject": on_reject,
+        }
+        self._metrics = metrics or METRICS
+        self._clock = clock
+        self._prefix = f"cx{client.settings.ibkr_client_id}-{int(time.time() * 1000):x}"
+        self._ids = itertools.count(1)
+        self._orders: dict[str, RoutedOrder] = {}
+        self._by_broker: dict[int, RoutedOrder] = {}
+        self._outbox: list[OrderTransition] = []
+        self._flush_wake = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._detach = client.add_event_handler(self._on_frame)
+        self._detach_replay = (
+            supervisor.add_replay(self.reconcile) if supervisor is not None else None
+        )
+
+    @property
+    def open_orders(self) -> list[RoutedOrder]:
+        return [order for order in self._orders.values() if not order.terminal]
+
+    def get(self, client_order_id: str) -> RoutedOrder | None:
+        return self._orders.get(client_order_id)
+
+    def next_client_order_id(self) -> str:
+        return f"{self._prefix}-{next(self._ids)}"
+
+    def book_client_order_id(self, book_id: int) -> str:
+        """Client order id of an order-book order; the same in every router process."""
+
+        return f"cx{self._client.settings.ibkr_client_id}-book{book_id}"
+
+    def submit(
+        self,
+        contract: dict[str, Any],
+        order: dict[str, Any],
+        *,
+        book_id: int | None = None,
+    ) -> RoutedOrder:
+        """Queue ``order`` for sending and return its tracker without waiting.
+
+        ``book_id`` links the order to its record in the order book so status changes are
+        published as transitions and the client order id is derived from it;
+        ``await routed.done`` waits for the final state.
+        """
+
+        routed = self._track(contract, order, book_id)
+        self._spawn(self._send(routed))
+        return routed
+
+    def resume(
+        self, contract: dict[str, Any], order: dict[str, Any], *, book_id: int
+    ) -> RoutedOrder:
+        """Follow an order-book order an earlier router may have sent, without sending it.
+
+        The order is treated as unknown and reconciled by its client order id; if the
+        gateway never received it, it stays unknown rather than being sent twice.
+        """
+
+        routed = self._track(contract, order, book_id)
+        routed.state = "unknown"
+        self._spawn(self._reconcile(routed))
+        return routed
+
+    def _track(
+        self, contract: dict[str, Any], order: dict[str, Any], book_id: int | None
+    ) -> RoutedOrder:
+        client_order_id = (
+            self.book_client_order_id(book_id)
+            if book_id is not None
+            else self.next_client_order_id()
+        )
+        routed = RoutedOrder(
+            client_order_id,
+            dict(contract),
+            {**order, "client_order_id": client_order_id},
+            book_id=book_id,
+            submitted_at=self._clock(),
+            done=asyncio.get_running_loop().create_future(),
+        )
+        self._orders[client_order_id] = routed
+        return routed
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._ensure_flusher()
+
+    async def submit_many(
+        self, orders: Iterable[tuple[dict[str, Any], dict[str, Any]]]
+    ) -> list[RoutedOrder]:
+        """Submit several orders concurrently and wait until each is acknowledged or failed."""
+
+        routed = [self.submit(contract, order) for contract, order in orders]
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        return routed
+
+    async def cancel(self, client_order_id: str) -> None:
+        routed = self._orders.get(client_order_id)
+        if routed is None or routed.terminal or routed.broker_order_id is None:
+            return
+        await self._client.request("cancel_order", {"order_id": routed.broker_order_id})
+
+    async def _send(self, routed: RoutedOrder) -> None:
+        if not self._client.is_connected():
+            # Nothing has left the process yet, so this is a definite reject.
+            self._reject(routed, "IBKR client not connected")
+            return
+        try:
+            reply = await self._client.request(
+                "order", {"contract": routed.contract, "order": routed.order}
+            )
+        except IbkrRequestError as exc:
+            self._reject(routed, f"{exc.code}: {exc}")
+            return
+        except (IbkrTimeoutError, ConnectionError) as exc:
+            CLIENT_LOG.warning(
+                "Order %s outcome unknown (%s); reconciling", routed.client_order_id, exc
+            )
+            routed.state = "unknown"
+            self._metrics.increment_counter("ibkr_order_unknown_total")
+            await self._reconcile(routed)
+            return
+        if isinstance(reply, dict):
+            self._observe_status(routed, reply)
+
+    def _observe_status(self, routed: RoutedOrder, reply: dict[str, Any]) -> None:
+        self._acknowledge(routed, reply.get("order_id"))
+        status = str(reply.get("status") or "").lower()
+        if status in FILLED_STATES | CANCELLED_STATES | REJECTED_STATES or reply.get("filled"):
+            self._apply_status(routed, {**reply, "status": status})
+
+    async def _reconcile(self, routed: RoutedOrder) -> None:
+        for attempt in range(self._reconcile_attempts):
+            if routed.terminal:
+                return
+            if attempt:
+                await asyncio.sleep(self._reconcile_interval)
+            if not self._client.is_connected():
+                continue
+            args: dict[str, Any] = {"client_order_id": routed.client_order_id}
+            if routed.broker_order_id is not None:
+                args["order_id"] = routed.broker_order_id
+            try:
+                reply = await self._client.request("order_status", args)
+            except Exception as exc:
+                # Not found yet, timed out or disconnected: the order may still arrive.
+                CLIENT_LOG.debug("order_status for %s failed: %s", routed.client_order_id, exc)
+                continue
+            if isinstance(reply, dict) and not routed.terminal:
+                self._observe_status(routed, reply)
+        if routed.unknown:
+            CLIENT_LOG.warning(
+                "Order %s still unknown after %s status checks",
+                routed.client_order_id,
+                self._reconcile_attempts,
+            )
+
+    async def reconcile(self) -> None:
+        """Re-check every order whose outcome is unknown or that is still working."""
+
+        pending = [order for order in self._orders.values() if not order.terminal]
+        await asyncio.gather(*(self._reconcile(order) for order in pending))
+
+    def _on_frame(self, frame: Frame) -> None:
+        if frame.get("event") != "order_status":
+            return
+        routed = None
+        if frame.get("client_order_id") is not None:
+            routed = self._orders.get(str(frame["client_order_id"]))
+        if routed is None and frame.get("order_id") is not None:
+            routed = self._by_broker.get(int(frame["order_id"]))
+        if routed is None or routed.terminal:
+            return
+        status = str(frame.get("status") or "").lower()
+        if status in ACK_STATES or routed.acked_at is None:
+            self._acknowledge(routed, frame.get("order_id"))
+        self._apply_status(routed, {**frame, "status": status})
+
+    def _acknowledge(self, routed: RoutedOrder, broker_order_id: Any) -> None:
+        if broker_order_id is not None and routed.broker_order_id is None:
+            routed.broker_order_id = int(broker_order_id)
+            self._by_broker[routed.broker_order_id] = routed
+            if self._supervisor is not None:
+                self._supervisor.track_order(routed.broker_order_id)
+        if routed.acked_at is not None or routed.terminal:
+            return
+        if routed.unknown and broker_order_id is None:
+            return
+        routed.acked_at = self._clock()
+        routed.state = "acknowledged"
+        self._metrics.observe("ibkr_order_ack_ms", (routed.acked_at - routed.submitted_at) * 1e3)
+        self._queue(
+            routed,
+            "SENT",
+            client_order_id=routed.client_order_id,
+            broker_order_id=routed.broker_order_id,
+        )
+        self._fire("ack", routed)
+
+    def _apply_status(self, routed: RoutedOrder, frame: Frame) -> None:
+        status = frame["status"]
+        filled = frame.get("filled")
+        if filled is not None and float(filled) > routed.filled:
+            self._record_fill(routed, float(filled), frame.get("avg_price"))
+        if status in FILLED_STATES or (
+            routed.quantity and routed.filled >= routed.quantity and status not in ACK_STATES
+        ):
+            self._finish(routed, "filled")
+        elif status in CANCELLED_STATES:
+            self._finish(routed, "cancelled")
+        elif status in REJECTED_STATES:
+            routed.error = str(frame.get("message") or status)
+            self._finish(routed, "rejected")
+
+    def _record_fill(self, routed: RoutedOrder, filled: float, avg_price: Any) -> None:
+        delta = filled - routed.filled
+        price = float(avg_price) if avg_price is not None else routed.avg_price or 0.0
+        routed.filled = filled
+        routed.avg_price = price
+        if self._risk is not None and routed.symbol:
+            side = str(routed.order.get("side") or "BUY").upper()
+            account = routed.order.get("account") or routed.contract.get("account")
+            self._risk.apply_fill(
+                routed.symbol, delta, price, side=side, account=account, order_id=routed.book_id
+            )
+
+    def _finish(self, routed: RoutedOrder, state: str) -> None:
+        routed.state = state
+        if routed.broker_order_id is not None:
+            self._by_broker.pop(routed.broker_order_id, None)
+            if self._supervisor is not None:
+                self._supervisor.forget_order(routed.broker_order_id)
+        if state == "filled":
+            routed.filled_at = self._clock()
+            if routed.acked_at is not None:
+                self._metrics.observe(
+                    "ibkr_order_fill_ms", (routed.filled_at - routed.acked_at) * 1e3
+                )
+            self._metrics.observe(
+                "ibkr_order_total_ms", (routed.filled_at - routed.submitted_at) * 1e3
+            )
+            self._queue(routed, "FILLED", filled_qty=routed.filled, avg_price=routed.avg_price)
+            self._fire("fill", routed)
+        elif state == "cancelled":
+            self._queue(routed, "CANCELLED", filled_qty=routed.filled)
+            self._fire("cancel", routed)
+        else:
+            self._metrics.increment_counter("ibkr_order_rejects_total")
+            self._queue(routed, "REJECTED", reason=routed.error)
+            self._fire("reject", routed)
+        if routed.done is not None and not routed.done.done():
+            routed.done.set_result(routed)
+
+    def _reject(self, routed: RoutedOrder, reason: str) -> None:
+        CLIENT_LOG.warning("Order %s rejected: %s", routed.client_order_id, reason)
+        routed.error = reason
+        self._finish(routed, "rejected")
+
+    def _fire(self, kind: str, routed: RoutedOrder) -> None:
+        callback = self._callbacks[kind]
+        if callback is None:
+            return
+        try:
+            callback(routed)
+        except Exception:  # pragma: no cover - callbacks must not break routing
+            CLIENT_LOG.exception("Order %s callback failed for %s", kind, routed.client_order_id)
+
+    def _queue(self, routed: RoutedOrder, status: str, **fields: Any) -> None:
+        if routed.book_id is None:
+            return
+        self._outbox.append(OrderTransition(status, order_id=routed.book_id, fields=fields))
+        if len(self._outbox) >= self._publish_batch:
+            self._flush_wake.set()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run_flusher(), name="centrix-order-status")
+
+    async def _run_flusher(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wake.wait(), timeout=self._publish_interval)
+            except TimeoutError:
+                pass
+            self._flush_wake.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Publish queued status transitions in one batch; returns how many were sent."""
+
+        batch, self._outbox = self._outbox, []
+        if not batch:
+            return 0
+        try:
+            await asyncio.to_thread(self._publisher, batch)
+        except Exception:
+            CLIENT_LOG.exception("Failed to publish %s order status change(s)", len(batch))
+            self._outbox[:0] = batch
+            return 0
+        self._metrics.increment_counter("ibkr_order_status_batches_total")
+        return len(batch)
+
+    async def close(self) -> None:
+        self._detach()
+        if self._detach_replay is not None:
+            self._detach_replay()
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await self.flush()
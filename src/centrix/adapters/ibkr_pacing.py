@@ -0,0 +1,256 @@
+"""Client-side pacing for IBKR requests, modelled on the documented TWS API limits."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from centrix.core.metrics import METRICS, KPIStore
+from centrix.core.ratelimit import SlidingWindow, TokenBucket, WindowMap
+from centrix.settings import AppSettings
+
+ORDER_OPS = frozenset({"order", "cancel_order"})
+HISTORICAL_OPS = frozenset({"history"})
+# Requests without side effects may share one upstream call.
+COALESCING_OPS = frozenset(
+    {"account", "positions", "market_data", "health", "history", "order_status"}
+)
+
+PRIORITY_ORDER = 0
+PRIORITY_DATA = 1
+PRIORITY_HISTORY = 2
+
+Sender = Callable[[str, dict[str, Any], float | None], Awaitable[Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class PacingLimits:
+    """IB pacing rules: API message rate plus the historical-data request limits.
+
+    Historical limits are hard caps over any window: at most ``hist_requests`` per
+    ``hist_window_sec`` and, per contract, exchange and tick type, fewer than six requests
+    in two seconds.
+    """
+
+    msgs_per_sec: float = 45.0
+    hist_requests: int = 60
+    hist_window_sec: float = 600.0
+    hist_identical_sec: float = 15.0
+    hist_contract_requests: int = 5
+    hist_contract_window_sec: float = 2.0
+
+    @classmethod
+    def from_settings(cls, settings: AppSettings) -> PacingLimits:
+        return cls(msgs_per_sec=settings.ibkr_max_msgs_per_sec)
+
+
+@dataclass(order=True, slots=True)
+class _Job:
+    priority: int
+    seq: int
+    op: str = field(compare=False)
+    args: dict[str, Any] = field(compare=False)
+    key: str | None = field(compare=False)
+    future: asyncio.Future[Any] = field(compare=False)
+    timeout: float | None = field(compare=False)
+    send: Sender = field(compare=False)
+    enqueued: float = field(compare=False)
+    waiters: int = field(default=1, compare=False)
+    task: asyncio.Task[None] | None = field(default=None, compare=False)
+
+
+def _priority(op: str) -> int:
+    if op in ORDER_OPS:
+        return PRIORITY_ORDER
+    if op in HISTORICAL_OPS:
+        return PRIORITY_HISTORY
+    return PRIORITY_DATA
+
+
+def _contract_key(args: dict[str, Any]) -> str:
+    # IB counts requests per contract, exchange and tick type, whatever the bar size.
+    return "|".join(
+        str(args.get(name, "")).upper() for name in ("symbol", "exchange", "what_to_show")
+    )
+
+
+class PacingScheduler:
+    """Priority queue in front of the gateway that never exceeds the pacing limits.
+
+    Orders always dispatch ahead of data requests and historical downloads; identical
+    read requests that are queued or in flight share one upstream call, and identical
+    historical requests inside IB's 15 second window are answered from the last result.
+    A historical request that must wait for its own contract window does not hold up the
+    rest.
+    """
+
+    def __init__(
+        self,
+        limits: PacingLimits | None = None,
+        *,
+        metrics: KPIStore | None = None,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        self.limits = limits or PacingLimits()
+        self._metrics = metrics or METRICS
+        self._clock = clock
+        self._queue: list[_Job] = []
+        self._seq = 0
+        self._inflight: dict[str, _Job] = {}
+        self._recent: dict[str, tuple[float, Any]] = {}
+        self._msgs: TokenBucket | None = None
+        self._hist: SlidingWindow | None = None
+        self._contracts: WindowMap[str] | None = None
+        self._wake: asyncio.Event | None = None
+        self._runner: asyncio.Task[None] | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def _now(self) -> float:
+        return self._clock() if self._clock else asyncio.get_running_loop().time()
+
+    def _start(self) -> None:
+        if self._runner is not None and not self._runner.done():
+            return
+        now = self._now()
+        limits = self.limits
+        self._msgs = TokenBucket(limits.msgs_per_sec, limits.msgs_per_sec, now)
+        # Keep the historical logs across restarts of the runner; they are hard caps.
+        if self._hist is None or self._contracts is None:
+            self._hist = SlidingWindow(limits.hist_requests, limits.hist_window_sec)
+            self._contracts = WindowMap(
+                limits.hist_contract_requests, limits.hist_contract_window_sec
+            )
+        self._wake = asyncio.Event()
+        self._runner = asyncio.create_task(self._run(), name="centrix-ibkr-pacing")
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    async def submit(
+        self, op: str, args: dict[str, Any], send: Sender, *, timeout: float | None = None
+    ) -> Any:
+        """Queue a request and return its result once it has been paced and answered."""
+
+        self._start()
+        now = self._now()
+        key = None
+        if op in COALESCING_OPS:
+            key = f"{op}:{json.dumps(args, sort_keys=True, default=str)}"
+            recent = self._recent.get(key)
+            if recent is not None and recent[0] > now:
+                self._metrics.increment_counter("ibkr_coalesced_total")
+                return recent[1]
+            job = self._inflight.get(key)
+            if job is not None:
+                self._metrics.increment_counter("ibkr_coalesced_total")
+                job.waiters += 1
+                return await self._wait(job)
+        self._seq += 1
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        job = _Job(_priority(op), self._seq, op, args, key, future, timeout, send, now)
+        if key is not None:
+            self._inflight[key] = job
+        bisect.insort(self._queue, job)
+        assert self._wake is not None
+        self._wake.set()
+        return await self._wait(job)
+
+    async def _wait(self, job: _Job) -> Any:
+        try:
+            return await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            job.waiters -= 1
+            if job.waiters <= 0:
+                if job in self._queue:
+                    self._drop(job)
+                    job.future.cancel()
+                elif job.task is not None:
+                    job.task.cancel()
+            raise
+
+    def _drop(self, job: _Job) -> None:
+        self._queue.remove(job)
+        if job.key is not None and self._inflight.get(job.key) is job:
+            del self._inflight[job.key]
+
+    def _next_ready(self, now: float) -> tuple[_Job | None, float | None]:
+        assert self._msgs is not None and self._hist is not None and self._contracts is not None
+        msg_wait = self._msgs.wait_time(now)
+        if msg_wait > 0:
+            return None, msg_wait if self._queue else None
+        soonest: float | None = None
+        for job in self._queue:
+            if job.op not in HISTORICAL_OPS:
+                return job, None
+            contract = self._contracts.get(_contract_key(job.args), now)
+            wait = max(self._hist.wait_time(now), contract.wait_time(now))
+            if wait <= 0:
+                self._hist.record(now)
+                contract.record(now)
+                return job, None
+            soonest = wait if soonest is None else min(soonest, wait)
+        return None, soonest
+
+    async def _run(self) -> None:
+        assert self._wake is not None and self._msgs is not None
+        while True:
+            now = self._now()
+            job, wait = self._next_ready(now) if self._queue else (None, None)
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except TimeoutError:
+                    pass
+                continue
+            self._msgs.try_take(now)
+            self._queue.remove(job)
+            waited_ms = max(0.0, (now - job.enqueued) * 1000.0)
+            if waited_ms > 0:
+                self._metrics.increment_counter("ibkr_paced_total")
+            self._metrics.observe("ibkr_pacing_wait_ms", waited_ms)
+            job.task = asyncio.create_task(self._execute(job))
+            self._tasks.add(job.task)
+            job.task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: _Job) -> None:
+        try:
+            result = await job.send(job.op, job.args, job.timeout)
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as exc:
+            if not job.future.done():
+                job.future.set_exception(exc)
+                job.future.exception()  # coalesced waiters may all have gone away
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+            if job.op in HISTORICAL_OPS and job.key is not None:
+                self._recent[job.key] = (self._now() + self.limits.hist_identical_sec, result)
+                self._prune_recent()
+        finally:
+            if job.key is not None and self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+
+    def _prune_recent(self) -> None:
+        now = self._now()
+        for key in [key for key, (expires, _) in self._recent.items() if expires <= now]:
+            del self._recent[key]
+
+    async def close(self) -> None:
+        runner, self._runner = self._runner, None
+        if runner is not None:
+            runner.cancel()
+            try:
+                await runner
+            except asyncio.CancelledError:
+                pass
+        for job in list(self._queue):
+            self._drop(job)
+            job.future.cancel()
@@ -0,0 +1,249 @@
+"""Versioned in-memory account and positions snapshot for the IBKR adapter."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from centrix.ipc.bus import Bus
+
+PortfolioListener = Callable[["PortfolioCache"], None]
+
+
+_POSITION_FIELDS = frozenset(
+    {
+        "symbol",
+        "quantity",
+        "qty",
+        "avg_price",
+        "market_price",
+        "account",
+        "con_id",
+        "conId",
+        "event",
+    }
+)
+
+PositionKey = tuple[str, int | str]
+
+
+@dataclass(frozen=True, slots=True)
+class Position:
+    """One position; slotted and immutable so readers can share instances safely.
+
+    Positions are identified by account and contract id (the symbol when the gateway
+    reports no contract id); fields the cache does not interpret are kept in ``extra``.
+    """
+
+    symbol: str
+    quantity: float
+    avg_price: float
+    market_price: float | None = None
+    account: str = ""
+    con_id: int | None = None
+    extra: Mapping[str, Any] = field(default_factory=dict, hash=False)
+
+    @property
+    def key(self) -> PositionKey:
+        return (self.account, self.con_id if self.con_id is not None else self.symbol)
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> Position:
+        market = data.get("market_price")
+        con_id = data.get("con_id", data.get("conId"))
+        return cls(
+            symbol=str(data.get("symbol") or "").upper(),
+            quantity=float(data.get("quantity", data.get("qty", 0)) or 0),
+            avg_price=float(data.get("avg_price") or 0.0),
+            market_price=float(market) if market is not None else None,
+            account=str(data.get("account") or ""),
+            con_id=int(con_id) if con_id not in (None, "") else None,
+            extra={key: value for key, value in data.items() if key not in _POSITION_FIELDS},
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            **self.extra,
+            "symbol": self.symbol,
+            "quantity": self.quantity,
+            "avg_price": self.avg_price,
+        }
+        if self.market_price is not None:
+            payload["market_price"] = self.market_price
+        if self.account:
+            payload["account"] = self.account
+        if self.con_id is not None:
+            payload["con_id"] = self.con_id
+        return payload
+
+
+class PortfolioCache:
+    """Account values and positions, updated incrementally and versioned.
+
+    ``version`` increases only when something actually changes, so readers can compare
+    it with the value they last saw instead of diffing snapshots. Full snapshots from the
+    gateway and per-position/per-account update callbacks both feed the same cache.
+    """
+
+    def __init__(self, time_provider: Callable[[], float] = time.time) -> None:
+        self._lock = threading.Lock()
+        self._time = time_provider
+        self._positions: dict[PositionKey, Position] = {}
+        self._account: dict[str, Any] = {}
+        self._version = 0
+        self._loaded_at: float | None = None
+        self._updated_at: float | None = None
+        self._listeners: list[PortfolioListener] = []
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def age(self) -> float | None:
+        """Seconds since the cache was last loaded or updated (``None`` if never)."""
+
+        updated = self._updated_at
+        return None if updated is None else max(0.0, self._time() - updated)
+
+    def changed_since(self, version: int) -> bool:
+        return self._version != version
+
+    def subscribe(self, listener: PortfolioListener) -> Callable[[], None]:
+        """Call ``listener(cache)`` after every change; returns an unsubscribe callable."""
+
+        self._listeners.append(listener)
+
+        def _unsubscribe() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _unsubscribe
+
+    def _touch(self, changed: bool) -> None:
+        # Caller holds the lock.
+        self._updated_at = self._time()
+        if changed:
+            self._version += 1
+
+    def _notify(self, changed: bool) -> None:
+        if not changed:
+            return
+        for listener in list(self._listeners):
+            listener(self)
+
+    def load(self, account: Mapping[str, Any], positions: Iterable[Mapping[str, Any]]) -> bool:
+        """Replace the cache with a full gateway snapshot; returns whether it changed."""
+
+        records: dict[PositionKey, Position] = {}
+        for item in positions:
+            position = Position.from_mapping(item)
+            if position.symbol or position.con_id is not None:
+                records[position.key] = position
+        with self._lock:
+            changed = records != self._positions or dict(account) != self._account
+            self._positions = records
+            self._account = dict(account)
+            self._loaded_at = self._time()
+            self._touch(changed)
+        self._notify(changed)
+        return changed
+
+    def apply_position(self, update: Mapping[str, Any]) -> bool:
+        """Apply one position update; a zero quantity removes the position."""
+
+        position = Position.from_mapping(update)
+        if not position.symbol and position.con_id is None:
+            return False
+        with self._lock:
+            current = self._positions.get(position.key)
+            if position.quantity == 0:
+                changed = self._positions.pop(position.key, None) is not None
+            else:
+                changed = current != position
+                self._positions[position.key] = position
+            self._touch(changed)
+        self._notify(changed)
+        return changed
+
+    def apply_account(self, values: Mapping[str, Any]) -> bool:
+        """Merge changed account values (e.g. ``equity``, ``cash``)."""
+
+        with self._lock:
+            delta = {
+                key: value for key, value in values.items() if self._account.get(key) != value
+            }
+            self._account.update(delta)
+            self._touch(bool(delta))
+        self._notify(bool(delta))
+        return bool(delta)
+
+    def account(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._account)
+
+    def position(self, symbol: str, account: str | None = None) -> Position | None:
+        """Return the position in ``symbol``, limited to ``account`` when given."""
+
+        wanted = symbol.upper()
+        with self._lock:
+            records = list(self._positions.values())
+        for record in records:
+            if record.symbol == wanted and account in (None, record.account):
+                return record
+        return None
+
+    def positions(self) -> list[dict[str, Any]]:
+        with self._lock:
+            records = list(self._positions.values())
+        return [record.to_dict() for record in records]
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self._version,
+                "updated_at": self._updated_at,
+                "account": dict(self._account),
+                "positions": [record.to_dict() for record in self._positions.values()],
+            }
+
+    def handle_frame(self, frame: Mapping[str, Any]) -> None:
+        """Apply ``position``/``account`` event frames from the async client."""
+
+        event = frame.get("event")
+        if event == "position":
+            self.apply_position(frame)
+        elif event == "account":
+            values = frame.get("values")
+            if isinstance(values, Mapping):
+                self.apply_account(values)
+
+    def clear(self) -> None:
+        with self._lock:
+            changed = bool(self._positions or self._account)
+            self._positions.clear()
+            self._account.clear()
+            self._loaded_at = None
+            self._updated_at = None
+            if changed:
+                self._version += 1
+        self._notify(changed)
+
+
+def bus_publisher(bus: Bus) -> PortfolioListener:
+    """Return a cache listener that mirrors every change into the bus ``portfolio`` key.
+
+    The dashboard and order-entry processes read that snapshot instead of asking the
+    gateway themselves.
+    """
+
+    def _publish(cache: PortfolioCache) -> None:
+        bus.set_portfolio(cache.snapshot())
+
+    return _publish
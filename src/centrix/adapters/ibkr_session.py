@@ -0,0 +1,235 @@
+"""The async IBKR stack run by the adapter service over one gateway connection."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from centrix.adapters.ibkr import CLIENT_LOG
+from centrix.adapters.ibkr_async import AsyncIbkrClient, AsyncIbkrTransport, JsonLineTransport
+from centrix.adapters.ibkr_marketdata import MarketDataManager, QuotePublisher, publish_quotes
+from centrix.adapters.ibkr_orders import OrderRouter
+from centrix.adapters.ibkr_portfolio import PortfolioCache, bus_publisher
+from centrix.adapters.ibkr_supervisor import ReconnectSupervisor
+from centrix.core.metrics import METRICS, KPIStore
+from centrix.core.orders import OrderBook, OrderTransition
+from centrix.core.risk import RiskEngine
+from centrix.ipc.bus import Bus
+from centrix.settings import AppSettings
+
+# Frame transports the session can run on, by ``IBKR_SESSION_TRANSPORT`` name.
+SESSION_TRANSPORTS: dict[str, Callable[[], AsyncIbkrTransport]] = {
+    "jsonl": JsonLineTransport,
+}
+
+
+def session_transport(name: str) -> AsyncIbkrTransport | None:
+    """Build the named session transport, or ``None`` if there is no such transport."""
+
+    factory = SESSION_TRANSPORTS.get(name.strip().lower())
+    return factory() if factory is not None else None
+
+
+def parse_symbols(raw: str) -> list[str]:
+    """Split a comma separated watchlist into unique upper-case symbols."""
+
+    return list(dict.fromkeys(item.strip().upper() for item in raw.split(",") if item.strip()))
+
+
+class IbkrSession:
+    """One :class:`AsyncIbkrClient` shared by everything the adapter service runs on it.
+
+    The client paces its requests through its :class:`PacingScheduler`; a
+    :class:`ReconnectSupervisor` restores the link and replays market data, order status
+    and the portfolio after drops. The :class:`MarketDataManager` streams the watchlist and
+    publishes quotes to the bus, the :class:`PortfolioCache` is fed by position/account
+    events and mirrored into the bus, and the :class:`OrderRouter` sends approved orders
+    from the order book and publishes their status transitions; orders an earlier session
+    left ``ROUTING`` are reconciled on start instead of being sent again. With a ``risk``
+    engine, the engine follows the portfolio cache and every approved order is checked
+    again against the live exposure right before it is sent.
+    """
+
+    def __init__(
+        self,
+        settings: AppSettings,
+        *,
+        transport: AsyncIbkrTransport,
+        bus: Bus | None = None,
+        symbols: Iterable[str] = (),
+        portfolio: PortfolioCache | None = None,
+        risk: RiskEngine | None = None,
+        quote_publisher: QuotePublisher | None = publish_quotes,
+        route_interval: float = 1.0,
+        metrics: KPIStore | None = None,
+    ) -> None:
+        self._bus = bus or Bus(settings.ipc_db)
+        self._book = OrderBook(self._bus.db_path)
+        self._metrics = metrics or METRICS
+        self._symbols = [symbol.upper() for symbol in symbols]
+        self._route_interval = route_interval
+        self._risk = risk
+        self.portfolio = portfolio or PortfolioCache()
+        self.client = AsyncIbkrClient(
+            settings=settings,
+            transport=transport,
+            metrics=self._metrics,
+            on_event=self.portfolio.handle_frame,
+        )
+        self.market_data = MarketDataManager(
+            self.client, metrics=self._metrics, publisher=quote_publisher
+        )
+        self.supervisor = ReconnectSupervisor(
+            self.client, market_data=self.market_data, metrics=self._metrics
+        )
+        self.router = OrderRouter(
+            self.client,
+            supervisor=self.supervisor,
+            risk=risk,
+            publisher=self._publish_transitions,
+            metrics=self._metrics,
+        )
+        self._detach: list[Any] = [
+            self.portfolio.subscribe(bus_publisher(self._bus)),
+            self.supervisor.add_replay(self.load_portfolio),
+            self.supervisor.add_replay(self.open_watchlist),
+        ]
+        if risk is not None:
+            # Limits follow the live portfolio; fills are folded in by the router.
+            self._detach.append(risk.attach(self.portfolio))
+
+    def _publish_transitions(self, batch: list[OrderTransition]) -> None:
+        self._bus.transition_orders([change.to_change() for change in batch])
+
+    async def start(self) -> None:
+        """Connect and load the session; the supervisor keeps retrying if that fails."""
+
+        try:
+            connected = await self.client.connect()
+        except (OSError, ConnectionError, TimeoutError) as exc:
+            CLIENT_LOG.warning("IBKR session connect failed: %s", exc)
+            connected = False
+        await self.resume_routing()
+        self.supervisor.start()
+        if connected:
+            await self.supervisor.replay()
+
+    async def load_portfolio(self) -> None:
+        """Replace the portfolio cache with the gateway's account and positions."""
+
+        account, positions = await asyncio.gather(self.client.account(), self.client.positions())
+        self.portfolio.load(account, positions)
+
+    async def open_watchlist(self) -> None:
+        """Open streams for watchlist symbols that are not streaming yet."""
+
+        for symbol in self._symbols:
+            if not self.market_data.refs(symbol):
+                await self.market_data.subscribe(symbol)
+
+    @staticmethod
+    def _order_of(data: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+        order: dict[str, Any] = {
+            "qty": data.get("qty"),
+            "side": str(data.get("side") or "BUY").upper(),
+        }
+        if data.get("px"):
+            order["type"] = "LMT"
+            order["limit_price"] = float(data["px"])
+        if data.get("account"):
+            order["account"] = data["account"]
+        return {"symbol": data.get("symbol")}, order
+
+    async def resume_routing(self) -> int:
+        """Follow orders left ``ROUTING`` by an earlier session; returns how many.
+
+        They may already be at the gateway, so they are reconciled by client order id and
+        never sent again.
+        """
+
+        records = await asyncio.to_thread(self._bus.query_orders, status="ROUTING", limit=-1)
+        resumed = 0
+        for record in records:
+            contract, order = self._order_of(record["data"])
+            if self.router.get(self.router.book_client_order_id(record["id"])) is None:
+                self.router.resume(contract, order, book_id=record["id"])
+                resumed += 1
+        return resumed
+
+    async def route_approved(self) -> int:
+        """Claim approved orders as ``ROUTING`` and send them; returns how many were sent.
+
+        The claim is a compare-and-set on the order's status, so an order is sent by one
+        session only, and once: after a restart it is resumed, not routed again.
+        """
+
+        if not self.client.is_connected():
+            return 0
+        records = await asyncio.to_thread(
+            self._bus.query_orders, status="APPROVED", limit=100
+        )
+        if self._risk is not None and records:
+            # Every open order holds exposure, including the approved ones checked below.
+            self._risk.load_orders(await asyncio.to_thread(self._book.open_orders))
+        rejected: list[OrderTransition] = []
+        claims: list[OrderTransition] = []
+        orders: dict[int, tuple[dict[str, Any], dict[str, Any]]] = {}
+        for record in reversed(records):
+            data = record["data"]
+            contract, order = self._order_of(data)
+            if self._risk is not None:
+                decision = self._risk.check({**data, **order, "id": record["id"]})
+                if not decision.ok:
+                    CLIENT_LOG.warning(
+                        "Approved order %s blocked by risk checks: %s",
+                        record["id"],
+                        decision.reason,
+                    )
+                    rejected.append(
+                        OrderTransition(
+                            "REJECTED",
+                            order_id=record["id"],
+                            fields={"reason": f"risk: {decision.reason}"},
+                        )
+                    )
+                    continue
+            orders[record["id"]] = (contract, order)
+            claims.append(
+                OrderTransition(
+                    "ROUTING",
+                    order_id=record["id"],
+                    fields={"client_order_id": self.router.book_client_order_id(record["id"])},
+                )
+            )
+        if not claims and not rejected:
+            return 0
+        results = await asyncio.to_thread(
+            self._bus.transition_orders, [change.to_change() for change in claims + rejected]
+        )
+        sent = 0
+        for claimed in results[: len(claims)]:
+            # ``None`` means another session claimed or the order moved on since the query.
+            if claimed is not None:
+                contract, order = orders[claimed["id"]]
+                self.router.submit(contract, order, book_id=claimed["id"])
+                sent += 1
+        return sent
+
+    async def run(self) -> None:
+        """Route approved orders until cancelled."""
+
+        while True:
+            try:
+                await self.route_approved()
+            except Exception:  # pragma: no cover - keep routing after a bad pass
+                CLIENT_LOG.exception("Routing approved orders failed")
+            await asyncio.sleep(self._route_interval)
+
+    async def stop(self) -> None:
+        for detach in self._detach:
+            detach()
+        await self.router.close()
+        await self.market_data.close()
+        await self.supervisor.stop()
+        await self.client.close()
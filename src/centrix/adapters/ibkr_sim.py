@@ -0,0 +1,693 @@
+"""Simulated IBKR gateway for load tests: a blocking gateway and a JSON-lines TCP service."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any
+
+from centrix.adapters.ibkr import LOG_FORMAT
+from centrix.adapters.ibkr_history import bar_seconds
+from centrix.core.ratelimit import TokenBucket
+
+SIM_LOG = logging.getLogger("centrix.ibkr.sim")
+
+CODE_PACING = 100
+CODE_ORDER_REJECTED = 201
+CODE_NOT_CONNECTED = 504
+CODE_CONNECTIVITY_LOST = 1100
+
+
+class SimGatewayError(RuntimeError):
+    """Error raised by the simulator, carrying an IBKR error code."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass(frozen=True, slots=True)
+class LatencyModel:
+    """Latency distribution in milliseconds: ``fixed``, ``uniform`` or ``lognormal``."""
+
+    kind: str = "lognormal"
+    mean_ms: float = 5.0
+    spread_ms: float = 2.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Return one delay in seconds."""
+
+        if self.kind == "fixed" or self.mean_ms <= 0:
+            value = self.mean_ms
+        elif self.kind == "uniform":
+            value = rng.uniform(self.mean_ms - self.spread_ms, self.mean_ms + self.spread_ms)
+        elif self.kind == "lognormal":
+            # Parameterised by the mean and standard deviation of the delay itself.
+            variance = math.log1p((self.spread_ms / self.mean_ms) ** 2)
+            value = rng.lognormvariate(math.log(self.mean_ms) - variance / 2, math.sqrt(variance))
+        else:
+            raise ValueError(f"unknown latency model: {self.kind}")
+        return max(0.0, value) / 1000.0
+
+    @classmethod
+    def parse(cls, value: Any) -> LatencyModel:
+        if isinstance(value, LatencyModel):
+            return value
+        if isinstance(value, (int, float)):
+            return cls("fixed", float(value), 0.0)
+        return cls(**dict(value))
+
+
+@dataclass(slots=True)
+class SimConfig:
+    """Knobs for the simulator; every probability is per event and every rate per second."""
+
+    seed: int | None = 7
+    symbols: dict[str, float] = field(
+        default_factory=lambda: {"AAPL": 170.0, "MSFT": 320.0, "SPY": 450.0}
+    )
+    volatility: float = 0.2  # annualised, drives the price random walk
+    spread_bps: float = 2.0
+    tick_hz: float = 4.0
+    tick_rates: dict[str, float] = field(default_factory=dict)
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    fill_latency: LatencyModel = field(default_factory=lambda: LatencyModel("lognormal", 20, 10))
+    fill_model: str = "touch"  # ``immediate``, ``touch`` or ``partial``
+    partial_fill_ratio: float = 0.25
+    reject_probability: float = 0.0
+    max_msgs_per_sec: float = 50.0
+    disconnect_every_sec: float = 0.0  # mean seconds between forced drops; 0 disables
+    cash: float = 1_000_000.0
+
+    def tick_rate(self, symbol: str) -> float:
+        return self.tick_rates.get(symbol, self.tick_hz)
+
+    @classmethod
+    def from_mapping(cls, data: dict[str, Any]) -> SimConfig:
+        known = {item.name for item in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"unknown simulator settings: {', '.join(sorted(unknown))}")
+        values = dict(data)
+        for name in ("latency", "fill_latency"):
+            if name in values:
+                values[name] = LatencyModel.parse(values[name])
+        return cls(**values)
+
+
+@dataclass(slots=True)
+class SimOrder:
+    order_id: int
+    symbol: str
+    side: str
+    qty: float
+    limit: float | None
+    client_order_id: str | None = None
+    filled: float = 0.0
+    avg_price: float = 0.0
+    status: str = "Submitted"
+
+    def to_status(self) -> dict[str, Any]:
+        return {
+            "order_id": self.order_id,
+            "client_order_id": self.client_order_id,
+            "symbol": self.symbol,
+            "status": self.status,
+            "filled": self.filled,
+            "remaining": self.qty - self.filled,
+            "avg_price": self.avg_price,
+        }
+
+
+StatusListener = Callable[[dict[str, Any]], None]
+
+
+class SimBroker:
+    """Market, account and order state shared by the simulated gateways.
+
+    Prices follow a seeded geometric random walk advanced lazily from the clock, so quotes
+    are reproducible for a given seed and call sequence. Working orders are matched
+    against the book whenever a symbol's price moves.
+    """
+
+    def __init__(
+        self, config: SimConfig | None = None, *, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.config = config or SimConfig()
+        self._clock = clock
+        self.rng = random.Random(self.config.seed)
+        self._lock = threading.RLock()
+        now = clock()
+        self._prices = dict(self.config.symbols)
+        self._updated = dict.fromkeys(self._prices, now)
+        self._cash = self.config.cash
+        self._positions: dict[str, tuple[float, float]] = {}
+        self._orders: dict[int, SimOrder] = {}
+        self._next_id = 1
+        self._listeners: list[StatusListener] = []
+        self._pacing = TokenBucket(
+            self.config.max_msgs_per_sec, self.config.max_msgs_per_sec, now
+        )
+
+    def add_listener(self, listener: StatusListener) -> Callable[[], None]:
+        self._listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    def pace(self) -> None:
+        """Count one API message, raising IB's pacing error (code 100) when over the limit."""
+
+        if self.config.max_msgs_per_sec <= 0:
+            return
+        with self._lock:
+            if not self._pacing.try_take(self._clock()):
+                raise SimGatewayError(CODE_PACING, "Max rate of messages per second exceeded")
+
+    def _advance(self, symbol: str) -> float:
+        now = self._clock()
+        price = self._prices.setdefault(symbol, 100.0)
+        elapsed = max(0.0, now - self._updated.get(symbol, now))
+        self._updated[symbol] = now
+        if elapsed > 0 and self.config.volatility > 0:
+            sigma = self.config.volatility * math.sqrt(elapsed / (252 * 6.5 * 3600))
+            price *= math.exp(self.rng.gauss(-sigma * sigma / 2, sigma))
+            self._prices[symbol] = price
+        return price
+
+    def quote(self, symbol: str) -> dict[str, Any]:
+        name = symbol.upper()
+        with self._lock:
+            mid = self._advance(name)
+            half = mid * self.config.spread_bps / 20_000
+            quote = {
+                "symbol": name,
+                "bid": round(mid - half, 4),
+                "ask": round(mid + half, 4),
+                "last": round(mid, 4),
+                "bid_size": float(self.rng.randint(1, 20) * 100),
+                "ask_size": float(self.rng.randint(1, 20) * 100),
+                "ts": self._clock(),
+            }
+            self._match(name, quote)
+        return quote
+
+    def account(self) -> dict[str, Any]:
+        with self._lock:
+            value = sum(
+                qty * self._prices.get(symbol, avg)
+                for symbol, (qty, avg) in self._positions.items()
+            )
+            return {"cash": self._cash, "equity": self._cash + value}
+
+    def positions(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "symbol": symbol,
+                    "quantity": qty,
+                    "avg_price": avg,
+                    "market_price": self._prices.get(symbol),
+                }
+                for symbol, (qty, avg) in sorted(self._positions.items())
+                if qty
+            ]
+
+    def history(self, symbol: str, bar_size: str, start: float, end: float) -> list[dict[str, Any]]:
+        """Deterministic synthetic bars for ``[start, end)`` seeded by symbol and timestamp."""
+
+        step = bar_seconds(bar_size)
+        base = self.config.symbols.get(symbol.upper(), 100.0)
+        bars = []
+        ts = math.ceil(start / step) * step
+        while ts < end:
+            rng = random.Random(f"{symbol.upper()}:{bar_size}:{ts}")
+            open_ = base * (1 + rng.uniform(-0.02, 0.02))
+            close = open_ * (1 + rng.gauss(0, 0.002))
+            high = max(open_, close) * (1 + abs(rng.gauss(0, 0.001)))
+            low = min(open_, close) * (1 - abs(rng.gauss(0, 0.001)))
+            bars.append(
+                {
+                    "ts": float(ts),
+                    "open": open_,
+                    "high": high,
+                    "low": low,
+                    "close": close,
+                    "volume": float(rng.randint(100, 10_000)),
+                }
+            )
+            ts += step
+        return bars
+
+    def place(self, contract: dict[str, Any], order: dict[str, Any]) -> SimOrder:
+        symbol = str(contract.get("symbol") or order.get("symbol") or "").upper()
+        qty = abs(float(order.get("qty", order.get("quantity", 0)) or 0))
+        if not symbol or qty <= 0:
+            raise SimGatewayError(CODE_ORDER_REJECTED, "Order rejected: invalid symbol or size")
+        limit = order.get("limit_price", order.get("limit"))
+        with self._lock:
+            record = SimOrder(
+                self._next_id,
+                symbol,
+                str(order.get("side") or "BUY").upper(),
+                qty,
+                float(limit) if limit is not None else None,
+                client_order_id=order.get("client_order_id"),
+            )
+            self._next_id += 1
+            self._orders[record.order_id] = record
+            if self.rng.random() < self.config.reject_probability:
+                record.status = "Inactive"
+        return record
+
+    def fill_working(self, order_id: int) -> SimOrder | None:
+        """Try to fill a working order against the current quote (used after fill latency)."""
+
+        with self._lock:
+            record = self._orders.get(order_id)
+            if record is None or record.status != "Submitted":
+                return record
+            self._match(record.symbol, None, only=record)
+            return record
+
+    def cancel(self, order_id: int) -> SimOrder:
+        with self._lock:
+            record = self._orders.get(order_id)
+            if record is None:
+                raise SimGatewayError(135, f"Can't find order with id = {order_id}")
+            if record.status == "Submitted":
+                record.status = "Cancelled"
+                self._emit(record)
+            return record
+
+    def order_status(
+        self, order_id: int | None = None, client_order_id: str | None = None
+    ) -> dict[str, Any]:
+        with self._lock:
+            record = self._orders.get(order_id) if order_id is not None else None
+            if record is None and client_order_id is not None:
+                record = next(
+                    (
+                        item
+                        for item in self._orders.values()
+                        if item.client_order_id == client_order_id
+                    ),
+                    None,
+                )
+            if record is None:
+                raise SimGatewayError(135, f"Can't find order with id = {order_id}")
+            return record.to_status()
+
+    def _match(
+        self, symbol: str, quote: dict[str, Any] | None, only: SimOrder | None = None
+    ) -> None:
+        # Caller holds the lock.
+        if only is not None:
+            working = [only]
+        else:
+            working = [
+                record
+                for record in self._orders.values()
+                if record.symbol == symbol and record.status == "Submitted"
+            ]
+        if not working:
+            return
+        if quote is None:
+            mid = self._advance(symbol)
+            half = mid * self.config.spread_bps / 20_000
+            quote = {"bid": mid - half, "ask": mid + half}
+        for record in working:
+            price = quote["ask"] if record.side == "BUY" else quote["bid"]
+            if record.limit is not None and self.config.fill_model != "immediate":
+                if (price > record.limit) if record.side == "BUY" else (price < record.limit):
+                    continue
+            if record.limit is not None and self.config.fill_model == "immediate":
+                price = record.limit
+            remaining = record.qty - record.filled
+            chunk = remaining
+            if self.config.fill_model == "partial":
+                step = max(1.0, math.ceil(record.qty * self.config.partial_fill_ratio))
+                chunk = min(remaining, step)
+            self._fill(record, chunk, price)
+
+    def _fill(self, record: SimOrder, qty: float, price: float) -> None:
+        total = record.filled + qty
+        record.avg_price = (record.avg_price * record.filled + price * qty) / total
+        record.filled = total
+        if record.filled >= record.qty:
+            record.status = "Filled"
+        signed = qty if record.side == "BUY" else -qty
+        held, avg = self._positions.get(record.symbol, (0.0, 0.0))
+        position = held + signed
+        if held == 0 or (held > 0) == (signed > 0):
+            avg = (avg * abs(held) + price * abs(signed)) / abs(position)
+        elif position and (position > 0) != (held > 0):
+            avg = price
+        self._positions[record.symbol] = (position, avg if position else 0.0)
+        self._cash -= signed * price
+        self._emit(record)
+
+    def _emit(self, record: SimOrder) -> None:
+        status = record.to_status()
+        for listener in list(self._listeners):
+            listener(status)
+
+
+class SimIbkrGateway:
+    """Blocking :class:`~centrix.adapters.ibkr.IbkrGateway` backed by a :class:`SimBroker`.
+
+    Every call sleeps for a latency sample and counts against the simulated pacing limit.
+    Orders are placed, then matched after a fill-latency sample; with ``disconnect_every_sec``
+    set the link drops at random and calls fail with code 504 until reconnected.
+    """
+
+    def __init__(
+        self,
+        config: SimConfig | None = None,
+        *,
+        broker: SimBroker | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.broker = broker or SimBroker(config, clock=clock)
+        self.config = self.broker.config
+        self._sleep = sleep
+        self._clock = clock
+        self._connected = False
+        self._drop_at: float | None = None
+        self.connection_attempts = 0
+        self.disconnects = 0
+
+    def _delay(self, model: LatencyModel | None = None) -> None:
+        delay = (model or self.config.latency).sample(self.broker.rng)
+        if delay > 0:
+            self._sleep(delay)
+
+    def _schedule_drop(self) -> None:
+        every = self.config.disconnect_every_sec
+        self._drop_at = (
+            self._clock() + self.broker.rng.expovariate(1.0 / every) if every > 0 else None
+        )
+
+    def _call(self) -> None:
+        if self._connected and self._drop_at is not None and self._clock() >= self._drop_at:
+            self._connected = False
+            self.disconnects += 1
+        if not self._connected:
+            raise SimGatewayError(CODE_NOT_CONNECTED, "Not connected")
+        self.broker.pace()
+        self._delay()
+
+    def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
+        self.connection_attempts += 1
+        self._delay()
+        self._connected = True
+        self._schedule_drop()
+        return True
+
+    def disconnect(self) -> None:
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected and (self._drop_at is None or self._clock() < self._drop_at)
+
+    def health(self) -> dict[str, Any]:
+        return {
+            "connected": self.is_connected(),
+            "connection_attempts": self.connection_attempts,
+            "disconnects": self.disconnects,
+            "simulated": True,
+        }
+
+    def fetch_account(self) -> dict[str, Any]:
+        self._call()
+        return self.broker.account()
+
+    def fetch_positions(self) -> list[dict[str, Any]]:
+        self._call()
+        return self.broker.positions()
+
+    def stream_market_data(self, symbol: str, snapshot_sec: int) -> dict[str, Any]:
+        self._call()
+        return {**self.broker.quote(symbol), "snapshot_sec": snapshot_sec}
+
+    def fetch_history(
+        self, symbol: str, bar_size: str, start: float, end: float
+    ) -> list[dict[str, Any]]:
+        self._call()
+        return self.broker.history(symbol, bar_size, start, end)
+
+    def send_order(self, contract: dict[str, Any], order: dict[str, Any]) -> dict[str, Any]:
+        self._call()
+        record = self.broker.place(contract, order)
+        if record.status == "Submitted":
+            self._delay(self.config.fill_latency)
+            self.broker.fill_working(record.order_id)
+        return {**record.to_status(), "timestamp": self._clock()}
+
+    def cancel_order(self, order_id: int) -> dict[str, Any]:
+        self._call()
+        return self.broker.cancel(order_id).to_status()
+
+    def order_status(
+        self, order_id: int | None = None, client_order_id: str | None = None
+    ) -> dict[str, Any]:
+        self._call()
+        return self.broker.order_status(order_id, client_order_id)
+
+
+class SimGatewayServer:
+    """Serve a :class:`SimBroker` over TCP using the async client's JSON-lines protocol.
+
+    Each connection gets replies after a latency sample, ``tick`` events at the configured
+    per-symbol rate for subscribed symbols and ``order_status`` events as orders work.
+    Pacing violations are answered with code 100, and random drops close the socket after
+    an IB-style 1100 notice.
+    """
+
+    def __init__(self, config: SimConfig | None = None, *, broker: SimBroker | None = None) -> None:
+        self.broker = broker or SimBroker(config)
+        self.config = self.broker.config
+        self._server: asyncio.Server | None = None
+        self.connections = 0
+
+    @property
+    def port(self) -> int:
+        assert self._server is not None and self._server.sockets
+        return int(self._server.sockets[0].getsockname()[1])
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        SIM_LOG.info("Simulated IBKR gateway listening on %s:%s", host, self.port)
+        return self.port
+
+    async def close(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        session = _SimSession(self, writer)
+        try:
+            await session.run(reader)
+        finally:
+            session.close()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):  # pragma: no cover - peer already gone
+                pass
+
+
+class _SimSession:
+    def __init__(self, server: SimGatewayServer, writer: asyncio.StreamWriter) -> None:
+        self._server = server
+        self._broker = server.broker
+        self._config = server.config
+        self._writer = writer
+        self._write_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task[Any]] = set()
+        self._streams: dict[str, asyncio.Task[None]] = {}
+        self._inflight: dict[int, asyncio.Task[None]] = {}
+        self._owned: set[int] = set()
+        self._loop = asyncio.get_running_loop()
+        self._detach = self._broker.add_listener(self._on_status)
+
+    def _spawn(self, coro: Any) -> asyncio.Task[Any]:
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _write(self, frame: dict[str, Any]) -> None:
+        if self._writer.is_closing():
+            return
+        data = json.dumps(frame, separators=(",", ":")).encode("utf-8") + b"\n"
+        async with self._write_lock:
+            self._writer.write(data)
+            await self._writer.drain()
+
+    def _on_status(self, status: dict[str, Any]) -> None:
+        if status["order_id"] not in self._owned:
+            return
+        self._loop.call_soon_threadsafe(
+            lambda: self._spawn(self._write({"event": "order_status", **status}))
+        )
+
+    async def run(self, reader: asyncio.StreamReader) -> None:
+        every = self._config.disconnect_every_sec
+        if every > 0:
+            self._spawn(self._drop_later(self._broker.rng.expovariate(1.0 / every)))
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                frame = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            op = frame.get("op")
+            if op == "hello":
+                continue
+            if op == "cancel":
+                task = self._inflight.pop(int((frame.get("args") or {}).get("id", -1)), None)
+                if task is not None:
+                    task.cancel()
+                continue
+            if "id" in frame:
+                req_id = int(frame["id"])
+                args = frame.get("args") or {}
+                self._inflight[req_id] = self._spawn(self._answer(req_id, op, args))
+
+    async def _drop_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._write({"code": CODE_CONNECTIVITY_LOST, "message": "Connectivity lost"})
+        self._writer.close()
+
+    async def _answer(self, req_id: int, op: str, args: dict[str, Any]) -> None:
+        try:
+            await asyncio.sleep(self._config.latency.sample(self._broker.rng))
+            self._broker.pace()
+            result = self._execute(op, args)
+            reply: dict[str, Any] = {"id": req_id, "ok": True, "result": result}
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            reply = {"id": req_id, "ok": False, "code": getattr(exc, "code", -1)}
+            reply["message"] = str(exc)
+        finally:
+            self._inflight.pop(req_id, None)
+        await self._write(reply)
+
+    def _execute(self, op: str, args: dict[str, Any]) -> Any:
+        broker = self._broker
+        if op == "account":
+            return broker.account()
+        if op == "positions":
+            return broker.positions()
+        if op == "market_data":
+            return broker.quote(args["symbol"])
+        if op == "history":
+            return broker.history(
+                args["symbol"], args["bar_size"], float(args["start"]), float(args["end"])
+            )
+        if op == "health":
+            return {"connected": True, "simulated": True, "connections": self._server.connections}
+        if op == "order":
+            record = broker.place(args.get("contract") or {}, args.get("order") or {})
+            self._owned.add(record.order_id)
+            if record.status == "Submitted":
+                self._spawn(self._work(record.order_id))
+            return record.to_status()
+        if op == "cancel_order":
+            return broker.cancel(int(args["order_id"])).to_status()
+        if op == "order_status":
+            order_id = args.get("order_id")
+            return broker.order_status(
+                int(order_id) if order_id is not None else None, args.get("client_order_id")
+            )
+        if op == "subscribe_md":
+            symbol = str(args["symbol"]).upper()
+            if symbol not in self._streams:
+                self._streams[symbol] = self._spawn(self._ticks(symbol))
+            return {"symbol": symbol}
+        if op == "unsubscribe_md":
+            task = self._streams.pop(str(args["symbol"]).upper(), None)
+            if task is not None:
+                task.cancel()
+            return {}
+        raise SimGatewayError(-1, f"unsupported op: {op}")
+
+    async def _work(self, order_id: int) -> None:
+        # Keep matching until the order is done; partial fills need several passes.
+        while True:
+            await asyncio.sleep(self._config.fill_latency.sample(self._broker.rng))
+            record = self._broker.fill_working(order_id)
+            if record is None or record.status != "Submitted":
+                return
+
+    async def _ticks(self, symbol: str) -> None:
+        rate = self._config.tick_rate(symbol)
+        if rate <= 0:
+            return
+        while True:
+            await asyncio.sleep(self._broker.rng.expovariate(rate))
+            await self._write({"event": "tick", **self._broker.quote(symbol)})
+
+    def close(self) -> None:
+        self._detach()
+        for task in list(self._tasks):
+            task.cancel()
+
+
+def load_config(path: str | Path | None) -> SimConfig:
+    if path is None:
+        return SimConfig()
+    return SimConfig.from_mapping(json.loads(Path(path).read_text("utf-8")))
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the simulated gateway as a local TCP service."""
+
+    parser = argparse.ArgumentParser(description="Simulated IBKR gateway")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4002)
+    parser.add_argument("--config", help="JSON file with SimConfig fields")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+
+    async def _serve() -> None:
+        server = SimGatewayServer(load_config(args.config))
+        await server.start(args.host, args.port)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        SIM_LOG.info("Simulated gateway stopped")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual entry point
+    raise SystemExit(main())
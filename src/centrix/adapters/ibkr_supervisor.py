@@ -0,0 +1,207 @@
+"""Connection supervision for the async IBKR client: detect drops, reconnect, replay."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from centrix.adapters.ibkr import CLIENT_LOG, backoff_delay
+from centrix.adapters.ibkr_async import AsyncIbkrClient, Frame, IbkrTimeoutError
+from centrix.adapters.ibkr_marketdata import MarketDataManager
+from centrix.core.metrics import METRICS, KPIStore
+
+# TWS system codes: IB link lost; restored with data lost; restored with data kept.
+CODE_CONNECTIVITY_LOST = 1100
+CODE_RESTORED_DATA_LOST = 1101
+CODE_RESTORED_DATA_KEPT = 1102
+
+ReplayHook = Callable[[], Awaitable[Any]]
+
+
+class ReconnectSupervisor:
+    """Keep an :class:`AsyncIbkrClient` connected and restore its session after drops.
+
+    A drop is a closed connection, a failed heartbeat request, or TWS reporting code 1100.
+    The supervisor reconnects with jittered exponential backoff and then replays the
+    session: market-data streams are re-opened, status is re-requested for outstanding
+    orders and any registered replay hooks run. Code 1101 (IB link restored but market
+    data lost) replays without reconnecting; 1102 only clears the degraded state.
+    """
+
+    def __init__(
+        self,
+        client: AsyncIbkrClient,
+        *,
+        market_data: MarketDataManager | None = None,
+        heartbeat_sec: float | None = None,
+        heartbeat_timeout: float | None = None,
+        base_delay: float | None = None,
+        max_delay: float | None = None,
+        metrics: KPIStore | None = None,
+        rng: Callable[[], float] = random.random,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        settings = client.settings
+        self._client = client
+        self._market_data = market_data
+        self._heartbeat = (
+            heartbeat_sec if heartbeat_sec is not None else settings.ibkr_heartbeat_sec
+        )
+        self._heartbeat_timeout = (
+            heartbeat_timeout if heartbeat_timeout is not None else client.request_timeout()
+        )
+        self._base = base_delay if base_delay is not None else settings.ibkr_reconnect_base_sec
+        self._max = max_delay if max_delay is not None else settings.ibkr_reconnect_max_sec
+        self._metrics = metrics or METRICS
+        self._rng = rng
+        self._sleep = sleep
+        self._clock = clock
+        self._orders: set[int] = set()
+        self._hooks: list[ReplayHook] = []
+        self._state = "stopped"
+        self._need_reconnect = False
+        self._need_replay = False
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._detach: Callable[[], None] | None = None
+        self.reconnects = 0
+
+    @property
+    def state(self) -> str:
+        """One of ``stopped``, ``connected``, ``degraded`` or ``reconnecting``."""
+
+        return self._state
+
+    def track_order(self, order_id: int) -> None:
+        """Remember an outstanding order whose status must be re-requested after a drop."""
+
+        self._orders.add(order_id)
+
+    def forget_order(self, order_id: int) -> None:
+        self._orders.discard(order_id)
+
+    def add_replay(self, hook: ReplayHook) -> Callable[[], None]:
+        """Run ``hook`` after every reconnect; returns a callable that removes it."""
+
+        self._hooks.append(hook)
+
+        def _remove() -> None:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+        return _remove
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._detach = self._client.add_event_handler(self._on_frame)
+        self._need_reconnect = not self._client.is_connected()
+        self._state = "connected" if not self._need_reconnect else "reconnecting"
+        self._task = asyncio.create_task(self._run(), name="centrix-ibkr-supervisor")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if self._detach is not None:
+            self._detach()
+            self._detach = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._state = "stopped"
+
+    def _on_frame(self, frame: Frame) -> None:
+        code = frame.get("code")
+        if frame.get("event") == "disconnected":
+            self._trigger(reconnect=True)
+        elif code == CODE_CONNECTIVITY_LOST:
+            self._state = "degraded"
+        elif code == CODE_RESTORED_DATA_LOST:
+            self._state = "connected"
+            self._trigger(replay=True)
+        elif code == CODE_RESTORED_DATA_KEPT:
+            self._state = "connected"
+
+    def _trigger(self, *, reconnect: bool = False, replay: bool = False) -> None:
+        self._need_reconnect = self._need_reconnect or reconnect
+        self._need_replay = self._need_replay or replay
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            if self._need_reconnect:
+                await self._reconnect()
+            elif self._need_replay:
+                self._need_replay = False
+                await self.replay()
+            self._wake.clear()
+            if self._need_reconnect or self._need_replay:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._heartbeat)
+            except TimeoutError:
+                if not await self._heartbeat_ok():
+                    CLIENT_LOG.warning("IBKR heartbeat failed; reconnecting")
+                    self._metrics.increment_counter("ibkr_heartbeat_failures_total")
+                    self._need_reconnect = True
+
+    async def _heartbeat_ok(self) -> bool:
+        if not self._client.is_connected():
+            return False
+        try:
+            await self._client.request("health", timeout=self._heartbeat_timeout)
+        except (IbkrTimeoutError, ConnectionError):
+            return False
+        except Exception:
+            # An error reply still proves the gateway is answering.
+            return True
+        return True
+
+    async def _reconnect(self) -> None:
+        self._state = "reconnecting"
+        started = self._clock()
+        try:
+            await self._client.close()
+        except Exception:  # pragma: no cover - the old link is already broken
+            CLIENT_LOG.debug("Ignoring error while closing dropped IBKR connection")
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if await self._client.connect():
+                    break
+            except Exception as exc:
+                CLIENT_LOG.warning("IBKR reconnect attempt %s failed: %s", attempt, exc)
+            delay = backoff_delay(attempt, self._base, self._max, self._rng)
+            await self._sleep(delay)
+        self._need_reconnect = False
+        self._need_replay = False
+        self.reconnects += 1
+        self._state = "connected"
+        self._metrics.increment_counter("ibkr_reconnects_total")
+        self._metrics.observe("ibkr_reconnect_ms", max(0.0, (self._clock() - started) * 1000.0))
+        CLIENT_LOG.info("IBKR connection restored after %s attempt(s)", attempt)
+        await self.replay()
+
+    async def replay(self) -> None:
+        """Restore streams, order status and hook-managed state on the current connection."""
+
+        jobs: list[Awaitable[Any]] = []
+        if self._market_data is not None:
+            jobs.append(self._market_data.resubscribe_all())
+        jobs.extend(
+            self._client.request("order_status", {"order_id": order_id})
+            for order_id in sorted(self._orders)
+        )
+        jobs.extend(hook() for hook in list(self._hooks))
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        for failure in failures:
+            CLIENT_LOG.warning("IBKR session replay step failed: %s", failure)
+        self._metrics.increment_counter("ibkr_replays_total")
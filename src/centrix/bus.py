@@ -8,9 +8,12 @@ import sqlite3
 import threading
 import time
 import uuid
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
+from centrix.settings import get_settings
+
 log = logging.getLogger("centrix.bus")
 
 _DB_LOCK = threading.RLock()
@@ -233,29 +236,162 @@ def append_event(
     log.debug("Appended event %s -> %s %s", eid, cmd_id, message)
 
 
-def touch_service(name: str, state: str = "up", details: dict[str, Any] | None = None) -> None:
-    """Upsert the status record for a service."""
+_UPSERT_STATUS = """
+INSERT INTO svc_status(service, last_seen, state, details)
+VALUES(?, ?, ?, ?)
+ON CONFLICT(service) DO UPDATE SET
+    last_seen=excluded.last_seen,
+    state=excluded.state,
+    details=excluded.details
+"""
 
-    path = _status_db_path()
-    now = time.time()
-    payload = _json(details) if details is not None else None
-    try:
-        with sqlite3.connect(str(path)) as conn:
+
+class _Beat:
+    __slots__ = ("details", "seen_at", "state", "written_at")
+
+    def __init__(self, state: str, details: str | None, seen_at: float) -> None:
+        self.state = state
+        self.details = details
+        self.seen_at = seen_at
+        self.written_at = 0.0
+
+
+class HeartbeatPublisher:
+    """Service heartbeats for every component in the process over one SQLite connection.
+
+    Beats are recorded in memory. A change of state or details is written at once, and so
+    is a beat arriving ``max_interval`` or more after its component's last write; a
+    background thread also refreshes ``last_seen`` for every component that beat since its
+    last write, all in one transaction per ``max_interval``. A component beating every
+    ``c`` seconds therefore never shows a ``last_seen`` older than ``max(c, 2 *
+    max_interval)``, which must stay inside the dashboard health window.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_interval: float | None = None,
+        time_fn: Callable[[], float] = time.time,
+        background: bool = True,
+    ) -> None:
+        self._max_interval = max_interval
+        self._time = time_fn
+        self._background = background
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Beat] = {}
+        self._conn: sqlite3.Connection | None = None
+        self._conn_key: Path | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.writes = 0
+
+    @property
+    def max_interval(self) -> float:
+        if self._max_interval is None:
+            self._max_interval = get_settings().heartbeat_max_interval_sec
+        return self._max_interval
+
+    def beat(self, name: str, state: str = "up", details: dict[str, Any] | None = None) -> None:
+        """Record a heartbeat; ``details=None`` keeps the previously reported details."""
+
+        now = self._time()
+        payload = _json(details) if details is not None else None
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self._entries[name] = _Beat(state, payload, now)
+                changed = True
+            else:
+                if payload is None:
+                    payload = entry.details
+                changed = entry.state != state or entry.details != payload
+                changed = changed or now - entry.written_at >= self.max_interval
+                entry.state, entry.details, entry.seen_at = state, payload, now
+            if changed:
+                self._flush_locked()
+        if self._background:
+            self._ensure_thread()
+
+    def flush(self) -> int:
+        """Write every component that beat since its last write; returns rows written."""
+
+        with self._lock:
+            return self._flush_locked()
+
+    def _connection(self) -> sqlite3.Connection:
+        path = _status_db_path()
+        key = path.resolve()
+        if self._conn is None or key != self._conn_key or not path.exists():
+            if self._conn is not None:
+                self._conn.close()
+            conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
             conn.execute("PRAGMA journal_mode=WAL;")
             conn.execute(_CREATE_STATUS.strip())
-            conn.execute(
-                """
-                INSERT INTO svc_status(service, last_seen, state, details)
-                VALUES(?, ?, ?, ?)
-                ON CONFLICT(service) DO UPDATE SET
-                    last_seen=excluded.last_seen,
-                    state=excluded.state,
-                    details=excluded.details
-                """,
-                (name, now, state, payload),
+            self._conn, self._conn_key = conn, key
+            # A new database only receives beats recorded since the last write.
+            for name in [n for n, e in self._entries.items() if e.written_at >= e.seen_at]:
+                del self._entries[name]
+        return self._conn
+
+    def _flush_locked(self) -> int:
+        try:
+            conn = self._connection()
+            rows = [
+                (name, entry.seen_at, entry.state, entry.details)
+                for name, entry in self._entries.items()
+                if entry.seen_at > entry.written_at
+            ]
+            if not rows:
+                return 0
+            with conn:
+                conn.executemany(_UPSERT_STATUS, rows)
+        except Exception:  # pragma: no cover - defensive
+            log.exception("Failed to update svc_status")
+            return 0
+        for name, seen_at, _state, _details in rows:
+            self._entries[name].written_at = seen_at
+        self.writes += 1
+        return len(rows)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="centrix-heartbeats", daemon=True
             )
-    except Exception:  # pragma: no cover - defensive
-        log.exception("Failed to update svc_status for %s", name)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.max_interval):
+            self.flush()
+
+    def forget(self, name: str) -> None:
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def close(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=1.0)
+        with self._lock:
+            self._flush_locked()
+            if self._conn is not None:
+                self._conn.close()
+            self._conn, self._conn_key = None, None
+
+
+HEARTBEATS = HeartbeatPublisher()
+
+
+def touch_service(name: str, state: str = "up", details: dict[str, Any] | None = None) -> None:
+    """Record a service heartbeat (written on change or every ``max_interval``)."""
+
+    HEARTBEATS.beat(name, state, details)
 
 
 def _parse_details(raw: str | None) -> dict[str, Any] | None:
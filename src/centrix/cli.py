@@ -10,7 +10,7 @@ import sys
 import time
 from collections import deque
 from collections.abc import Iterable, Iterator
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -28,15 +28,18 @@ from centrix.core.logging import (
     log_event,
     warn_on_local_env,
 )
-from centrix.core.metrics import snapshot_kpis
+from centrix.core.metrics import aggregate_kpis, retain_kpis
+from centrix.core.order_import import DEFAULT_BATCH_SIZE, detect_format, parse_rows, submit_rows
+from centrix.core.risk import check_order
 from centrix.ipc import Bus, is_running, pidfile, read_state, write_state
 from centrix.settings import get_settings
 from centrix.shared.locks import (
-    acquire_lock,
+    CONTROL_LOCK,
+    CONTROL_LOCK_TTL,
+    LOCKS,
+    LockBusyError,
     list_lock_files,
-    lock_owner,
     reaper_sweep,
-    release_lock,
 )
 
 from . import __version__
@@ -67,8 +70,8 @@ SERVICE_MODULES = {
     "ibkr": "centrix.services.ibkr_worker",
 }
 ALLOWED_TARGETS: list[str] = list(SERVICE_MODULES)
-LOCK_NAME = "svc.control"
-LOCK_TTL = 30
+LOCK_NAME = CONTROL_LOCK
+LOCK_TTL = CONTROL_LOCK_TTL
 PYTHON_BIN = Path(".venv/bin/python") if Path(".venv/bin/python").exists() else Path(sys.executable)
 DASHBOARD_LOG = Path("/tmp/ml_dashboard.log")
 
@@ -165,28 +168,41 @@ def _parse_targets(target: str) -> list[str]:
 @contextmanager
 def _control_lock(action: str, target: Iterable[str]) -> Iterator[None]:
     names = ",".join(target)
-    if not acquire_lock(LOCK_NAME, ttl=LOCK_TTL):
-        owner = lock_owner(LOCK_NAME) or {}
-        emit_alert(
-            "ERROR",
-            f"{action}.lock",
-            "control lock busy",
-            fingerprint=f"{LOCK_NAME}:{names}",
-        )
-        log_event(
-            "cli",
-            f"{action}.lock",
-            "control lock busy",
-            level="WARN",
-            target=names,
-            owner=owner.get("pid", "?"),
-        )
-        typer.secho("control operations are busy", err=True, fg=typer.colors.RED)
-        raise typer.Exit(1)
+    lease = ExitStack()
     try:
-        yield
+        try:
+            lease.enter_context(
+                LOCKS.hold(
+                    LOCK_NAME,
+                    owner=f"cli:{action}",
+                    ttl=LOCK_TTL,
+                    wait=get_settings().control_lock_wait_sec,
+                    action=action,
+                )
+            )
+        except LockBusyError as exc:
+            emit_alert(
+                "ERROR",
+                f"{action}.lock",
+                "control lock busy",
+                fingerprint=f"{LOCK_NAME}:{names}",
+            )
+            log_event(
+                "cli",
+                f"{action}.lock",
+                "control lock busy",
+                level="WARN",
+                target=names,
+                owner=exc.holder.get("owner") or exc.holder.get("pid", "?"),
+            )
+            typer.secho("control operations are busy", err=True, fg=typer.colors.RED)
+            raise typer.Exit(1) from None
+        # Only acquiring is guarded: errors raised by the action itself propagate as-is.
+        with lease:
+            yield
     finally:
-        release_lock(LOCK_NAME)
+        # The CLI exits right after the action; keep its lock telemetry for aggregation.
+        retain_kpis("cli")
 
 
 def _service_command(name: str) -> list[str]:
@@ -534,6 +550,18 @@ def order_new(
     qty: int = typer.Option(..., "--qty", min=1, help="Quantity."),
     px: float = typer.Option(..., "--px", help="Price."),
 ) -> None:
+    decision = check_order({"symbol": symbol, "qty": qty, "px": px})
+    if not decision.ok:
+        log_event(
+            "cli",
+            "order.new",
+            "order rejected by risk checks",
+            level="WARN",
+            symbol=symbol,
+            reason=decision.reason,
+        )
+        typer.echo(f"risk check failed: {decision.reason}", err=True)
+        raise typer.Exit(1)
     log_event("cli", "order.new", "stub order accepted", symbol=symbol, qty=qty, px=px)
     orders.add_order(
         {
@@ -550,13 +578,62 @@ def order_new(
     )
 
 
+@order_app.command("import")
+def order_import(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV or JSONL file."),
+    fmt: str | None = typer.Option(None, "--format", help="csv|jsonl (default: file suffix)."),
+    batch_size: int = typer.Option(
+        DEFAULT_BATCH_SIZE, "--batch-size", min=1, help="Rows per transaction."
+    ),
+    no_approval: bool = typer.Option(
+        False, "--no-approval", help="Store orders as NEW without approval tokens."
+    ),
+    initiator: str | None = typer.Option(None, "--initiator", help="Initiator recorded."),
+) -> None:
+    try:
+        file_format = detect_format(path.name, fmt)
+    except ValueError as exc:
+        typer.echo(str(exc), err=True)
+        raise typer.Exit(2) from None
+    who = initiator or os.environ.get("USER") or "cli"
+    accepted = failed = 0
+    with path.open(encoding="utf-8", newline="") as handle:
+        results = submit_rows(
+            parse_rows(handle, file_format),
+            source="cli",
+            initiator=who,
+            request_approval=not no_approval,
+            batch_size=batch_size,
+        )
+        for result in results:
+            if result["ok"]:
+                accepted += 1
+            else:
+                failed += 1
+            typer.echo(json.dumps(result, separators=(",", ":")))
+    log_event(
+        "cli",
+        "order.import",
+        "bulk order import finished",
+        file=str(path),
+        accepted=accepted,
+        failed=failed,
+    )
+    summary = {"status": "done", "accepted": accepted, "failed": failed}
+    typer.echo(json.dumps(summary, separators=(",", ":")))
+    if failed:
+        raise typer.Exit(1)
+
+
 @locks_app.command("ls")
 def locks_ls() -> None:
     entries = list_lock_files()
     if not entries:
         typer.echo("no locks")
         return
-    header = f"{'name':<20} {'pid':>6} {'age_s':>10} {'ttl_s':>10} {'expired':>8}"
+    header = (
+        f"{'name':<20} {'owner':<20} {'pid':>6} {'age_s':>10} {'ttl_s':>10} {'expired':>8}"
+    )
     typer.echo(header)
     now_ms = int(time.time() * 1000)
     for entry in entries:
@@ -566,7 +643,7 @@ def locks_ls() -> None:
         ttl_s = ttl_ms / 1000 if ttl_ms else 0.0
         expired_text = "true" if entry["expired"] else "false"
         line = (
-            f"{entry['name']:<20} {entry['pid']:>6} {age_s:>10.1f} "
+            f"{entry['name']:<20} {entry['owner'] or '-':<20} {entry['pid']:>6} {age_s:>10.1f} "
             f"{ttl_s:>10.1f} {expired_text:>8}"
         )
         typer.echo(line)
@@ -590,7 +667,7 @@ def diag_snapshot() -> None:
         "ts": timestamp.isoformat(timespec="seconds"),
         "state": read_state(),
         "services": _service_snapshot(),
-        "kpi": snapshot_kpis(),
+        "kpi": aggregate_kpis(),
         "alerts": alert_counters(),
         "orders": orders.list_orders(),
     }
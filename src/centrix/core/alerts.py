@@ -3,21 +3,57 @@
 from __future__ import annotations
 
 import time
-from collections import deque
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from threading import Lock
 from typing import Any
 
 from centrix.core.logging import log_event
 from centrix.core.metrics import METRICS
+from centrix.core.ratelimit import BucketMap, TokenBucket
 from centrix.settings import AppSettings, get_settings
 
 _LOCK = Lock()
 _LEVEL_ORDER = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40, "CRITICAL": 50}
-_RATE_BUCKETS: dict[str, deque[float]] = {level: deque() for level in _LEVEL_ORDER}
-_DEDUP: dict[str, dict[str, Any]] = {}
+_TOPIC_BUCKETS_MAX = 1024
+
+
+@dataclass(slots=True)
+class _DedupEntry:
+    first_ts: float
+    last_ts: float
+    count: int
+    level: str
+    topic: str
+
+
+@dataclass(slots=True)
+class _DigestEntry:
+    topic: str
+    level: str
+    message: str
+    first_ts: float
+    last_ts: float
+    counts: dict[str, int] = field(default_factory=dict)
+    total: int = 0
+
+
+# Ordered by last_ts (entries move to the end on every hit), so both expiry and LRU
+# eviction only ever look at the front of the dict.
+_DEDUP: OrderedDict[str, _DedupEntry] = OrderedDict()
+_LEVEL_BUCKETS: dict[str, TokenBucket] = {}
+_TOPIC_BUCKETS: BucketMap[str] = BucketMap(
+    lambda now: _new_bucket(_settings().alert_topic_rate_per_min, now),
+    max_entries=_TOPIC_BUCKETS_MAX,
+)
+# Suppressed (deduped or throttled) occurrences per topic awaiting the next digest.
+_DIGEST: dict[str, _DigestEntry] = {}
+_DIGEST_STARTED = 0.0
 _EMITTED = 0
 _DEDUP_TOTAL = 0
 _THROTTLE_TOTAL = 0
+_EVICTED_TOTAL = 0
+_DIGESTS_TOTAL = 0
 
 
 def _settings() -> AppSettings:
@@ -29,9 +65,68 @@ def _normalise_level(level: str) -> str:
     return upper if upper in _LEVEL_ORDER else "INFO"
 
 
-def _prune(timestamps: deque[float], now: float, window: float) -> None:
-    while timestamps and now - timestamps[0] > window:
-        timestamps.popleft()
+def _new_bucket(per_min: int, now: float) -> TokenBucket:
+    limit = max(1, per_min)
+    return TokenBucket(limit / 60.0, limit, now)
+
+
+def _bucket(bucket: TokenBucket, per_min: int) -> TokenBucket:
+    limit = max(1, per_min)
+    bucket.configure(limit / 60.0, limit)
+    return bucket
+
+
+def _evict(now: float, window: float) -> None:
+    cutoff = now - window
+    while _DEDUP:
+        key, entry = next(iter(_DEDUP.items()))
+        if entry.last_ts >= cutoff:
+            break
+        del _DEDUP[key]
+
+
+def _trim(max_entries: int) -> None:
+    global _EVICTED_TOTAL
+
+    while len(_DEDUP) > max_entries:
+        _DEDUP.popitem(last=False)
+        _EVICTED_TOTAL += 1
+
+
+def _record_suppressed(
+    topic: str, level: str, message: str, fingerprint: str, now: float
+) -> None:
+    global _DIGEST_STARTED
+
+    if not _DIGEST:
+        _DIGEST_STARTED = now
+    digest = _DIGEST.get(topic)
+    if digest is None:
+        digest = _DigestEntry(topic=topic, level=level, message=message, first_ts=now, last_ts=now)
+        _DIGEST[topic] = digest
+    digest.counts[fingerprint] = digest.counts.get(fingerprint, 0) + 1
+    digest.total += 1
+    digest.last_ts = now
+    digest.message = message
+    if _LEVEL_ORDER[level] > _LEVEL_ORDER[digest.level]:
+        digest.level = level
+
+
+def _route(level: str, topic: str, message: str, fingerprint: str, **fields: Any) -> None:
+    log_event(
+        "alerts",
+        topic,
+        message,
+        level=level,
+        corr_id=fingerprint,
+        **fields,
+    )
+    try:
+        from centrix.services.slack import route_alert
+
+        route_alert(level, topic, message, fingerprint=fingerprint, **fields)
+    except Exception:  # pragma: no cover - optional integration
+        pass
 
 
 def emit_alert(level: str, topic: str, message: str, fingerprint: str) -> bool:
@@ -47,50 +142,102 @@ def emit_alert(level: str, topic: str, message: str, fingerprint: str) -> bool:
 
     now = time.time()
     dedup_window = float(settings.alert_dedup_window_sec)
-    rate_limit = max(1, int(settings.alert_rate_per_min))
+    emitted = False
 
     with _LOCK:
-        # Throttle per level
-        bucket = _RATE_BUCKETS[norm_level]
-        _prune(bucket, now, 60.0)
-        if len(bucket) >= rate_limit:
-            _THROTTLE_TOTAL += 1
-            METRICS.record_alert_throttle(now)
-            return False
+        _evict(now, dedup_window)
 
         # Dedupe by fingerprint
-        stale_cutoff = now - dedup_window
-        stale_keys = [key for key, data in _DEDUP.items() if float(data["last_ts"]) < stale_cutoff]
-        for key in stale_keys:
-            _DEDUP.pop(key, None)
-
         entry = _DEDUP.get(fingerprint)
-        if entry is not None and now - float(entry["first_ts"]) <= dedup_window:
-            entry["count"] = int(entry.get("count", 1)) + 1
-            entry["last_ts"] = now
+        if entry is not None and now - entry.first_ts <= dedup_window:
+            entry.count += 1
+            entry.last_ts = now
+            _DEDUP.move_to_end(fingerprint)
             _DEDUP_TOTAL += 1
             METRICS.record_alert_dedup(now)
-            return False
+            _record_suppressed(topic, norm_level, message, fingerprint, now)
+        else:
+            # Throttle per level and per topic
+            level_bucket = _LEVEL_BUCKETS.get(norm_level)
+            if level_bucket is None:
+                level_bucket = _new_bucket(settings.alert_rate_per_min, now)
+                _LEVEL_BUCKETS[norm_level] = level_bucket
+            level_bucket = _bucket(level_bucket, settings.alert_rate_per_min)
+            topic_bucket = _bucket(
+                _TOPIC_BUCKETS.get(topic, now), settings.alert_topic_rate_per_min
+            )
+            if level_bucket.tokens(now) < 1 or topic_bucket.tokens(now) < 1:
+                _THROTTLE_TOTAL += 1
+                METRICS.record_alert_throttle(now)
+                _record_suppressed(topic, norm_level, message, fingerprint, now)
+            else:
+                level_bucket.try_take(now)
+                topic_bucket.try_take(now)
+                _DEDUP[fingerprint] = _DedupEntry(
+                    first_ts=now, last_ts=now, count=1, level=norm_level, topic=topic
+                )
+                _DEDUP.move_to_end(fingerprint)
+                _trim(max(1, settings.alert_dedup_max_entries))
+                _EMITTED += 1
+                emitted = True
 
-        _DEDUP[fingerprint] = {"first_ts": now, "last_ts": now, "count": 1, "level": norm_level}
-        bucket.append(now)
+    if emitted:
+        _route(norm_level, topic, message, fingerprint, occurrences=1)
+    flush_digests(now)
+    return emitted
 
-    _EMITTED += 1
-    log_event(
-        "alerts",
-        topic,
-        message,
-        level=norm_level,
-        corr_id=fingerprint,
-        occurrences=1,
-    )
-    try:
-        from centrix.services.slack import route_alert
 
-        route_alert(norm_level, topic, message, fingerprint=fingerprint)
-    except Exception:  # pragma: no cover - optional integration
-        pass
-    return True
+def flush_digests(now: float | None = None, *, force: bool = False) -> list[dict[str, Any]]:
+    """Emit one summary per topic for alerts suppressed since the last flush.
+
+    Digests are flushed at most once per ``alert_digest_interval_sec`` unless ``force`` is
+    set; long-running services call this from their loops so quiet periods still flush.
+    """
+
+    global _DIGEST_STARTED, _DIGESTS_TOTAL
+
+    now_ts = now if now is not None else time.time()
+    interval = float(_settings().alert_digest_interval_sec)
+    with _LOCK:
+        if not _DIGEST:
+            return []
+        if not force and now_ts - _DIGEST_STARTED < interval:
+            return []
+        pending = list(_DIGEST.values())
+        _DIGEST.clear()
+        _DIGEST_STARTED = now_ts
+        _DIGESTS_TOTAL += len(pending)
+
+    digests: list[dict[str, Any]] = []
+    for digest in pending:
+        span = max(1, round(digest.last_ts - digest.first_ts))
+        top = sorted(digest.counts.items(), key=lambda item: item[1], reverse=True)[:5]
+        breakdown = ", ".join(f"{fingerprint} x{count}" for fingerprint, count in top)
+        if len(digest.counts) > len(top):
+            breakdown += f", +{len(digest.counts) - len(top)} more"
+        message = (
+            f"{digest.total} suppressed occurrence(s) of {digest.topic} in the last {span}s "
+            f"({breakdown}); last: {digest.message}"
+        )
+        summary = {
+            "topic": digest.topic,
+            "level": digest.level,
+            "occurrences": digest.total,
+            "fingerprints": dict(digest.counts),
+            "first_ts": digest.first_ts,
+            "last_ts": digest.last_ts,
+            "message": message,
+        }
+        digests.append(summary)
+        _route(
+            digest.level,
+            digest.topic,
+            message,
+            f"digest:{digest.topic}",
+            occurrences=digest.total,
+            digest=True,
+        )
+    return digests
 
 
 def alert_counters() -> dict[str, int]:
@@ -101,6 +248,9 @@ def alert_counters() -> dict[str, int]:
             "emitted": _EMITTED,
             "deduped": _DEDUP_TOTAL,
             "throttled": _THROTTLE_TOTAL,
+            "evicted": _EVICTED_TOTAL,
+            "tracked": len(_DEDUP),
+            "digests": _DIGESTS_TOTAL,
         }
 
 
@@ -108,10 +258,15 @@ def reset_alerts() -> None:
     """Clear alert state (intended for tests)."""
 
     with _LOCK:
-        global _EMITTED, _DEDUP_TOTAL, _THROTTLE_TOTAL
+        global _EMITTED, _DEDUP_TOTAL, _THROTTLE_TOTAL, _EVICTED_TOTAL, _DIGESTS_TOTAL
+        global _DIGEST_STARTED
         _DEDUP.clear()
-        for bucket in _RATE_BUCKETS.values():
-            bucket.clear()
+        _DIGEST.clear()
+        _DIGEST_STARTED = 0.0
+        _LEVEL_BUCKETS.clear()
+        _TOPIC_BUCKETS.clear()
         _EMITTED = 0
         _DEDUP_TOTAL = 0
         _THROTTLE_TOTAL = 0
+        _EVICTED_TOTAL = 0
+        _DIGESTS_TOTAL = 0
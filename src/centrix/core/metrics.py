@@ -2,8 +2,16 @@
 
 from __future__ import annotations
 
+import fcntl
+import json
+import os
+import re
 import time
+from bisect import bisect_left
 from collections import deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
 from statistics import median
 from threading import Lock
 from typing import Any
@@ -11,6 +19,92 @@ from typing import Any
 ERROR_WINDOW_SEC = 60.0
 ALERT_WINDOW_SEC = 60.0
 
+METRICS_DIR = Path("runtime/metrics")
+SPOOL_STALE_SEC = 30.0
+
+_RISK_FIELDS = ("pnl_day", "pnl_open", "margin_used_pct")
+
+DEFAULT_BUCKETS_MS: tuple[float, ...] = (
+    1.0,
+    5.0,
+    10.0,
+    25.0,
+    50.0,
+    100.0,
+    250.0,
+    500.0,
+    1_000.0,
+    2_500.0,
+    5_000.0,
+    10_000.0,
+)
+
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def series_key(name: str, labels: Mapping[str, str] | None = None) -> str:
+    """Return the storage key of one labelled series, e.g. ``lock_hold_ms{action="x"}``."""
+
+    if not labels:
+        return name
+    inner = ",".join(
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in sorted(labels.items())
+    )
+    return f"{name}{{{inner}}}"
+
+
+def split_series_key(key: str) -> tuple[str, dict[str, str]]:
+    """Invert :func:`series_key` into the metric name and its labels."""
+
+    name, brace, rest = key.partition("{")
+    if not brace:
+        return key, {}
+    labels = {
+        match.group(1): re.sub(r"\\(.)", r"\1", match.group(2))
+        for match in _LABEL_RE.finditer(rest)
+    }
+    return name, labels
+
+
+@dataclass(slots=True)
+class Histogram:
+    """Fixed-bucket histogram; ``counts`` has one extra slot for the +Inf bucket."""
+
+    bounds: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    total: float = 0.0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def merge(self, other: Histogram) -> None:
+        if other.bounds != self.bounds:
+            return
+        for idx, count in enumerate(other.counts):
+            self.counts[idx] += count
+        self.total += other.total
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"bounds": list(self.bounds), "counts": list(self.counts), "sum": self.total}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Histogram:
+        bounds = tuple(float(item) for item in data.get("bounds") or ())
+        counts = [int(item) for item in data.get("counts") or ()]
+        if len(counts) != len(bounds) + 1:
+            counts = []
+        return cls(bounds=bounds, counts=counts, total=float(data.get("sum", 0.0)))
+
 
 class KPIStore:
     """Thread-safe store for lightweight KPIs."""
@@ -24,11 +118,14 @@ class KPIStore:
         self._open_approvals = 0
         self._queue_depth = 0
         self._ibkr_latency_ms: deque[float] = deque(maxlen=50)
+        self._histograms: dict[str, Histogram] = {}
         self._risk: dict[str, float] = {
             "pnl_day": 0.0,
             "pnl_open": 0.0,
             "margin_used_pct": 0.0,
         }
+        # Last update time per gauge so cross-process readers can pick the freshest writer.
+        self._gauge_ts: dict[str, float] = {}
         self._initialize_default_counters()
 
     def _initialize_default_counters(self) -> None:
@@ -60,10 +157,12 @@ class KPIStore:
     def update_open_approvals(self, value: int) -> None:
         with self._lock:
             self._open_approvals = max(0, value)
+            self._gauge_ts["open_approvals"] = time.time()
 
     def update_queue_depth(self, value: int) -> None:
         with self._lock:
             self._queue_depth = max(0, value)
+            self._gauge_ts["queue_depth"] = time.time()
 
     def update_risk(
         self,
@@ -73,13 +172,17 @@ class KPIStore:
     ) -> None:
         """Update risk snapshot fields used for dashboard simulations."""
 
+        now_ts = time.time()
         with self._lock:
             if pnl_day is not None:
                 self._risk["pnl_day"] = float(pnl_day)
+                self._gauge_ts["risk.pnl_day"] = now_ts
             if pnl_open is not None:
                 self._risk["pnl_open"] = float(pnl_open)
+                self._gauge_ts["risk.pnl_open"] = now_ts
             if margin_used_pct is not None:
                 self._risk["margin_used_pct"] = float(margin_used_pct)
+                self._gauge_ts["risk.margin_used_pct"] = now_ts
 
     def update_ibkr_latency(self, ms: float) -> None:
         """Record latest IBKR latency sample in milliseconds."""
@@ -88,30 +191,153 @@ class KPIStore:
             return
         with self._lock:
             self._ibkr_latency_ms.append(float(ms))
+            self._observe("ibkr_latency_ms", float(ms), DEFAULT_BUCKETS_MS)
 
-    def _ibkr_latency_median(self) -> float | None:
-        if not self._ibkr_latency_ms:
-            return None
-        return float(median(self._ibkr_latency_ms))
+    def record_lock_wait(self, wait_ms: float, *, acquired: bool) -> None:
+        """Record a contended lock acquisition and how long the caller queued."""
+
+        with self._lock:
+            self._observe("lock_wait_ms", float(wait_ms), DEFAULT_BUCKETS_MS)
+            self._counters["lock_contention_total"] = (
+                self._counters.get("lock_contention_total", 0) + 1
+            )
+            if not acquired:
+                self._counters["lock_timeouts_total"] = (
+                    self._counters.get("lock_timeouts_total", 0) + 1
+                )
+
+    def record_lock_hold(self, hold_ms: float, action: str | None = None) -> None:
+        """Record a released lease, labelled with its action when one was given."""
+
+        key = series_key("lock_hold_ms", {"action": action} if action else None)
+        with self._lock:
+            self._observe(key, float(hold_ms), DEFAULT_BUCKETS_MS)
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: tuple[float, ...] | None = None,
+        *,
+        labels: Mapping[str, str] | None = None,
+    ) -> None:
+        """Record a sample in the named histogram (buckets fixed on first use).
+
+        ``labels`` select one series of the histogram; keep their values to a small,
+        fixed set (actions, gateway names), never ids.
+        """
+
+        key = series_key(name, labels)
+        with self._lock:
+            self._observe(key, float(value), buckets or DEFAULT_BUCKETS_MS)
+
+    def _observe(self, name: str, value: float, buckets: tuple[float, ...]) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = Histogram(bounds=buckets)
+            self._histograms[name] = histogram
+        histogram.observe(value)
+
+    def export_state(self) -> dict[str, Any]:
+        """Return the raw, mergeable state used for cross-process aggregation."""
 
-    def snapshot(self) -> dict[str, Any]:
         now_ts = time.time()
         with self._lock:
             self._prune(self._errors, now_ts, ERROR_WINDOW_SEC)
             self._prune(self._alert_dedup, now_ts, ALERT_WINDOW_SEC)
             self._prune(self._alert_throttle, now_ts, ALERT_WINDOW_SEC)
-            ibkr_latency_median = self._ibkr_latency_median()
-            snapshot: dict[str, Any] = {
-                "open_approvals": self._open_approvals,
-                "queue_depth": self._queue_depth,
-                "errors_1m": len(self._errors),
-                "alerts_dedup_1m": len(self._alert_dedup),
-                "alerts_throttle_1m": len(self._alert_throttle),
-                "risk": dict(self._risk),
+            values: dict[str, float] = {
+                "open_approvals": float(self._open_approvals),
+                "queue_depth": float(self._queue_depth),
+            }
+            for risk_field in _RISK_FIELDS:
+                values[f"risk.{risk_field}"] = self._risk[risk_field]
+            gauges = {
+                name: {"value": values[name], "ts": ts}
+                for name, ts in self._gauge_ts.items()
+                if name in values
             }
-            snapshot["ibkr_latency_ms_median"] = ibkr_latency_median
-            snapshot["counters"] = dict(self._counters)
-            return snapshot
+            return {
+                "ts": now_ts,
+                "pid": os.getpid(),
+                "counters": dict(self._counters),
+                "gauges": gauges,
+                "windows": {
+                    "errors_1m": len(self._errors),
+                    "alerts_dedup_1m": len(self._alert_dedup),
+                    "alerts_throttle_1m": len(self._alert_throttle),
+                },
+                "ibkr_latency_ms": list(self._ibkr_latency_ms),
+                "histograms": {
+                    name: histogram.to_dict() for name, histogram in self._histograms.items()
+                },
+            }
+
+    def publish(self, component: str, directory: Path | None = None) -> Path:
+        """Write the current state to this process's spool file.
+
+        Each process owns exactly one file and replaces it atomically, so writers never
+        contend with each other or with readers.
+        """
+
+        target_dir = directory or METRICS_DIR
+        target_dir.mkdir(parents=True, exist_ok=True)
+        state = self.export_state()
+        state["component"] = component
+        pid = int(state["pid"])
+        path = target_dir / f"{_safe_component(component)}.{pid}.json"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+    def retain(self, component: str, directory: Path | None = None) -> Path:
+        """Fold counters and histograms into the component's retained spool file.
+
+        Short-lived processes such as the CLI call this before exiting: their pid-keyed
+        spool file would be ignored once stale and removed once the process is gone,
+        whereas the retained file accumulates across runs. What was folded is cleared, so
+        retaining twice never counts a sample twice.
+        """
+
+        target_dir = directory or METRICS_DIR
+        target_dir.mkdir(parents=True, exist_ok=True)
+        path = target_dir / f"{_safe_component(component)}.retained.json"
+        with self._lock:
+            mine = {
+                "counters": {key: value for key, value in self._counters.items() if value},
+                "histograms": {
+                    name: histogram.to_dict() for name, histogram in self._histograms.items()
+                },
+            }
+            self._counters.clear()
+            self._histograms.clear()
+            self._initialize_default_counters()
+        with open(path.with_name(path.name + ".lock"), "a+", encoding="utf-8") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                try:
+                    previous = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError):
+                    previous = {}
+                combined = combine_states([previous, mine])
+                state = {
+                    "ts": time.time(),
+                    "pid": 0,
+                    "component": component,
+                    "retained": True,
+                    "counters": combined["counters"],
+                    "histograms": combined["histograms"],
+                }
+                tmp_path = path.with_name(f".{path.name}.tmp")
+                tmp_path.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+                os.replace(tmp_path, path)
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        return path
+
+    def snapshot(self) -> dict[str, Any]:
+        return merge_states([self.export_state()])
 
     def reset(self) -> None:
         """Reset stored data (test helper)."""
@@ -124,11 +350,13 @@ class KPIStore:
             self._queue_depth = 0
             self._counters.clear()
             self._ibkr_latency_ms.clear()
+            self._histograms.clear()
             self._risk = {
                 "pnl_day": 0.0,
                 "pnl_open": 0.0,
                 "margin_used_pct": 0.0,
             }
+            self._gauge_ts.clear()
             self._initialize_default_counters()
 
     def increment_counter(self, key: str, amount: int = 1) -> None:
@@ -144,10 +372,183 @@ class KPIStore:
             return self._counters.get(key, 0)
 
 
+def _safe_component(component: str) -> str:
+    return component.replace("/", "_").replace(".", "_") or "unknown"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def combine_states(states: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Combine exported states into a single exported state.
+
+    Counters, sliding-window counts and histograms are summed, gauges take the most
+    recently updated value across processes, and latency samples are pooled.
+    """
+
+    counters: dict[str, int] = {}
+    windows = {"errors_1m": 0, "alerts_dedup_1m": 0, "alerts_throttle_1m": 0}
+    gauges: dict[str, dict[str, float]] = {}
+    samples: list[float] = []
+    histograms: dict[str, Histogram] = {}
+    latest = 0.0
+    for state in states:
+        latest = max(latest, float(state.get("ts", 0.0)))
+        for key, value in (state.get("counters") or {}).items():
+            counters[key] = counters.get(key, 0) + int(value)
+        for key, value in (state.get("windows") or {}).items():
+            if key in windows:
+                windows[key] += int(value)
+        for name, entry in (state.get("gauges") or {}).items():
+            ts = float(entry.get("ts", 0.0))
+            current = gauges.get(name)
+            if current is None or ts > current["ts"]:
+                gauges[name] = {"value": float(entry.get("value", 0.0)), "ts": ts}
+        samples.extend(float(item) for item in state.get("ibkr_latency_ms") or [])
+        for name, data in (state.get("histograms") or {}).items():
+            incoming = Histogram.from_dict(data)
+            existing = histograms.get(name)
+            if existing is None:
+                histograms[name] = incoming
+            else:
+                existing.merge(incoming)
+    return {
+        "ts": latest,
+        "counters": counters,
+        "gauges": gauges,
+        "windows": windows,
+        "ibkr_latency_ms": samples,
+        "histograms": {name: histogram.to_dict() for name, histogram in histograms.items()},
+    }
+
+
+def merge_states(states: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Combine exported states into a single KPI snapshot."""
+
+    combined = combine_states(states)
+    gauges = combined["gauges"]
+    samples = combined["ibkr_latency_ms"]
+
+    def _gauge(name: str) -> float:
+        entry = gauges.get(name)
+        return float(entry["value"]) if entry is not None else 0.0
+
+    snapshot: dict[str, Any] = {
+        "open_approvals": int(_gauge("open_approvals")),
+        "queue_depth": int(_gauge("queue_depth")),
+        **combined["windows"],
+        "risk": {name: _gauge(f"risk.{name}") for name in _RISK_FIELDS},
+    }
+    snapshot["ibkr_latency_ms_median"] = float(median(samples)) if samples else None
+    snapshot["counters"] = combined["counters"]
+    snapshot["histograms"] = {
+        name: {"count": sum(data["counts"]), "sum": data["sum"]}
+        for name, data in combined["histograms"].items()
+    }
+    return snapshot
+
+
+def read_spool(
+    now: float | None = None,
+    directory: Path | None = None,
+    *,
+    include_self: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Return fresh spool states keyed by ``component.pid``.
+
+    Files from dead processes are removed; files older than ``SPOOL_STALE_SEC`` are ignored.
+    Retained files (see :meth:`KPIStore.retain`) are always included.
+    """
+
+    source = directory or METRICS_DIR
+    if not source.exists():
+        return {}
+    now_ts = now if now is not None else time.time()
+    own_pid = os.getpid()
+    states: dict[str, dict[str, Any]] = {}
+    for path in sorted(source.glob("*.json")):
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        if not isinstance(state, dict):
+            continue
+        if state.get("retained"):
+            states[path.stem] = state
+            continue
+        pid = int(state.get("pid", 0))
+        if pid == own_pid and not include_self:
+            continue
+        if now_ts - float(state.get("ts", 0.0)) > SPOOL_STALE_SEC:
+            if pid and not _pid_alive(pid):
+                path.unlink(missing_ok=True)
+            continue
+        states[path.stem] = state
+    return states
+
+
+def aggregate_kpis(directory: Path | None = None) -> dict[str, Any]:
+    """Return a KPI snapshot merged across this process and all publishing processes."""
+
+    spool = read_spool(directory=directory)
+    snapshot = merge_states([METRICS.export_state(), *spool.values()])
+    snapshot["components"] = sorted({str(state.get("component")) for state in spool.values()})
+    return snapshot
+
+
+class SpoolCache:
+    """In-memory copy of peer spool states, refreshed off the hot read path."""
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self._directory = directory
+        self._lock = Lock()
+        self._states: dict[str, dict[str, Any]] = {}
+        self.refreshed_at = 0.0
+
+    def refresh(self, now: float | None = None) -> dict[str, dict[str, Any]]:
+        states = read_spool(now, self._directory)
+        with self._lock:
+            self._states = states
+            self.refreshed_at = now if now is not None else time.time()
+        return dict(states)
+
+    def states(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return dict(self._states)
+
+    def by_component(self) -> dict[str, list[dict[str, Any]]]:
+        """Group cached states by their publishing component."""
+
+        grouped: dict[str, list[dict[str, Any]]] = {}
+        for state in self.states().values():
+            grouped.setdefault(str(state.get("component") or "unknown"), []).append(state)
+        return grouped
+
+
 METRICS = KPIStore()
+SPOOL = SpoolCache()
 
 
 def snapshot_kpis() -> dict[str, Any]:
     """Return a snapshot of current KPI values."""
 
     return METRICS.snapshot()
+
+
+def publish_kpis(component: str) -> Path:
+    """Publish the process-wide KPI store to the shared spool directory."""
+
+    return METRICS.publish(component)
+
+
+def retain_kpis(component: str) -> Path:
+    """Fold the process-wide counters and histograms into the retained spool file."""
+
+    return METRICS.retain(component)
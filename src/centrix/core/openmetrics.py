@@ -0,0 +1,115 @@
+"""OpenMetrics text exposition for KPI store states."""
+
+from __future__ import annotations
+
+import math
+import re
+from collections.abc import Mapping
+from typing import Any
+
+from centrix.core.metrics import split_series_key
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PREFIX = "centrix"
+
+_INVALID_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def metric_name(raw: str) -> str:
+    """Return a valid, prefixed metric name for a KPI key."""
+
+    cleaned = _INVALID_CHARS.sub("_", raw).strip("_") or "unnamed"
+    return f"{PREFIX}_{cleaned}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + inner + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Family:
+    __slots__ = ("kind", "samples")
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.samples: list[str] = []
+
+
+def render(states: Mapping[str, dict[str, Any]]) -> str:
+    """Render exported KPI states keyed by component as OpenMetrics text.
+
+    Each component's series carry a ``component`` label; families are emitted once with
+    all components' samples grouped beneath their ``TYPE`` line, as the format requires.
+    Labelled series keys (``name{label="value"}``) become samples of the ``name`` family.
+    """
+
+    families: dict[str, _Family] = {}
+
+    def _family(name: str, kind: str) -> _Family:
+        family = families.get(name)
+        if family is None:
+            family = _Family(kind)
+            families[name] = family
+        return family
+
+    for component in sorted(states):
+        state = states[component]
+        labels = {"component": component}
+        label_text = _labels(labels)
+
+        for key, value in sorted((state.get("counters") or {}).items()):
+            raw, extra = split_series_key(key)
+            base = metric_name(raw[: -len("_total")] if raw.endswith("_total") else raw)
+            _family(base, "counter").samples.append(
+                f"{base}_total{_labels({**labels, **extra})} {_number(float(value))}"
+            )
+
+        gauge_values: dict[str, float] = {
+            name: float(entry.get("value", 0.0))
+            for name, entry in (state.get("gauges") or {}).items()
+        }
+        for key, value in (state.get("windows") or {}).items():
+            gauge_values[key] = float(value)
+        for key, value in sorted(gauge_values.items()):
+            name = metric_name(key)
+            _family(name, "gauge").samples.append(f"{name}{label_text} {_number(value)}")
+
+        for key, data in sorted((state.get("histograms") or {}).items()):
+            raw, extra = split_series_key(key)
+            name = metric_name(raw)
+            series = {**labels, **extra}
+            series_text = _labels(series)
+            family = _family(name, "histogram")
+            bounds = [float(item) for item in data.get("bounds") or ()]
+            counts = [int(item) for item in data.get("counts") or ()]
+            if len(counts) != len(bounds) + 1:
+                continue
+            cumulative = 0
+            for bound, count in zip([*bounds, math.inf], counts, strict=True):
+                cumulative += count
+                bucket_labels = _labels({**series, "le": _number(bound)})
+                family.samples.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            family.samples.append(f"{name}_count{series_text} {cumulative}")
+            family.samples.append(f"{name}_sum{series_text} {_number(float(data.get('sum', 0.0)))}")
+
+    lines: list[str] = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# TYPE {name} {family.kind}")
+        lines.extend(family.samples)
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,157 @@
+"""Bulk order validation and submission for basket imports."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+from centrix.core.risk import RISK
+from centrix.ipc.bus import Bus
+from centrix.settings import get_settings
+
+DEFAULT_BATCH_SIZE = 500
+FORMATS = ("csv", "jsonl")
+
+
+def validate_order(raw: Mapping[str, Any]) -> tuple[dict[str, Any] | None, str | None]:
+    """Return a normalised order payload or an error message."""
+
+    symbol = str(raw.get("symbol") or "").strip().upper()
+    if not symbol:
+        return None, "symbol required"
+    try:
+        amount = float(str(raw.get("qty", "")).strip())
+        px = float(str(raw.get("px", 0) or 0).strip())
+    except ValueError:
+        return None, "invalid qty/px"
+    if not amount.is_integer():
+        return None, "qty must be a whole number"
+    qty = int(amount)
+    if qty <= 0:
+        return None, "qty must be positive"
+    if px < 0:
+        return None, "px must be non-negative"
+    payload: dict[str, Any] = {"symbol": symbol, "qty": qty, "px": px}
+    side = str(raw.get("side") or "").strip().upper()
+    if side:
+        if side not in {"BUY", "SELL"}:
+            return None, "side must be BUY or SELL"
+        payload["side"] = side
+    return payload, None
+
+
+def detect_format(name: str, declared: str | None = None) -> str:
+    """Return ``csv`` or ``jsonl`` from an explicit format or the file suffix."""
+
+    fmt = (declared or Path(name).suffix.lstrip(".")).lower()
+    if fmt in {"json", "ndjson"}:
+        fmt = "jsonl"
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported order file format: {fmt or '?'}")
+    return fmt
+
+
+def parse_rows(lines: Iterable[str], fmt: str) -> Iterator[dict[str, Any]]:
+    """Yield raw rows from CSV (with header) or JSON-lines text."""
+
+    if fmt == "csv":
+        for row in csv.DictReader(lines):
+            yield {key.strip().lower(): value for key, value in row.items() if key}
+        return
+    for line in lines:
+        text = line.strip()
+        if not text:
+            continue
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            yield {"__error__": "invalid json"}
+            continue
+        yield data if isinstance(data, dict) else {"__error__": "row must be an object"}
+
+
+def parse_text(text: str, fmt: str) -> Iterator[dict[str, Any]]:
+    return parse_rows(io.StringIO(text), fmt)
+
+
+def submit_rows(
+    rows: Iterable[Mapping[str, Any]],
+    *,
+    source: str,
+    initiator: str | None,
+    request_approval: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """Validate and submit rows in batches, yielding one result per input row.
+
+    Each batch of valid rows is enqueued, stored and given approvals in one transaction;
+    results for a batch are yielded as soon as it commits. Rows are risk-checked in
+    order, each accepted row reserving its exposure for the rows after it.
+    """
+
+    settings = get_settings()
+    bus = Bus(settings.ipc_db)
+    ttl = settings.order_approval_ttl_sec if request_approval else None
+    size = max(1, batch_size)
+    pending: list[tuple[int, dict[str, Any]]] = []
+    results: list[dict[str, Any]] = []
+    basket = object()
+
+    def _flush() -> list[dict[str, Any]]:
+        if pending:
+            payloads = [
+                {**payload, "source": source, "user": initiator} for _, payload in pending
+            ]
+            records = bus.submit_orders(
+                payloads,
+                initiator=initiator,
+                ttl_sec=ttl,
+                token_len=settings.approval_token_length,
+            )
+            for (row_no, payload), record in zip(pending, records, strict=True):
+                # The stored order keeps the row's exposure until the book reports it.
+                RISK.release((basket, row_no))
+                RISK.reserve(record["id"], payload, book=True)
+                results.append(
+                    {
+                        "row": row_no,
+                        "ok": True,
+                        "order_id": record["id"],
+                        "command_id": record["command_id"],
+                        "status": record["status"],
+                        "token": record.get("token"),
+                        **payload,
+                    }
+                )
+            pending.clear()
+        results.sort(key=lambda item: item["row"])
+        flushed = list(results)
+        results.clear()
+        return flushed
+
+    RISK.follow(bus.db_path)
+    try:
+        for row_no, raw in enumerate(rows, start=1):
+            error = raw.get("__error__")
+            payload = None
+            if error is None:
+                payload, error = validate_order(raw)
+            if payload is not None:
+                decision = RISK.check(payload)
+                if not decision.ok:
+                    payload, error = None, f"risk: {decision.reason}"
+            if payload is None:
+                results.append({"row": row_no, "ok": False, "error": error})
+            else:
+                RISK.reserve((basket, row_no), payload)
+                pending.append((row_no, payload))
+            if len(pending) + len(results) >= size:
+                yield from _flush()
+        yield from _flush()
+    finally:
+        for row_no, _ in pending:
+            RISK.release((basket, row_no))
@@ -1,37 +1,231 @@
-"""In-memory order storage for dashboard display."""
+"""Order book persisted in the IPC database with a hot cache of open orders."""
 
 from __future__ import annotations
 
 import threading
-from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
+from pathlib import Path
 from typing import Any
 
-_ORDERS: deque[dict[str, Any]] = deque(maxlen=50)
-_LOCK = threading.Lock()
+from centrix.ipc.bus import Bus
+from centrix.settings import get_settings
 
+# Order lifecycle: status -> statuses it may move to. A router claims an approved order as
+# ROUTING before sending it, so a restarted router reconciles it instead of sending it again.
+TRANSITIONS: dict[str, frozenset[str]] = {
+    "NEW": frozenset({"PENDING_APPROVAL", "APPROVED", "REJECTED"}),
+    "PENDING_APPROVAL": frozenset({"APPROVED", "REJECTED", "EXPIRED"}),
+    "APPROVED": frozenset({"ROUTING", "SENT", "REJECTED", "CANCELLED"}),
+    "ROUTING": frozenset({"SENT", "FILLED", "REJECTED", "CANCELLED"}),
+    "SENT": frozenset({"FILLED", "REJECTED", "CANCELLED"}),
+    "FILLED": frozenset(),
+    "REJECTED": frozenset(),
+    "EXPIRED": frozenset(),
+    "CANCELLED": frozenset(),
+}
+OPEN_STATUSES = tuple(status for status, targets in TRANSITIONS.items() if targets)
+DEFAULT_LIMIT = 50
 
-def add_order(data: dict[str, Any]) -> dict[str, Any]:
-    """Add an order payload to the ring buffer."""
+_PREDECESSORS: dict[str, tuple[str, ...]] = {
+    status: tuple(source for source, targets in TRANSITIONS.items() if status in targets)
+    for status in TRANSITIONS
+}
 
-    record = {
-        "ts": datetime.now(tz=UTC).isoformat(timespec="seconds"),
-        **data,
+
+@dataclass(slots=True)
+class OrderTransition:
+    """Move one order, named by ``order_id`` or ``command_id``, to ``status``."""
+
+    status: str
+    order_id: int | None = None
+    command_id: int | None = None
+    fields: dict[str, Any] = field(default_factory=dict)
+
+    def to_change(self) -> dict[str, Any]:
+        if self.status not in TRANSITIONS:
+            raise ValueError(f"unknown order status: {self.status}")
+        if self.order_id is None and self.command_id is None:
+            raise ValueError("order transition needs order_id or command_id")
+        return {
+            "id": self.order_id,
+            "command_id": self.command_id,
+            "status": self.status,
+            "allowed_from": _PREDECESSORS[self.status],
+            "fields": self.fields,
+        }
+
+
+def _record(row: dict[str, Any]) -> dict[str, Any]:
+    """Flatten a stored order into the display shape (payload fields at top level)."""
+
+    created = datetime.fromtimestamp(int(row["created_at"]) / 1000, tz=UTC)
+    return {
+        **row["data"],
+        "id": row["id"],
+        "command_id": row.get("command_id"),
+        "status": row["status"],
+        "ts": created.isoformat(timespec="seconds"),
+        "updated_at": row.get("updated_at", row["created_at"]),
     }
-    with _LOCK:
-        _ORDERS.appendleft(record)
-    return record
 
 
-def list_orders() -> list[dict[str, Any]]:
-    """Return the current order list (newest first)."""
+class OrderBook:
+    """Open orders kept in memory and refreshed from ``order.*`` change events.
+
+    Every process shares the ``orders`` table; this cache only replays events newer than
+    the last one it applied, so listing open orders never rescans the table or history.
+    """
+
+    def __init__(self, db_path: str | None = None) -> None:
+        self._db_path = db_path
+        self._lock = threading.Lock()
+        self._key: Path | None = None
+        self._open: dict[int, dict[str, Any]] = {}
+        self._last_event_id = 0
+
+    def _bus(self) -> Bus:
+        return Bus(self._db_path or get_settings().ipc_db)
+
+    def _load(self, bus: Bus) -> None:
+        # Take the event high-water mark first so changes racing the load are replayed.
+        self._last_event_id = bus.last_event_id()
+        rows = bus.query_orders(limit=-1, status=OPEN_STATUSES)
+        self._open = {int(row["id"]): _record(row) for row in rows}
+
+    def _apply(self, record: dict[str, Any]) -> None:
+        order_id = int(record["id"])
+        if record["status"] in OPEN_STATUSES:
+            self._open[order_id] = record
+        else:
+            self._open.pop(order_id, None)
+
+    def sync(self) -> int:
+        """Apply change events published since the last sync; returns how many."""
+
+        bus = self._bus()
+        key = Path(bus.db_path).resolve()
+        with self._lock:
+            if key != self._key:
+                self._key = key
+                self._load(bus)
+                return 0
+            applied = 0
+            while True:
+                events = bus.events_after(self._last_event_id, topic_prefix="order.")
+                for event in events:
+                    self._last_event_id = int(event["id"])
+                    data = event["data"]
+                    if isinstance(data, dict) and "id" in data and "status" in data:
+                        self._apply(_record(data))
+                        applied += 1
+                if len(events) < 500:
+                    return applied
+
+    def add(self, payloads: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Persist new orders and return their display records."""
+
+        rows = self._bus().insert_orders(payloads)
+        records = [_record(row) for row in rows]
+        self.sync()
+        return records
+
+    def transition(self, changes: Iterable[OrderTransition]) -> list[dict[str, Any] | None]:
+        """Apply transitions in a single transaction; illegal or unknown ones yield ``None``."""
+
+        batch = [change.to_change() for change in changes]
+        if not batch:
+            return []
+        rows = self._bus().transition_orders(batch)
+        self.sync()
+        return [_record(row) if row is not None else None for row in rows]
+
+    def get(self, order_id: int) -> dict[str, Any] | None:
+        """Return one order, from the open-order cache when possible."""
+
+        self.sync()
+        with self._lock:
+            cached = self._open.get(order_id)
+        if cached is not None:
+            return dict(cached)
+        row = self._bus().get_order(order_id)
+        return _record(row) if row is not None else None
+
+    def open_orders(self) -> list[dict[str, Any]]:
+        """Return orders in an open status, newest first."""
+
+        self.sync()
+        with self._lock:
+            return sorted(self._open.values(), key=lambda item: item["id"], reverse=True)
+
+    def list(
+        self,
+        limit: int = DEFAULT_LIMIT,
+        *,
+        status: str | None = None,
+        symbol: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return the newest orders, optionally filtered by status or symbol."""
+
+        rows = self._bus().query_orders(limit=limit, status=status, symbol=symbol)
+        return [_record(row) for row in rows]
+
+    def clear(self) -> None:
+        self._bus().delete_orders()
+        with self._lock:
+            self._key = None
+            self._open.clear()
+
+
+ORDERS = OrderBook()
+
+
+def add_order(data: dict[str, Any], command_id: int | None = None) -> dict[str, Any]:
+    """Persist an order payload and return its stored record."""
+
+    payload = dict(data) if command_id is None else {**data, "command_id": command_id}
+    return ORDERS.add([payload])[0]
+
+
+def transition_orders(changes: Iterable[OrderTransition]) -> list[dict[str, Any] | None]:
+    """Apply a batch of order status transitions atomically."""
+
+    return ORDERS.transition(changes)
+
+
+def set_order_status(
+    status: str,
+    *,
+    order_id: int | None = None,
+    command_id: int | None = None,
+    **fields: Any,
+) -> dict[str, Any] | None:
+    """Transition a single order; returns ``None`` if the move is not allowed."""
+
+    change = OrderTransition(status, order_id=order_id, command_id=command_id, fields=fields)
+    return ORDERS.transition([change])[0]
+
+
+def get_order(order_id: int) -> dict[str, Any] | None:
+    """Return the materialised state of one order."""
+
+    return ORDERS.get(order_id)
+
+
+def list_orders(limit: int = DEFAULT_LIMIT) -> list[dict[str, Any]]:
+    """Return the most recent orders (newest first)."""
+
+    return ORDERS.list(limit)
+
+
+def open_orders() -> list[dict[str, Any]]:
+    """Return open orders from the in-memory hot cache."""
 
-    with _LOCK:
-        return list(_ORDERS)
+    return ORDERS.open_orders()
 
 
 def clear_orders() -> None:
     """Reset stored orders (primarily for tests)."""
 
-    with _LOCK:
-        _ORDERS.clear()
+    ORDERS.clear()
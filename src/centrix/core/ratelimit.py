@@ -0,0 +1,150 @@
+"""Token-bucket and sliding-window rate limiting primitives."""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+
+
+class TokenBucket:
+    """Classic token bucket refilled lazily on access (not thread-safe)."""
+
+    __slots__ = ("_tokens", "_updated", "capacity", "rate")
+
+    def __init__(self, rate_per_sec: float, capacity: float, now: float) -> None:
+        self.rate = max(0.0, float(rate_per_sec))
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = max(self._updated, now)
+
+    def tokens(self, now: float) -> float:
+        """Return the tokens available at ``now``."""
+
+        self._refill(now)
+        return self._tokens
+
+    def try_take(self, now: float, amount: float = 1.0) -> bool:
+        """Consume ``amount`` tokens if available."""
+
+        self._refill(now)
+        if self._tokens < amount:
+            return False
+        self._tokens -= amount
+        return True
+
+    def wait_time(self, now: float, amount: float = 1.0) -> float:
+        """Return seconds until ``amount`` tokens are available (0 when ready)."""
+
+        self._refill(now)
+        missing = amount - self._tokens
+        if missing <= 0:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return missing / self.rate
+
+    def configure(self, rate_per_sec: float, capacity: float) -> None:
+        """Apply new limits without resetting the current token level."""
+
+        self.rate = max(0.0, float(rate_per_sec))
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = min(self._tokens, self.capacity)
+
+
+class BucketMap(Generic[K]):
+    """LRU-bounded map of token buckets keyed by e.g. topic or channel."""
+
+    def __init__(self, factory: Callable[[float], TokenBucket], max_entries: int = 1024) -> None:
+        self._factory = factory
+        self._max_entries = max(1, max_entries)
+        self._buckets: OrderedDict[K, TokenBucket] = OrderedDict()
+
+    def get(self, key: K, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._factory(now)
+            self._buckets[key] = bucket
+            while len(self._buckets) > self._max_entries:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SlidingWindow:
+    """Log of event times allowing at most ``limit`` events in any ``window`` seconds.
+
+    Unlike a token bucket there is no initial burst allowance on top of the limit, which
+    is what hard upstream caps such as IB's historical-data pacing require.
+    """
+
+    __slots__ = ("_stamps", "limit", "window")
+
+    def __init__(self, limit: int, window: float) -> None:
+        self.limit = max(1, int(limit))
+        self.window = max(0.0, float(window))
+        self._stamps: deque[float] = deque()
+
+    def _prune(self, now: float) -> None:
+        stamps = self._stamps
+        while stamps and stamps[0] <= now - self.window:
+            stamps.popleft()
+
+    def wait_time(self, now: float) -> float:
+        """Return seconds until another event fits in the window (0 when ready)."""
+
+        self._prune(now)
+        if len(self._stamps) < self.limit:
+            return 0.0
+        return max(0.0, self._stamps[-self.limit] + self.window - now)
+
+    def record(self, now: float) -> None:
+        self._stamps.append(now)
+
+    def __len__(self) -> int:
+        return len(self._stamps)
+
+
+class WindowMap(Generic[K]):
+    """Sliding windows keyed by e.g. contract; idle windows are dropped past ``max_entries``."""
+
+    def __init__(self, limit: int, window: float, max_entries: int = 1024) -> None:
+        self.limit = limit
+        self.window = window
+        self._max_entries = max(1, max_entries)
+        self._windows: dict[K, SlidingWindow] = {}
+
+    def get(self, key: K, now: float) -> SlidingWindow:
+        window = self._windows.get(key)
+        if window is None:
+            if len(self._windows) >= self._max_entries:
+                self._evict_idle(now)
+            window = self._windows[key] = SlidingWindow(self.limit, self.window)
+        return window
+
+    def _evict_idle(self, now: float) -> None:
+        # Windows still holding events in range are kept so their limit keeps applying.
+        idle = [key for key, item in self._windows.items() if not item.wait_time(now) and not item]
+        for key in idle:
+            del self._windows[key]
+
+    def clear(self) -> None:
+        self._windows.clear()
+
+    def __len__(self) -> int:
+        return len(self._windows)
@@ -0,0 +1,594 @@
+"""Pre-trade risk checks against an in-memory exposure cache."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from centrix.core.metrics import METRICS, KPIStore
+from centrix.core.orders import OrderBook
+from centrix.ipc.bus import Bus
+from centrix.settings import AppSettings, get_settings
+
+log = logging.getLogger("centrix.risk")
+
+
+class AccountSource(Protocol):
+    """Anything exposing ``account()``/``positions()`` like :class:`IbkrClient`."""
+
+    def account(self) -> dict[str, Any]:
+        ...
+
+    def positions(self) -> list[dict[str, Any]]:
+        ...
+
+
+class PortfolioSource(Protocol):
+    """A versioned portfolio such as :class:`~centrix.adapters.ibkr_portfolio.PortfolioCache`."""
+
+    def snapshot(self) -> dict[str, Any]:
+        ...
+
+    def subscribe(self, listener: Callable[[Any], None]) -> Callable[[], None]:
+        ...
+
+
+@dataclass(frozen=True, slots=True)
+class RiskLimits:
+    """Pre-trade limits; a value of zero disables that check."""
+
+    max_order_qty: int = 0
+    max_order_notional: float = 0.0
+    max_position_qty: int = 0
+    max_gross_notional: float = 0.0
+    max_margin_used_pct: float = 0.0
+
+    @classmethod
+    def from_settings(cls, settings: AppSettings) -> RiskLimits:
+        return cls(
+            max_order_qty=settings.risk_max_order_qty,
+            max_order_notional=settings.risk_max_order_notional,
+            max_position_qty=settings.risk_max_position_qty,
+            max_gross_notional=settings.risk_max_gross_notional,
+            max_margin_used_pct=settings.risk_max_margin_used_pct,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RiskDecision:
+    ok: bool
+    reason: str | None = None
+
+
+ACCEPT = RiskDecision(True)
+
+
+class _Exposure:
+    """Filled position and last mark for one symbol."""
+
+    __slots__ = ("avg_price", "mark", "qty")
+
+    def __init__(self) -> None:
+        self.qty = 0.0
+        self.avg_price = 0.0
+        self.mark = 0.0
+
+    @property
+    def gross(self) -> float:
+        return abs(self.qty) * self.mark
+
+    @property
+    def unrealized(self) -> float:
+        return (self.mark - self.avg_price) * self.qty
+
+
+class _Account:
+    """Exposure, running totals, equity and open-order reservations of one account."""
+
+    __slots__ = ("equity", "exposure", "gross", "pending", "pending_px", "realized", "unrealized")
+
+    def __init__(self) -> None:
+        self.exposure: dict[str, _Exposure] = {}
+        # Signed unfilled quantity of open orders per symbol, and their last limit price.
+        self.pending: dict[str, float] = {}
+        self.pending_px: dict[str, float] = {}
+        self.gross = 0.0
+        self.unrealized = 0.0
+        self.realized = 0.0
+        self.equity = 0.0
+
+    def entry(self, symbol: str) -> _Exposure:
+        entry = self.exposure.get(symbol)
+        if entry is None:
+            entry = self.exposure[symbol] = _Exposure()
+        return entry
+
+    def detach(self, entry: _Exposure) -> None:
+        self.gross -= entry.gross
+        self.unrealized -= entry.unrealized
+
+    def attach(self, entry: _Exposure) -> None:
+        self.gross += entry.gross
+        self.unrealized += entry.unrealized
+
+    def margin_used_pct(self, gross: float) -> float:
+        return gross / self.equity * 100.0 if self.equity > 0 else 0.0
+
+    def mark(self, symbol: str) -> float:
+        entry = self.exposure.get(symbol)
+        return (entry.mark if entry else 0.0) or self.pending_px.get(symbol, 0.0)
+
+    def held(self, symbol: str) -> float:
+        entry = self.exposure.get(symbol)
+        return entry.qty if entry else 0.0
+
+    def pending_gross(self, skip: _Reservation | None = None) -> float:
+        """Gross that open orders add on top of the positions, netted per symbol."""
+
+        extra = 0.0
+        for symbol, pending in self.pending.items():
+            if skip is not None and skip.symbol == symbol:
+                pending -= skip.qty
+            held = self.held(symbol)
+            extra += (abs(held + pending) - abs(held)) * self.mark(symbol)
+        return extra
+
+
+@dataclass(frozen=True, slots=True)
+class _Reservation:
+    account: str
+    symbol: str
+    qty: float
+
+
+def _signed_qty(order: Mapping[str, Any]) -> float:
+    qty = float(order.get("qty", 0) or 0)
+    side = str(order.get("side") or "BUY").upper()
+    return -abs(qty) if side == "SELL" else abs(qty)
+
+
+def _remaining_qty(order: Mapping[str, Any]) -> float:
+    qty = _signed_qty(order)
+    left = max(0.0, abs(qty) - float(order.get("filled_qty") or 0.0))
+    return math.copysign(left, qty)
+
+
+class RiskEngine:
+    """Per-account, per-symbol exposure kept up to date from positions, fills and marks.
+
+    Each account keeps gross notional and open PnL as running totals and is checked
+    against its own equity, so :meth:`check` is a handful of dictionary lookups and
+    comparisons and never touches the database or the gateway. Open orders are reserved
+    per account (:meth:`reserve`, :meth:`load_orders`) and netted with the position they
+    would change, so an order that reduces a position never adds gross exposure. Orders
+    and updates without an account go to the only known account, or to the unnamed one
+    ``""``. Every change republishes the risk gauges, summed over accounts, on the metrics
+    store. :meth:`follow` keeps a process without a gateway loaded from the bus.
+    """
+
+    def __init__(self, limits: RiskLimits | None = None, metrics: KPIStore | None = None) -> None:
+        self._limits = limits
+        self._settings: AppSettings | None = None
+        self._settings_limits = RiskLimits()
+        self._metrics = metrics or METRICS
+        self._lock = threading.Lock()
+        self._accounts: dict[str, _Account] = {}
+        self._reservations: dict[Any, _Reservation] = {}
+        self._book_keys: set[Any] = set()
+        self._snapshot_marker: tuple[Any, Any] | None = None
+        self._follow_lock = threading.Lock()
+        self._follow_path: str | None = None
+        self._follow_stop = threading.Event()
+        self._follower: threading.Thread | None = None
+
+    @property
+    def limits(self) -> RiskLimits:
+        if self._limits is not None:
+            return self._limits
+        settings = get_settings()
+        if settings is not self._settings:
+            self._settings = settings
+            self._settings_limits = RiskLimits.from_settings(settings)
+        return self._settings_limits
+
+    def _account_key(self, account: Any) -> str:
+        # Caller holds the lock.
+        if account:
+            return str(account)
+        named = [key for key in self._accounts if key]
+        return named[0] if len(named) == 1 else ""
+
+    def _book(self, account: Any) -> _Account:
+        # Caller holds the lock.
+        key = self._account_key(account)
+        book = self._accounts.get(key)
+        if book is None:
+            book = self._accounts[key] = _Account()
+        return book
+
+    def check(self, order: Mapping[str, Any]) -> RiskDecision:
+        """Evaluate ``order`` (symbol, qty, px, optional side/account) against the limits.
+
+        An order that carries the ``id`` it was reserved under is not counted twice.
+        Position, gross and margin limits only reject orders that increase them.
+        """
+
+        limits = self.limits
+        symbol = str(order.get("symbol") or "").upper()
+        qty = _signed_qty(order)
+        with self._lock:
+            key = self._account_key(order.get("account"))
+            book = self._accounts.get(key) or _Account()
+            own = self._reservations.get(order.get("id")) if order.get("id") is not None else None
+            if own is not None and own.account != key:
+                own = None
+            px = float(order.get("px") or 0.0) or book.mark(symbol)
+            notional = abs(qty) * px
+            held = book.held(symbol) + book.pending.get(symbol, 0.0)
+            if own is not None and own.symbol == symbol:
+                held -= own.qty
+            position = held + qty
+            gross_before = book.gross + book.pending_gross(own)
+            gross = gross_before + (abs(position) - abs(held)) * px
+            margin_pct = book.margin_used_pct(gross)
+        grows = gross > gross_before
+        decision = ACCEPT
+        if limits.max_order_qty and abs(qty) > limits.max_order_qty:
+            decision = RiskDecision(False, "order qty limit")
+        elif limits.max_order_notional and notional > limits.max_order_notional:
+            decision = RiskDecision(False, "order notional limit")
+        elif (
+            limits.max_position_qty
+            and abs(position) > limits.max_position_qty
+            and abs(position) > abs(held)
+        ):
+            decision = RiskDecision(False, "position limit")
+        elif limits.max_gross_notional and grows and gross > limits.max_gross_notional:
+            decision = RiskDecision(False, "gross exposure limit")
+        elif limits.max_margin_used_pct and grows and margin_pct > limits.max_margin_used_pct:
+            decision = RiskDecision(False, "margin limit")
+        self._metrics.increment_counter("risk_checks_total")
+        if not decision.ok:
+            self._metrics.increment_counter("risk_rejects_total")
+        return decision
+
+    def reserve(self, key: Any, order: Mapping[str, Any], *, book: bool = False) -> None:
+        """Hold the unfilled part of ``order`` as exposure until :meth:`release`.
+
+        Such reservations survive :meth:`load_orders` unless it reports an order under the
+        same key, which then takes the reservation over. With ``book`` the order is already
+        in the order book: the next :meth:`load_orders` replaces or drops it.
+        """
+
+        with self._lock:
+            self._reserve(key, order)
+            if book:
+                self._book_keys.add(key)
+
+    def release(self, key: Any) -> None:
+        """Drop a reservation made with :meth:`reserve`; book orders are left alone."""
+
+        with self._lock:
+            if key not in self._book_keys:
+                self._unreserve(key)
+
+    def load_orders(self, orders: Iterable[Mapping[str, Any]]) -> None:
+        """Replace the reservations of order-book orders with ``orders``, keyed by ``id``."""
+
+        with self._lock:
+            for key in self._book_keys:
+                self._unreserve(key)
+            self._book_keys = set()
+            for order in orders:
+                key = order.get("id")
+                self._reserve(key, order)
+                self._book_keys.add(key)
+
+    def _reserve(self, key: Any, order: Mapping[str, Any]) -> None:
+        # Caller holds the lock.
+        self._unreserve(key)
+        symbol = str(order.get("symbol") or "").upper()
+        qty = _remaining_qty(order)
+        if not symbol or not qty:
+            return
+        account = self._account_key(order.get("account"))
+        book = self._book(account)
+        book.pending[symbol] = book.pending.get(symbol, 0.0) + qty
+        if order.get("px"):
+            book.pending_px[symbol] = float(order["px"])
+        self._reservations[key] = _Reservation(account, symbol, qty)
+
+    def _unreserve(self, key: Any, filled: float | None = None) -> None:
+        # Caller holds the lock; ``filled`` only releases that much of the reservation.
+        held = self._reservations.pop(key, None)
+        if held is None:
+            return
+        book = self._accounts.get(held.account)
+        left = 0.0 if filled is None else math.copysign(max(0.0, abs(held.qty) - filled), held.qty)
+        if book is not None:
+            pending = book.pending.get(held.symbol, 0.0) - held.qty + left
+            if abs(pending) > 1e-9:
+                book.pending[held.symbol] = pending
+            else:
+                book.pending.pop(held.symbol, None)
+        if left:
+            self._reservations[key] = _Reservation(held.account, held.symbol, left)
+
+    def load_positions(self, positions: Iterable[Mapping[str, Any]]) -> None:
+        """Replace filled positions with a gateway snapshot."""
+
+        grouped: dict[str, dict[str, _Exposure]] = {}
+        for item in positions:
+            symbol = str(item.get("symbol") or "").upper()
+            if not symbol:
+                continue
+            exposure = grouped.setdefault(str(item.get("account") or ""), {})
+            entry = exposure.get(symbol)
+            if entry is None:
+                entry = exposure[symbol] = _Exposure()
+            qty = float(item.get("quantity", item.get("qty", 0)) or 0)
+            avg_price = float(item.get("avg_price") or 0.0)
+            # Several contracts of one symbol (e.g. futures months) share one exposure.
+            total = abs(entry.qty) + abs(qty)
+            if total:
+                entry.avg_price = (entry.avg_price * abs(entry.qty) + avg_price * abs(qty)) / total
+            entry.qty += qty
+            entry.mark = float(item.get("market_price") or entry.avg_price)
+        with self._lock:
+            accounts: dict[str, _Account] = {}
+            for key, exposure in grouped.items():
+                previous = self._accounts.get(key)
+                book = accounts[key] = _Account()
+                if previous is not None:
+                    book.equity = previous.equity
+                    book.realized = previous.realized
+                    book.pending, book.pending_px = previous.pending, previous.pending_px
+                    # Keep newer marks from the market-data path for symbols we track.
+                    for symbol, entry in exposure.items():
+                        known = previous.exposure.get(symbol)
+                        if known is not None and known.mark:
+                            entry.mark = known.mark
+                book.exposure = exposure
+                book.gross = sum(entry.gross for entry in exposure.values())
+                book.unrealized = sum(entry.unrealized for entry in exposure.values())
+            for key, previous in self._accounts.items():
+                keep = previous.equity or previous.realized or previous.pending
+                if key not in accounts and keep:
+                    flat = accounts[key] = _Account()
+                    flat.equity = previous.equity
+                    flat.realized = previous.realized
+                    flat.pending, flat.pending_px = previous.pending, previous.pending_px
+            self._accounts = accounts
+        self.publish()
+
+    def load_account(self, account: Mapping[str, Any]) -> None:
+        """Take equity (and realised day PnL when reported) from an account snapshot."""
+
+        equity = account.get("equity", account.get("net_liquidation"))
+        with self._lock:
+            book = self._book(account.get("account"))
+            if equity is not None:
+                book.equity = float(equity)
+            if account.get("pnl_day") is not None:
+                book.realized = float(account["pnl_day"])
+        self.publish()
+
+    def refresh(self, source: AccountSource) -> None:
+        """Reload positions and account from a client such as :class:`IbkrClient`."""
+
+        self.load_positions(source.positions())
+        self.load_account(source.account())
+
+    def load_snapshot(self, snapshot: Mapping[str, Any]) -> None:
+        """Load a portfolio snapshot as produced by ``PortfolioCache.snapshot()``."""
+
+        self.load_positions(snapshot.get("positions") or [])
+        self.load_account(snapshot.get("account") or {})
+        self._snapshot_marker = (snapshot.get("updated_at"), snapshot.get("version"))
+
+    def load_published(self, bus: Bus) -> bool:
+        """Load the portfolio the IBKR adapter published to ``bus`` if it changed.
+
+        Returns whether a new snapshot was loaded; :meth:`follow` calls this periodically.
+        """
+
+        snapshot = bus.get_portfolio()
+        if snapshot is None:
+            return False
+        if (snapshot.get("updated_at"), snapshot.get("version")) == self._snapshot_marker:
+            return False
+        self.load_snapshot(snapshot)
+        return True
+
+    def attach(self, portfolio: PortfolioSource) -> Callable[[], None]:
+        """Follow ``portfolio``: load it now and again after every change.
+
+        Returns the unsubscribe callable of the underlying subscription.
+        """
+
+        self.load_snapshot(portfolio.snapshot())
+        return portfolio.subscribe(lambda cache: self.load_snapshot(cache.snapshot()))
+
+    def follow(self, db_path: str, interval: float | None = None) -> None:
+        """Keep the engine loaded from the bus at ``db_path`` in the background.
+
+        The first call loads the published portfolio and the open orders of the order book
+        right away; a daemon thread then reloads them every ``interval`` seconds
+        (``RISK_REFRESH_SEC``). Later calls for the same database return immediately, so
+        :meth:`check` itself never reads the database.
+        """
+
+        if self._follow_path == db_path and self._follower is not None:
+            return
+        with self._follow_lock:
+            if self._follow_path == db_path and self._follower is not None:
+                return
+            self._stop_following()
+            bus, book = Bus(db_path), OrderBook(db_path)
+            self._reload(bus, book)
+            every = interval if interval is not None else get_settings().risk_refresh_sec
+            stop = self._follow_stop = threading.Event()
+            self._follower = threading.Thread(
+                target=self._run_follower,
+                args=(bus, book, max(0.01, every), stop),
+                name="centrix-risk",
+                daemon=True,
+            )
+            self._follower.start()
+            self._follow_path = db_path
+
+    def _reload(self, bus: Bus, book: OrderBook) -> None:
+        self.load_published(bus)
+        self.load_orders(book.open_orders())
+
+    def _run_follower(
+        self, bus: Bus, book: OrderBook, interval: float, stop: threading.Event
+    ) -> None:
+        while not stop.wait(interval):
+            try:
+                self._reload(bus, book)
+            except Exception:  # pragma: no cover - keep the last loaded state
+                log.exception("Failed to refresh risk state from %s", bus.db_path)
+
+    def _stop_following(self) -> None:
+        # Caller holds the follow lock.
+        self._follow_stop.set()
+        follower, self._follower, self._follow_path = self._follower, None, None
+        if follower is not None and follower is not threading.current_thread():
+            follower.join(timeout=1.0)
+
+    def apply_fill(
+        self,
+        symbol: str,
+        qty: float,
+        price: float,
+        *,
+        side: str = "BUY",
+        account: str | None = None,
+        order_id: Any = None,
+    ) -> None:
+        """Fold an execution into the position, realising PnL on reductions.
+
+        With ``order_id`` the filled quantity also leaves that order's reservation.
+        """
+
+        signed = _signed_qty({"qty": qty, "side": side})
+        with self._lock:
+            if order_id is not None:
+                self._unreserve(order_id, filled=abs(signed))
+            book = self._book(account)
+            entry = book.entry(symbol.upper())
+            book.detach(entry)
+            position = entry.qty + signed
+            if entry.qty == 0 or (entry.qty > 0) == (signed > 0):
+                total = abs(entry.qty) + abs(signed)
+                entry.avg_price = (
+                    entry.avg_price * abs(entry.qty) + price * abs(signed)
+                ) / total
+            else:
+                closed = min(abs(signed), abs(entry.qty))
+                direction = 1.0 if entry.qty > 0 else -1.0
+                book.realized += (price - entry.avg_price) * closed * direction
+                if position and (position > 0) != (entry.qty > 0):
+                    entry.avg_price = price
+            entry.qty = position
+            entry.mark = price
+            book.attach(entry)
+        self.publish()
+
+    def update_mark(self, symbol: str, price: float) -> None:
+        """Re-mark a held symbol at the latest price in every account holding it."""
+
+        if price <= 0:
+            return
+        changed = False
+        with self._lock:
+            for book in self._accounts.values():
+                entry = book.exposure.get(symbol.upper())
+                if entry is None:
+                    continue
+                book.detach(entry)
+                entry.mark = float(price)
+                book.attach(entry)
+                changed = True
+        if changed:
+            self.publish()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Totals over all accounts, positions summed per symbol and per-account detail."""
+
+        with self._lock:
+            accounts = list(self._accounts.items())
+            gross = sum(book.gross for _, book in accounts)
+            unrealized = sum(book.unrealized for _, book in accounts)
+            realized = sum(book.realized for _, book in accounts)
+            equity = sum(book.equity for _, book in accounts)
+            positions: dict[str, dict[str, float]] = {}
+            for _, book in accounts:
+                for symbol, entry in book.exposure.items():
+                    if not entry.qty:
+                        continue
+                    total = positions.setdefault(
+                        symbol, {"qty": 0.0, "avg_price": 0.0, "mark": entry.mark}
+                    )
+                    size = abs(total["qty"]) + abs(entry.qty)
+                    total["avg_price"] = (
+                        total["avg_price"] * abs(total["qty"]) + entry.avg_price * abs(entry.qty)
+                    ) / size
+                    total["qty"] += entry.qty
+            positions = {symbol: total for symbol, total in positions.items() if total["qty"]}
+            detail = {
+                key: {
+                    "equity": book.equity,
+                    "gross_notional": book.gross,
+                    "pnl_open": book.unrealized,
+                    "margin_used_pct": book.margin_used_pct(book.gross),
+                }
+                for key, book in accounts
+            }
+        return {
+            "pnl_day": realized + unrealized,
+            "pnl_open": unrealized,
+            "margin_used_pct": gross / equity * 100.0 if equity > 0 else 0.0,
+            "gross_notional": gross,
+            "equity": equity,
+            "positions": positions,
+            "accounts": detail,
+        }
+
+    def publish(self) -> None:
+        """Push the current risk snapshot to the metrics store."""
+
+        snapshot = self.snapshot()
+        self._metrics.update_risk(
+            pnl_day=snapshot["pnl_day"],
+            pnl_open=snapshot["pnl_open"],
+            margin_used_pct=snapshot["margin_used_pct"],
+        )
+
+    def reset(self) -> None:
+        with self._follow_lock:
+            self._stop_following()
+        with self._lock:
+            self._accounts.clear()
+            self._reservations.clear()
+            self._book_keys.clear()
+            self._snapshot_marker = None
+
+
+RISK = RiskEngine()
+
+
+def check_order(order: Mapping[str, Any], *, bus: Bus | None = None) -> RiskDecision:
+    """Run the pre-trade checks for ``order`` against the process-wide engine.
+
+    The engine follows the portfolio the IBKR adapter publishes and the open orders of
+    ``bus`` (the configured IPC database by default); see :meth:`RiskEngine.follow`.
+    """
+
+    RISK.follow(bus.db_path if bus is not None else get_settings().ipc_db)
+    return RISK.check(order)
@@ -23,7 +23,8 @@ from fastapi import (
     WebSocket,
     WebSocketDisconnect,
 )
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import ClientDisconnect
 
 from centrix import __version__
@@ -32,12 +33,22 @@ from centrix.cli import _parse_targets, _start_service, _stop_service
 from centrix.core.alerts import alert_counters
 from centrix.core.approvals import request_approval
 from centrix.core.logging import log_event, warn_on_local_env
-from centrix.core.metrics import METRICS, snapshot_kpis
+from centrix.core import openmetrics
+from centrix.core.order_import import parse_text, submit_rows
+from centrix.core.metrics import METRICS, SPOOL, aggregate_kpis, combine_states, publish_kpis
 from centrix.core.rbac import allow
-from centrix.core.orders import add_order, list_orders
-from centrix.ipc import read_state, write_state
+from centrix.core.risk import check_order
+from centrix.core.orders import add_order, list_orders, open_orders
+from centrix.ipc import read_state, update_state, write_state
 from centrix.ipc.bus import Bus
 from centrix.settings import AppSettings, get_settings
+from centrix.shared.locks import (
+    CONTROL_LOCK,
+    CONTROL_LOCK_TTL,
+    LOCKS,
+    LockBusyError,
+    list_lock_files,
+)
 
 settings = get_settings()
 
@@ -298,6 +309,10 @@ INDEX_HTML = """<!DOCTYPE html>
         <h3>AUFTRÄGE</h3>
         <div id="orders"></div>
       </section>
+      <section id="positions-panel" class="card">
+        <h3>POSITIONEN</h3>
+        <div id="positions"></div>
+      </section>
       <section id="events-panel" class="card">
         <h3>EREIGNISSE</h3>
         <div id="events"></div>
@@ -450,6 +465,22 @@ INDEX_HTML = """<!DOCTYPE html>
         container.innerHTML = rows;
       }
 
+      function renderPositions(portfolio) {
+        const container = document.getElementById('positions');
+        const list = (portfolio && portfolio.positions) || [];
+        if (!Array.isArray(list) || list.length === 0) {
+          container.textContent = 'Keine Positionen';
+          return;
+        }
+        container.innerHTML = list
+          .map(p => {
+            const acct = p.account ? `${escapeHtml(p.account)} ` : '';
+            const qty = `qty=${escapeHtml(p.quantity)} avg=${escapeHtml(p.avg_price)}`;
+            return `<div>${acct}${escapeHtml(p.symbol)} ${qty}</div>`;
+          })
+          .join('');
+      }
+
       let eventBuffer = [];
       function renderEvents(evts) {
         const container = document.getElementById('events');
@@ -468,6 +499,7 @@ INDEX_HTML = """<!DOCTYPE html>
         renderClients(data);
         const orders = data.orders_open || data.orders || [];
         renderOrders(orders);
+        renderPositions(data.portfolio);
         if (data.events) {
           renderEvents(data.events);
         }
@@ -715,9 +747,11 @@ def status_payload(last_action: dict[str, Any] | None = None) -> dict[str, Any]:
     if slack_detail is not None and "slack" in services:
         services["slack"]["detail"] = slack_detail
     bus = Bus(settings.ipc_db)
-    kpi = snapshot_kpis()
+    kpi = aggregate_kpis()
     orders = list_orders()
+    orders_open = open_orders()
     events = bus.tail_events(limit=EVENT_LIMIT)
+    portfolio = bus.get_portfolio() or {"version": 0, "account": {}, "positions": []}
     clients = list(CLIENTS.values())
     heartbeat = datetime.now(UTC).isoformat(timespec="seconds") + "Z"
 
@@ -737,7 +771,8 @@ def status_payload(last_action: dict[str, Any] | None = None) -> dict[str, Any]:
         "heartbeat": heartbeat,
         "connectivity": connectivity,
         "risk": risk_payload,
-        "orders_open": orders,
+        "portfolio": portfolio,
+        "orders_open": orders_open,
         "orders": orders,
         "events": events,
         "clients": clients,
@@ -811,8 +846,31 @@ async def healthz() -> dict[str, Any]:
     }
 
 
-@app.get("/metrics")
-async def metrics() -> dict[str, Any]:
+def _wants_openmetrics(accept: str | None) -> bool:
+    if not accept:
+        return False
+    value = accept.lower()
+    return "application/openmetrics-text" in value or "text/plain" in value
+
+
+def openmetrics_payload() -> str:
+    """Render KPIs as OpenMetrics text from memory only.
+
+    Peer processes are read from the spool cache refreshed by the heartbeat loop, so a
+    scrape never touches SQLite or the filesystem.
+    """
+
+    grouped = SPOOL.by_component()
+    local = grouped.pop("dashboard", [])
+    states = {component: combine_states(items) for component, items in grouped.items()}
+    states["dashboard"] = combine_states([METRICS.export_state(), *local])
+    return openmetrics.render(states)
+
+
+@app.get("/metrics", response_model=None)
+async def metrics(request: Request) -> dict[str, Any] | Response:
+    if _wants_openmetrics(request.headers.get("accept")):
+        return Response(content=openmetrics_payload(), media_type=openmetrics.CONTENT_TYPE)
     try:
         data = status_payload()
         return {
@@ -869,14 +927,17 @@ if __name__ == "__main__":
     logger.info("Dashboard stopped cleanly")
 
 
-def _toggle_mode(current: dict[str, Any], value: str | None) -> dict[str, Any]:
+def _toggle_mode(value: str | None) -> dict[str, Any]:
     target = value.lower() if value else None
     if target not in {None, "mock", "real"}:
         raise HTTPException(status_code=400, detail="invalid mode value")
-    if target is None:
-        target = "real" if current.get("mode") == "mock" else "mock"
-    mode_mock = target == "mock"
-    return write_state(mode=target, mode_mock=mode_mock)
+
+    def _apply(current: dict[str, Any]) -> dict[str, Any]:
+        mode = target or ("real" if current.get("mode") == "mock" else "mock")
+        return {"mode": mode, "mode_mock": mode == "mock"}
+
+    # Read-modify-write under the state lock so concurrent toggles cannot cancel out.
+    return update_state(_apply)
 
 
 def _restart_service(name: str) -> dict[str, Any]:
@@ -907,10 +968,65 @@ async def control_endpoint(
     action = payload.get("action")
     if not isinstance(action, str) or not action:
         raise HTTPException(status_code=400, detail="action required")
-    snapshot = api_control(action, identity=identity, body=payload)
+    # Control actions may wait for the control lock; keep the event loop free meanwhile.
+    snapshot = await run_in_threadpool(api_control, action, identity=identity, body=payload)
     return JSONResponse(snapshot)
 
 
+@app.get("/api/locks")
+async def api_locks(_identity: ControlIdentity = Depends(_require_token)) -> JSONResponse:
+    return JSONResponse({"locks": list_lock_files()})
+
+
+@app.post("/api/orders/import")
+async def api_orders_import(
+    request: Request, identity: ControlIdentity = Depends(_require_token)
+) -> Response:
+    if not allow("order", identity.role):
+        raise HTTPException(status_code=403, detail="forbidden")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        if content_type == "application/json":
+            body = await request.json()
+            rows = body.get("orders") if isinstance(body, dict) else body
+            if not isinstance(rows, list):
+                raise HTTPException(status_code=400, detail="orders list required")
+            rows = [
+                row if isinstance(row, dict) else {"__error__": "row must be an object"}
+                for row in rows
+            ]
+            want_approval = not (isinstance(body, dict) and body.get("approval") is False)
+        else:
+            fmt = "csv" if content_type == "text/csv" else "jsonl"
+            rows = list(parse_text((await request.body()).decode("utf-8"), fmt))
+            want_approval = request.query_params.get("approval", "1") != "0"
+    except ClientDisconnect:
+        log_event("dashboard", "api.orders.import", "client disconnected", level="WARN")
+        return JSONResponse({"ok": False, "error": "client_disconnected"}, status_code=499)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="invalid order payload") from None
+
+    def _stream() -> Any:
+        accepted = failed = 0
+        for result in submit_rows(
+            rows,
+            source=identity.principal,
+            initiator=identity.user or identity.principal,
+            request_approval=want_approval,
+        ):
+            if result["ok"]:
+                accepted += 1
+            else:
+                failed += 1
+            yield json.dumps(result, separators=(",", ":")) + "\n"
+        _record_action("order-import", identity, accepted=accepted, failed=failed)
+        summary = {"status": "done", "accepted": accepted, "failed": failed}
+        yield json.dumps(summary, separators=(",", ":")) + "\n"
+
+    # A sync iterator is drained in the threadpool, so batch commits never block the loop.
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
 def _authorised_name(action: str) -> str | None:
     mapping = {
         "pause": "pause",
@@ -923,14 +1039,40 @@ def _authorised_name(action: str) -> str | None:
     return mapping.get(action)
 
 
+_LOCKED_ACTIONS = {"pause", "resume", "mode", "restart"}
+
+
 def _apply_control_action(
     action: str, payload: dict[str, Any], identity: ControlIdentity
 ) -> dict[str, Any]:
     required = _authorised_name(action)
     if required and not allow(required, identity.role):
         raise HTTPException(status_code=403, detail="forbidden")
+    if action not in _LOCKED_ACTIONS:
+        return _run_control_action(action, payload, identity)
+    try:
+        with LOCKS.hold(
+            CONTROL_LOCK,
+            owner=f"dashboard:{identity.user or identity.principal}",
+            ttl=CONTROL_LOCK_TTL,
+            wait=settings.control_lock_wait_sec,
+            action=action,
+        ):
+            return _run_control_action(action, payload, identity)
+    except LockBusyError as exc:
+        log_event(
+            "dashboard",
+            f"{action}.lock",
+            "control lock busy",
+            level="WARN",
+            owner=exc.holder.get("owner") or exc.holder.get("pid", "?"),
+        )
+        raise HTTPException(status_code=409, detail="control operations are busy") from None
 
-    state = read_state() or {}
+
+def _run_control_action(
+    action: str, payload: dict[str, Any], identity: ControlIdentity
+) -> dict[str, Any]:
     result: dict[str, Any] = {"action": action}
 
     if action == "pause":
@@ -940,7 +1082,7 @@ def _apply_control_action(
         state = write_state(paused=False)
         result["state"] = state
     elif action == "mode":
-        state = _toggle_mode(state, payload.get("value"))
+        state = _toggle_mode(payload.get("value"))
         result["state"] = state
     elif action == "restart":
         service_spec = payload.get("service")
@@ -966,6 +1108,9 @@ def _apply_control_action(
             raise HTTPException(status_code=400, detail="qty must be positive")
         if px_val < 0:
             raise HTTPException(status_code=400, detail="px must be non-negative")
+        decision = check_order({"symbol": symbol, "qty": qty_val, "px": px_val})
+        if not decision.ok:
+            raise HTTPException(status_code=422, detail=f"risk check failed: {decision.reason}")
         bus = Bus(settings.ipc_db)
         order_message = {
             "symbol": symbol,
@@ -975,7 +1120,7 @@ def _apply_control_action(
             "user": identity.user,
         }
         order_id = bus.enqueue("order.submit", order_message)
-        add_order(order_message)
+        add_order(order_message, command_id=order_id)
         token = request_approval(
             order_id,
             initiator=identity.user or identity.principal,
@@ -996,6 +1141,12 @@ def _apply_control_action(
             "px": payload.get("px", 0),
             "user": identity.user,
         }
+        try:
+            decision = check_order(order_payload)
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="invalid order payload") from exc
+        if not decision.ok:
+            raise HTTPException(status_code=422, detail=f"risk check failed: {decision.reason}")
         result["order"] = add_order(order_payload)
     else:
         raise HTTPException(status_code=400, detail="unknown action")
@@ -1175,6 +1326,8 @@ def _resolve_identity(
 
 def _record_dashboard_heartbeat() -> None:
     touch_service("dashboard", "up", {"pid": os.getpid()})
+    publish_kpis("dashboard")
+    SPOOL.refresh()
 
 
 async def _heartbeat_loop() -> None:
@@ -1,6 +1,26 @@
 """IPC primitives for Centrix."""
 
-from .bus import Bus, is_running, pidfile, read_state, write_state
+from .bus import (
+    Bus,
+    is_running,
+    pidfile,
+    read_state,
+    subscribe_state,
+    update_state,
+    write_state,
+)
 from .migrate import ensure_db, epoch_ms
+from .state import StateConflict
 
-__all__ = ["Bus", "ensure_db", "epoch_ms", "is_running", "pidfile", "read_state", "write_state"]
+__all__ = [
+    "Bus",
+    "StateConflict",
+    "ensure_db",
+    "epoch_ms",
+    "is_running",
+    "pidfile",
+    "read_state",
+    "subscribe_state",
+    "update_state",
+    "write_state",
+]
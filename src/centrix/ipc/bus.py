@@ -8,7 +8,7 @@ import secrets
 import sqlite3
 import string
 import time
-from collections.abc import Iterator
+from collections.abc import Callable, Iterable, Iterator
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any
@@ -17,17 +17,36 @@ from centrix.core.logging import ensure_runtime_dirs
 from centrix.settings import get_settings
 
 from .migrate import ensure_db, epoch_ms
+from .state import StateStore
+from .wakeup import notify
 
 _TOKEN_ALPHABET = string.ascii_uppercase + string.digits
 _SETTINGS = get_settings()
 STATE_FILE = Path(_SETTINGS.state_file)
+_STATE = StateStore(STATE_FILE)
 PID_DIR = Path("runtime/pids")
 
+# Order status written alongside each approval status, with the order statuses it may
+# leave; mirrors the lifecycle in ``centrix.core.orders.TRANSITIONS``.
+_APPROVAL_ORDER_STATUS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "PENDING": ("PENDING_APPROVAL", ("NEW",)),
+    "OK": ("APPROVED", ("NEW", "PENDING_APPROVAL")),
+    "REJECT": ("REJECTED", ("NEW", "PENDING_APPROVAL")),
+    "EXPIRED": ("EXPIRED", ("PENDING_APPROVAL",)),
+}
+
 
 def _dumps(data: dict[str, Any]) -> str:
     return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
 
 
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
 def _loads(data: str) -> dict[str, Any]:
     loaded = json.loads(data)
     if isinstance(loaded, dict):
@@ -42,6 +61,12 @@ class Bus:
         self.db_path = db_path
         ensure_db(db_path)
 
+    @property
+    def approvals_wakeup(self) -> str:
+        """Socket path notified whenever new approvals are committed."""
+
+        return f"{self.db_path}.approvals.sock"
+
     @contextmanager
     def connect(self) -> Iterator[sqlite3.Connection]:
         """Yield a configured SQLite connection."""
@@ -75,6 +100,32 @@ class Bus:
             raise RuntimeError("Failed to insert event record.")
         return int(event_id)
 
+    def emit_many(self, topic: str, level: str, items: list[dict[str, Any]]) -> int:
+        """Persist several events for ``topic`` in one transaction."""
+
+        if not items:
+            return 0
+        with self.connect() as conn:
+            self._insert_events(conn, topic, level, items, epoch_ms())
+            conn.commit()
+        return len(items)
+
+    @staticmethod
+    def _insert_events(
+        conn: sqlite3.Connection,
+        topic: str,
+        level: str,
+        items: list[dict[str, Any]],
+        now: int,
+    ) -> None:
+        conn.executemany(
+            """
+            INSERT INTO events(topic, level, data, corr_id, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [(topic, level, _dumps(item), None, now) for item in items],
+        )
+
     def enqueue(self, cmd_type: str, payload: dict[str, Any], corr_id: str | None = None) -> int:
         """Persist a command entry."""
 
@@ -132,81 +183,238 @@ class Bus:
         events.reverse()
         return events
 
-    def new_approval(self, command_id: int, ttl_sec: int, token_len: int = 6) -> dict[str, Any]:
-        """Create a new approval record with a random token."""
+    def new_approval(
+        self,
+        command_id: int,
+        ttl_sec: int,
+        token_len: int = 6,
+        initiator: str | None = None,
+    ) -> dict[str, Any]:
+        """Create a new approval record with a random, unique token."""
 
-        token = self._generate_token(token_len)
         now = epoch_ms()
-        expires_at = now + ttl_sec * 1000
         with self.connect() as conn:
-            cursor = conn.execute(
-                """
-                INSERT INTO approvals(command_id, token, expires_at, created_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (command_id, token, expires_at, now),
-            )
-            approval_id = cursor.lastrowid
+            record = self._add_approval(conn, command_id, ttl_sec, token_len, initiator, now)
+            self._follow_approvals(conn, "PENDING", [command_id], now)
             conn.commit()
+        notify(self.approvals_wakeup)
+        return record
+
+    def _add_approval(
+        self,
+        conn: sqlite3.Connection,
+        command_id: int,
+        ttl_sec: int,
+        token_len: int,
+        initiator: str | None,
+        now: int,
+    ) -> dict[str, Any]:
+        expires_at = now + ttl_sec * 1000
+        for _ in range(5):
+            token = self._generate_token(token_len)
+            try:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO approvals(command_id, token, initiator, expires_at, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (command_id, token, initiator, expires_at, now),
+                )
+            except sqlite3.IntegrityError:
+                continue
+            approval_id = cursor.lastrowid
+            break
+        else:
+            raise RuntimeError("Failed to allocate a unique approval token.")
         if approval_id is None:
             raise RuntimeError("Failed to insert approval record.")
         return {
             "id": approval_id,
             "command_id": command_id,
             "token": token,
+            "initiator": initiator,
             "status": "PENDING",
             "expires_at": expires_at,
             "created_at": now,
         }
 
-    def fulfill_approval(self, token: str, approver: str) -> bool:
-        """Attempt to mark an approval as fulfilled."""
+    def get_approval(self, command_id: int) -> dict[str, Any] | None:
+        """Return the latest approval recorded for ``command_id``."""
 
-        _ = approver  # Approver recorded via external audit in later phases.
-        now = epoch_ms()
         with self.connect() as conn:
-            cursor = conn.execute(
+            row = conn.execute(
                 """
-                SELECT id, status, expires_at
-                FROM approvals
-                WHERE token = ?
+                SELECT id, command_id, token, status, initiator, approver, reason,
+                       expires_at, created_at, decided_at
+                FROM approvals WHERE command_id = ?
+                ORDER BY id DESC LIMIT 1
                 """,
-                (token,),
-            )
-            row = cursor.fetchone()
+                (command_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def decide_approval(
+        self,
+        command_id: int,
+        approver: str,
+        *,
+        approve: bool,
+        token: str | None = None,
+        reason: str | None = None,
+        now_ms: int | None = None,
+    ) -> str:
+        """Approve or reject a pending approval in a single transaction.
+
+        Returns ``"ok"`` on success, otherwise why it failed: ``"not_found"``,
+        ``"initiator"``, ``"invalid_token"`` or ``"unavailable"`` (expired or decided).
+        """
+
+        now = now_ms if now_ms is not None else epoch_ms()
+        status = "OK" if approve else "REJECT"
+        clauses = "command_id = ? AND status = 'PENDING' AND expires_at > ?"
+        params: list[Any] = [status, approver, reason, now, command_id, now]
+        if token is not None:
+            clauses += " AND token = ?"
+            params.append(token)
+        clauses += " AND (initiator IS NULL OR initiator != ?)"
+        params.append(approver)
+        with self.connect() as conn:
+            decided = conn.execute(
+                f"""
+                UPDATE approvals
+                SET status = ?, approver = ?, reason = ?, decided_at = ?
+                WHERE {clauses}
+                RETURNING id
+                """,
+                params,
+            ).fetchall()
+            if decided:
+                fields: dict[str, Any] = {"approver": approver}
+                if not approve:
+                    fields["reason"] = reason
+                self._follow_approvals(conn, status, [command_id], now, fields)
+                conn.commit()
+                return "ok"
+            # Slow path: work out why nothing matched, expiring a lapsed approval on the way.
+            row = conn.execute(
+                """
+                SELECT id, token, status, initiator, expires_at
+                FROM approvals WHERE command_id = ?
+                ORDER BY id DESC LIMIT 1
+                """,
+                (command_id,),
+            ).fetchone()
             if row is None:
-                return False
-            if row["status"] != "PENDING":
-                return False
-            if row["expires_at"] <= now:
+                return "not_found"
+            if row["initiator"] == approver:
+                return "initiator"
+            if token is not None and row["token"] != token:
+                return "invalid_token"
+            if row["status"] == "PENDING" and row["expires_at"] <= now:
                 conn.execute(
-                    "UPDATE approvals SET status = 'EXPIRED' WHERE id = ?",
-                    (row["id"],),
+                    "UPDATE approvals SET status = 'EXPIRED', decided_at = ? WHERE id = ?",
+                    (now, row["id"]),
                 )
+                self._follow_approvals(conn, "EXPIRED", [command_id], now)
                 conn.commit()
-                return False
+            return "unavailable"
 
-            conn.execute(
-                "UPDATE approvals SET status = 'OK' WHERE id = ?",
-                (row["id"],),
+    def fulfill_approval(self, token: str, approver: str) -> bool:
+        """Attempt to mark an approval as fulfilled."""
+
+        now = epoch_ms()
+        with self.connect() as conn:
+            row = conn.execute(
+                """
+                UPDATE approvals
+                SET status = CASE WHEN expires_at <= ? THEN 'EXPIRED' ELSE 'OK' END,
+                    approver = CASE WHEN expires_at <= ? THEN approver ELSE ? END,
+                    decided_at = CASE WHEN expires_at <= ? THEN decided_at ELSE ? END
+                WHERE token = ? AND status = 'PENDING'
+                RETURNING command_id, status
+                """,
+                (now, now, approver, now, now, token),
+            ).fetchone()
+            if row is not None:
+                fields = {"approver": approver} if row["status"] == "OK" else {}
+                self._follow_approvals(conn, row["status"], [row["command_id"]], now, fields)
+            conn.commit()
+        return row is not None and row["status"] == "OK"
+
+    def pending_approvals_after(self, last_id: int, limit: int = 1000) -> list[dict[str, Any]]:
+        """Return pending approvals with ``id > last_id`` in id order."""
+
+        with self.connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, command_id, expires_at FROM approvals
+                WHERE id > ? AND status = 'PENDING'
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (last_id, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def expire_approval_ids(self, approval_ids: list[int], now_ms: int) -> list[dict[str, Any]]:
+        """Expire the given approvals and their orders if still pending.
+
+        One ``approval.expired`` event per expired approval is written in the same
+        transaction. Returns the approval rows that changed.
+        """
+
+        expired: list[dict[str, Any]] = []
+        if not approval_ids:
+            return expired
+        with self.connect() as conn:
+            for start in range(0, len(approval_ids), 500):
+                chunk = approval_ids[start : start + 500]
+                marks = ",".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"""
+                    UPDATE approvals SET status = 'EXPIRED', decided_at = ?
+                    WHERE status = 'PENDING' AND expires_at <= ? AND id IN ({marks})
+                    RETURNING id, command_id, token, initiator, expires_at
+                    """,
+                    (now_ms, now_ms, *chunk),
+                ).fetchall()
+                expired.extend(dict(row) for row in rows)
+            self._follow_approvals(conn, "EXPIRED", [row["command_id"] for row in expired], now_ms)
+            self._insert_events(
+                conn,
+                "approval.expired",
+                "INFO",
+                [
+                    {
+                        "approval_id": row["id"],
+                        "order_id": row["command_id"],
+                        "initiator": row["initiator"],
+                        "expires_at": row["expires_at"],
+                        "lag_ms": now_ms - int(row["expires_at"]),
+                    }
+                    for row in expired
+                ],
+                now_ms,
             )
             conn.commit()
-            return True
+        return expired
 
     def expire_approvals(self, now_ms: int) -> int:
         """Expire approvals whose TTL has elapsed."""
 
         with self.connect() as conn:
-            cursor = conn.execute(
+            rows = conn.execute(
                 """
                 UPDATE approvals
-                SET status = 'EXPIRED'
+                SET status = 'EXPIRED', decided_at = ?
                 WHERE status = 'PENDING' AND expires_at <= ?
+                RETURNING command_id
                 """,
-                (now_ms,),
-            )
+                (now_ms, now_ms),
+            ).fetchall()
+            self._follow_approvals(conn, "EXPIRED", [row["command_id"] for row in rows], now_ms)
             conn.commit()
-            return int(cursor.rowcount)
+            return len(rows)
 
     def count_pending_commands(self) -> int:
         """Return the number of queued commands awaiting processing."""
@@ -228,6 +436,510 @@ class Bus:
             row = cursor.fetchone()
             return int(row["total"]) if row else 0
 
+    def enqueue_alert(
+        self,
+        channel: str,
+        level: str,
+        topic: str,
+        message: str,
+        fields: dict[str, Any] | None = None,
+        fingerprint: str | None = None,
+    ) -> int:
+        """Persist an alert in the outbox for asynchronous delivery."""
+
+        now = epoch_ms()
+        with self.connect() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO alert_outbox(
+                    channel, level, topic, message, fields, fingerprint, next_attempt_at, created_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (channel, level, topic, message, _dumps(fields or {}), fingerprint, now, now),
+            )
+            alert_id = cursor.lastrowid
+            conn.commit()
+        if alert_id is None:
+            raise RuntimeError("Failed to insert alert outbox record.")
+        return int(alert_id)
+
+    def due_alerts(self, now_ms: int, limit: int = 100) -> list[dict[str, Any]]:
+        """Return pending outbox alerts whose next attempt is due, oldest first."""
+
+        with self.connect() as conn:
+            cursor = conn.execute(
+                """
+                SELECT id, channel, level, topic, message, fields, fingerprint, attempts, created_at
+                FROM alert_outbox
+                WHERE status = 'PENDING' AND next_attempt_at <= ?
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (now_ms, limit),
+            )
+            rows = cursor.fetchall()
+        alerts: list[dict[str, Any]] = []
+        for row in rows:
+            alert: dict[str, Any] = dict(row)
+            alert["fields"] = _loads(alert["fields"])
+            alerts.append(alert)
+        return alerts
+
+    def ack_alerts(self, alert_ids: list[int]) -> int:
+        """Remove delivered alerts from the outbox."""
+
+        if not alert_ids:
+            return 0
+        with self.connect() as conn:
+            cursor = conn.executemany(
+                "DELETE FROM alert_outbox WHERE id = ?",
+                [(alert_id,) for alert_id in alert_ids],
+            )
+            conn.commit()
+            return int(cursor.rowcount)
+
+    def retry_alerts(
+        self,
+        alert_ids: list[int],
+        error: str,
+        next_attempt_at: int,
+        max_attempts: int,
+    ) -> None:
+        """Record a failed delivery, rescheduling or dead-lettering each alert."""
+
+        if not alert_ids:
+            return
+        with self.connect() as conn:
+            conn.executemany(
+                """
+                UPDATE alert_outbox
+                SET attempts = attempts + 1,
+                    last_error = ?,
+                    next_attempt_at = ?,
+                    status = CASE WHEN attempts + 1 >= ? THEN 'DEAD' ELSE 'PENDING' END
+                WHERE id = ?
+                """,
+                [(error, next_attempt_at, max_attempts, alert_id) for alert_id in alert_ids],
+            )
+            conn.commit()
+
+    def count_outbox(self, status: str = "PENDING") -> int:
+        """Return the number of outbox alerts in the given status."""
+
+        with self.connect() as conn:
+            cursor = conn.execute(
+                "SELECT COUNT(1) AS total FROM alert_outbox WHERE status = ?",
+                (status,),
+            )
+            row = cursor.fetchone()
+            return int(row["total"]) if row else 0
+
+    def claim_lock(
+        self, name: str, owner: str, ttl_sec: int, now_ms: int, pid: int
+    ) -> dict[str, Any] | None:
+        """Grant ``name`` to ``owner`` unless an unexpired lease exists.
+
+        Runs under ``BEGIN IMMEDIATE`` so concurrent claimants serialise on the write lock;
+        the returned row carries a fencing token strictly greater than any earlier grant.
+        """
+
+        expires_at = now_ms + ttl_sec * 1000
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT expires_at FROM locks WHERE name = ?",
+                    (name,),
+                ).fetchone()
+                if row is not None and int(row["expires_at"]) > now_ms:
+                    conn.rollback()
+                    return None
+                token = int(
+                    conn.execute(
+                        """
+                        INSERT INTO lock_fence(name, token) VALUES (?, 1)
+                        ON CONFLICT(name) DO UPDATE SET token = token + 1
+                        RETURNING token
+                        """,
+                        (name,),
+                    ).fetchone()[0]
+                )
+                conn.execute(
+                    """
+                    INSERT INTO locks(name, owner, token, pid, acquired_at, expires_at, ttl_sec)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        owner=excluded.owner,
+                        token=excluded.token,
+                        pid=excluded.pid,
+                        acquired_at=excluded.acquired_at,
+                        expires_at=excluded.expires_at,
+                        ttl_sec=excluded.ttl_sec
+                    """,
+                    (name, owner, token, pid, now_ms, expires_at, ttl_sec),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return {
+            "name": name,
+            "owner": owner,
+            "token": token,
+            "pid": pid,
+            "acquired_at": now_ms,
+            "expires_at": expires_at,
+            "ttl_sec": ttl_sec,
+        }
+
+    def release_lock(
+        self, name: str, *, token: int | None = None, owner: str | None = None
+    ) -> bool:
+        """Delete the lease for ``name`` if it still matches ``token``/``owner``."""
+
+        clauses = ["name = ?"]
+        params: list[Any] = [name]
+        if token is not None:
+            clauses.append("token = ?")
+            params.append(token)
+        if owner is not None:
+            clauses.append("owner = ?")
+            params.append(owner)
+        with self.connect() as conn:
+            cursor = conn.execute(f"DELETE FROM locks WHERE {' AND '.join(clauses)}", params)
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def renew_lock(self, name: str, token: int, expires_at: int) -> bool:
+        """Move the expiry of a held lease, failing if it was fenced off."""
+
+        with self.connect() as conn:
+            cursor = conn.execute(
+                "UPDATE locks SET expires_at = ? WHERE name = ? AND token = ?",
+                (expires_at, name, token),
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def get_lock(self, name: str) -> dict[str, Any] | None:
+        """Return the stored lease for ``name`` if any."""
+
+        with self.connect() as conn:
+            row = conn.execute(
+                """
+                SELECT name, owner, token, pid, acquired_at, expires_at, ttl_sec
+                FROM locks WHERE name = ?
+                """,
+                (name,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_locks(self) -> list[dict[str, Any]]:
+        """Return all stored leases ordered by name."""
+
+        with self.connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT name, owner, token, pid, acquired_at, expires_at, ttl_sec
+                FROM locks ORDER BY name ASC
+                """
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def reap_locks(self, now_ms: int, limit: int = 500) -> list[dict[str, Any]]:
+        """Delete up to ``limit`` leases expired at ``now_ms``, returning the removed rows.
+
+        Candidates come from the ``expires_at`` index; callers loop until a short batch so
+        each write transaction stays small.
+        """
+
+        with self.connect() as conn:
+            rows = conn.execute(
+                """
+                DELETE FROM locks
+                WHERE name IN (
+                    SELECT name FROM locks WHERE expires_at <= ? ORDER BY expires_at LIMIT ?
+                )
+                RETURNING name, owner, token, acquired_at, expires_at
+                """,
+                (now_ms, limit),
+            ).fetchall()
+            conn.commit()
+        return [dict(row) for row in rows]
+
+    def insert_orders(
+        self, payloads: list[dict[str, Any]], *, status: str = "NEW"
+    ) -> list[dict[str, Any]]:
+        """Persist orders and their ``order.new`` change events in one transaction.
+
+        A payload may carry ``command_id`` linking it to its ``order.submit`` command.
+        """
+
+        with self.connect() as conn:
+            records = self._add_orders(conn, payloads, status, epoch_ms())
+            conn.commit()
+        return records
+
+    def _add_orders(
+        self, conn: sqlite3.Connection, payloads: list[dict[str, Any]], status: str, now: int
+    ) -> list[dict[str, Any]]:
+        records: list[dict[str, Any]] = []
+        for payload in payloads:
+            data = {key: value for key, value in payload.items() if key != "command_id"}
+            command_id = payload.get("command_id")
+            cursor = conn.execute(
+                """
+                INSERT INTO orders(
+                    command_id, symbol, qty, px, source, status, data, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    command_id,
+                    str(data.get("symbol") or ""),
+                    _as_float(data.get("qty")),
+                    _as_float(data.get("px")),
+                    data.get("source"),
+                    status,
+                    _dumps(data),
+                    now,
+                    now,
+                ),
+            )
+            records.append(
+                {
+                    "id": cursor.lastrowid,
+                    "command_id": command_id,
+                    "status": status,
+                    "created_at": now,
+                    "updated_at": now,
+                    "data": data,
+                }
+            )
+        conn.executemany(
+            """
+            INSERT INTO events(topic, level, data, corr_id, created_at)
+            VALUES ('order.new', 'INFO', ?, ?, ?)
+            """,
+            [(_dumps(record), str(record["id"]), now) for record in records],
+        )
+        return records
+
+    def submit_orders(
+        self,
+        payloads: list[dict[str, Any]],
+        *,
+        initiator: str | None,
+        ttl_sec: int | None,
+        token_len: int = 6,
+    ) -> list[dict[str, Any]]:
+        """Queue ``order.submit`` commands, orders and approvals for a batch in one transaction.
+
+        With ``ttl_sec`` set every order gets an approval and starts in ``PENDING_APPROVAL``;
+        otherwise orders start ``NEW``. Returned records carry the approval ``token``.
+        """
+
+        now = epoch_ms()
+        status = "NEW" if ttl_sec is None else "PENDING_APPROVAL"
+        with self.connect() as conn:
+            linked: list[dict[str, Any]] = []
+            for payload in payloads:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO commands(type, payload, corr_id, created_at)
+                    VALUES ('order.submit', ?, NULL, ?)
+                    """,
+                    (_dumps(payload), now),
+                )
+                linked.append({**payload, "command_id": cursor.lastrowid})
+            records = self._add_orders(conn, linked, status, now)
+            if ttl_sec is not None:
+                for record in records:
+                    approval = self._add_approval(
+                        conn, int(record["command_id"]), ttl_sec, token_len, initiator, now
+                    )
+                    record["token"] = approval["token"]
+                    record["expires_at"] = approval["expires_at"]
+            conn.commit()
+        if ttl_sec is not None and records:
+            notify(self.approvals_wakeup)
+        return records
+
+    def transition_orders(self, changes: list[dict[str, Any]]) -> list[dict[str, Any] | None]:
+        """Apply order status changes in one transaction, emitting ``order.status`` events.
+
+        Each change names the order by ``id`` or ``command_id`` and carries ``status``, the
+        statuses it may move from (``allowed_from``) and optional ``fields`` merged into the
+        payload. Changes whose order is missing or in another status yield ``None``.
+        """
+
+        with self.connect() as conn:
+            results = self._move_orders(conn, changes, epoch_ms())
+            conn.commit()
+        return results
+
+    def _follow_approvals(
+        self,
+        conn: sqlite3.Connection,
+        approval_status: str,
+        command_ids: list[int],
+        now: int,
+        fields: dict[str, Any] | None = None,
+    ) -> None:
+        """Move the orders behind approvals that just became ``approval_status``."""
+
+        status, allowed = _APPROVAL_ORDER_STATUS[approval_status]
+        changes = [
+            {"command_id": command_id, "status": status, "allowed_from": allowed, "fields": fields}
+            for command_id in command_ids
+        ]
+        self._move_orders(conn, changes, now)
+
+    def _move_orders(
+        self, conn: sqlite3.Connection, changes: list[dict[str, Any]], now: int
+    ) -> list[dict[str, Any] | None]:
+        results: list[dict[str, Any] | None] = []
+        events: list[tuple[str, str, int]] = []
+        for change in changes:
+            column = "id" if change.get("id") is not None else "command_id"
+            allowed = list(change["allowed_from"])
+            marks = ",".join("?" for _ in allowed)
+            row = conn.execute(
+                f"""
+                UPDATE orders
+                SET status = ?, updated_at = ?, data = json_patch(data, ?)
+                WHERE {column} = ? AND status IN ({marks})
+                RETURNING id, command_id, status, data, created_at, updated_at
+                """,
+                (
+                    change["status"],
+                    now,
+                    _dumps(change.get("fields") or {}),
+                    change.get(column),
+                    *allowed,
+                ),
+            ).fetchone()
+            if row is None:
+                results.append(None)
+                continue
+            record: dict[str, Any] = dict(row)
+            record["data"] = _loads(record["data"])
+            results.append(record)
+            events.append((_dumps(record), str(record["id"]), now))
+        conn.executemany(
+            """
+            INSERT INTO events(topic, level, data, corr_id, created_at)
+            VALUES ('order.status', 'INFO', ?, ?, ?)
+            """,
+            events,
+        )
+        return results
+
+    def get_order(
+        self, order_id: int | None = None, *, command_id: int | None = None
+    ) -> dict[str, Any] | None:
+        """Return one order by primary key or by its ``order.submit`` command id."""
+
+        column, value = ("id", order_id) if order_id is not None else ("command_id", command_id)
+        with self.connect() as conn:
+            row = conn.execute(
+                f"""
+                SELECT id, command_id, status, data, created_at, updated_at
+                FROM orders WHERE {column} = ?
+                """,
+                (value,),
+            ).fetchone()
+        if row is None:
+            return None
+        record: dict[str, Any] = dict(row)
+        record["data"] = _loads(record["data"])
+        return record
+
+    def query_orders(
+        self,
+        *,
+        limit: int = 50,
+        status: str | Iterable[str] | None = None,
+        symbol: str | None = None,
+        since_ms: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return orders newest first, filtered through the status/symbol/time indexes."""
+
+        clauses: list[str] = []
+        params: list[Any] = []
+        if status is not None:
+            statuses = [status] if isinstance(status, str) else list(status)
+            clauses.append(f"status IN ({','.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if symbol:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if since_ms is not None:
+            clauses.append("created_at >= ?")
+            params.append(since_ms)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        with self.connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, command_id, status, data, created_at, updated_at
+                FROM orders {where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+                """,
+                params,
+            ).fetchall()
+        records: list[dict[str, Any]] = []
+        for row in rows:
+            record: dict[str, Any] = dict(row)
+            record["data"] = _loads(record["data"])
+            records.append(record)
+        return records
+
+    def delete_orders(self) -> int:
+        """Remove every stored order."""
+
+        with self.connect() as conn:
+            cursor = conn.execute("DELETE FROM orders")
+            conn.commit()
+            return int(cursor.rowcount)
+
+    def events_after(
+        self, last_id: int, topic_prefix: str | None = None, limit: int = 500
+    ) -> list[dict[str, Any]]:
+        """Return events with ``id > last_id`` in id order, optionally by topic prefix."""
+
+        clauses = ["id > ?"]
+        params: list[Any] = [last_id]
+        if topic_prefix:
+            clauses.append("topic >= ? AND topic < ?")
+            params.extend([topic_prefix, topic_prefix + "\uffff"])
+        params.append(limit)
+        with self.connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, topic, level, data, corr_id, created_at
+                FROM events WHERE {' AND '.join(clauses)}
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                params,
+            ).fetchall()
+        events: list[dict[str, Any]] = []
+        for row in rows:
+            event: dict[str, Any] = dict(row)
+            event["data"] = _loads(event["data"])
+            events.append(event)
+        return events
+
+    def last_event_id(self) -> int:
+        """Return the id of the newest event (0 when empty)."""
+
+        with self.connect() as conn:
+            row = conn.execute("SELECT MAX(id) AS last FROM events").fetchone()
+        return int(row["last"]) if row and row["last"] is not None else 0
+
     def set_kv(self, key: str, value: str) -> None:
         """Upsert a key/value pair."""
 
@@ -267,6 +979,17 @@ class Bus:
             return None
         return value
 
+    def set_portfolio(self, snapshot: dict[str, Any]) -> None:
+        """Publish the adapter's portfolio snapshot for other processes."""
+
+        self.set_kv("portfolio", _dumps(snapshot))
+
+    def get_portfolio(self) -> dict[str, Any] | None:
+        """Return the last published portfolio snapshot, if any."""
+
+        value = self.get_kv("portfolio")
+        return _loads(value) if value else None
+
     def record_heartbeat(self, component: str, ts_ms: int) -> None:
         """Record a heartbeat timestamp for a component."""
 
@@ -330,38 +1053,32 @@ class Bus:
         return "".join(secrets.choice(_TOKEN_ALPHABET) for _ in range(length))
 
 
-def _default_state() -> dict[str, Any]:
-    return {"mode": "mock", "mode_mock": True, "paused": False}
-
-
 def read_state() -> dict[str, Any]:
     """Read the persisted control state, creating defaults if necessary."""
 
-    ensure_runtime_dirs()
-    if not STATE_FILE.exists():
-        state = _default_state()
-        STATE_FILE.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
-        return state
-
-    try:
-        data = json.loads(STATE_FILE.read_text(encoding="utf-8"))
-        if not isinstance(data, dict):  # pragma: no cover - defensive
-            raise ValueError
-    except (json.JSONDecodeError, ValueError):
-        data = _default_state()
-    merged = _default_state()
-    merged.update(data)
-    return merged
+    return _STATE.read()
 
 
 def write_state(**fields: Any) -> dict[str, Any]:
     """Update the control state with the provided fields."""
 
-    state = read_state()
-    state.update(fields)
-    ensure_runtime_dirs()
-    STATE_FILE.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
-    return state
+    return _STATE.update(fields)
+
+
+def update_state(
+    apply: Callable[[dict[str, Any]], dict[str, Any]],
+    *,
+    expected_version: int | None = None,
+) -> dict[str, Any]:
+    """Atomically apply ``apply(current)`` to the control state (optionally as a CAS)."""
+
+    return _STATE.update(apply=apply, expected_version=expected_version)
+
+
+def subscribe_state(listener: Callable[[dict[str, Any]], None]) -> Callable[[], None]:
+    """Call ``listener`` whenever this process observes a new control state version."""
+
+    return _STATE.subscribe(listener)
 
 
 def pidfile(name: str) -> Path:
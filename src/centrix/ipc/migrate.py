@@ -4,10 +4,108 @@ from __future__ import annotations
 
 import time
 from pathlib import Path
-from sqlite3 import Connection, connect
+from sqlite3 import Connection, complete_statement, connect
 
 SCHEMA_FILE = Path(__file__).with_name("schema.sql")
 
+# Incremental migrations applied on top of schema.sql (version 1), keyed by target version.
+MIGRATIONS: tuple[tuple[int, str], ...] = (
+    (
+        2,
+        """
+        CREATE TABLE IF NOT EXISTS alert_outbox(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          channel TEXT NOT NULL,
+          level TEXT NOT NULL,
+          topic TEXT NOT NULL,
+          message TEXT NOT NULL,
+          fields TEXT NOT NULL DEFAULT '{}',
+          fingerprint TEXT,
+          status TEXT NOT NULL DEFAULT 'PENDING',   -- PENDING|DEAD
+          attempts INTEGER NOT NULL DEFAULT 0,
+          next_attempt_at INTEGER NOT NULL,         -- epoch ms
+          last_error TEXT,
+          created_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_alert_outbox_due ON alert_outbox(status, next_attempt_at);
+        """,
+    ),
+    (
+        3,
+        """
+        ALTER TABLE locks ADD COLUMN token INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE locks ADD COLUMN pid INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE locks ADD COLUMN expires_at INTEGER NOT NULL DEFAULT 0;  -- epoch ms
+        UPDATE locks SET expires_at = acquired_at + ttl_sec * 1000;
+        CREATE INDEX IF NOT EXISTS ix_locks_expires ON locks(expires_at);
+        -- Last fencing token granted per lock name; survives release so tokens only grow.
+        CREATE TABLE IF NOT EXISTS lock_fence(
+          name TEXT PRIMARY KEY,
+          token INTEGER NOT NULL
+        );
+        """,
+    ),
+    (
+        4,
+        """
+        ALTER TABLE approvals ADD COLUMN initiator TEXT;
+        ALTER TABLE approvals ADD COLUMN approver TEXT;
+        ALTER TABLE approvals ADD COLUMN reason TEXT;
+        ALTER TABLE approvals ADD COLUMN decided_at INTEGER;         -- epoch ms
+        UPDATE approvals SET
+          initiator = (
+            SELECT json_extract(v, '$.initiator') FROM kv
+            WHERE k = 'approval:order:' || approvals.command_id
+          ),
+          approver = (
+            SELECT json_extract(v, '$.approver') FROM kv
+            WHERE k = 'approval:order:' || approvals.command_id
+          ),
+          reason = (
+            SELECT json_extract(v, '$.reason') FROM kv
+            WHERE k = 'approval:order:' || approvals.command_id
+          );
+        UPDATE approvals SET status = 'REJECT'
+        WHERE status = 'PENDING' AND EXISTS (
+          SELECT 1 FROM kv
+          WHERE k = 'approval:order:' || approvals.command_id
+            AND json_extract(v, '$.status') = 'REJECTED'
+        );
+        DELETE FROM kv WHERE k LIKE 'approval:order:%';
+        UPDATE approvals SET token = token || '-' || id
+        WHERE id NOT IN (SELECT MIN(id) FROM approvals GROUP BY token);
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_approvals_token ON approvals(token);
+        CREATE INDEX IF NOT EXISTS ix_approvals_command ON approvals(command_id);
+        """,
+    ),
+    (
+        5,
+        """
+        CREATE TABLE IF NOT EXISTS orders(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          command_id INTEGER,                       -- order.submit command, when queued
+          symbol TEXT NOT NULL,
+          qty REAL NOT NULL DEFAULT 0,
+          px REAL NOT NULL DEFAULT 0,
+          source TEXT,
+          status TEXT NOT NULL DEFAULT 'NEW',
+          data TEXT NOT NULL DEFAULT '{}',          -- full submitted payload
+          created_at INTEGER NOT NULL,              -- epoch ms
+          updated_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_orders_status ON orders(status, created_at);
+        CREATE INDEX IF NOT EXISTS ix_orders_symbol ON orders(symbol, created_at);
+        CREATE INDEX IF NOT EXISTS ix_orders_created ON orders(created_at);
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_orders_command ON orders(command_id)
+          WHERE command_id IS NOT NULL;
+        """,
+    ),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Databases already brought up to date by this process, keyed by path -> inode.
+_READY: dict[Path, int] = {}
+
 
 def epoch_ms() -> int:
     """Return the current epoch milliseconds."""
@@ -16,9 +114,18 @@ def epoch_ms() -> int:
 
 
 def ensure_db(db_path: str) -> None:
-    """Initialise the SQLite database with pragmas and schema if required."""
+    """Initialise the SQLite database with pragmas and schema if required.
+
+    Repeat calls for a database this process already migrated return without connecting.
+    """
 
     path = Path(db_path)
+    key = path.resolve()
+    try:
+        if _READY.get(key) == path.stat().st_ino:
+            return
+    except FileNotFoundError:
+        pass
     if not path.parent.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -26,7 +133,9 @@ def ensure_db(db_path: str) -> None:
         _apply_pragmas(conn)
         if _needs_initialisation(conn):
             _apply_schema(conn)
+        _apply_migrations(conn)
         conn.commit()
+    _READY[key] = path.stat().st_ino
 
 
 def _apply_pragmas(conn: Connection) -> None:
@@ -51,3 +160,51 @@ def _needs_initialisation(conn: Connection) -> bool:
 def _apply_schema(conn: Connection) -> None:
     schema_sql = SCHEMA_FILE.read_text(encoding="utf-8")
     conn.executescript(schema_sql)
+
+
+def _schema_version(conn: Connection) -> int:
+    row = conn.execute("SELECT MAX(version) FROM meta;").fetchone()
+    return int(row[0]) if row and row[0] is not None else 1
+
+
+def _statements(script: str) -> list[str]:
+    """Split a migration script into complete SQL statements."""
+
+    statements: list[str] = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    leftover = "\n".join(
+        line for line in buffer.splitlines() if not line.strip().startswith("--")
+    ).strip()
+    if leftover:
+        raise ValueError(f"incomplete SQL statement in migration: {leftover!r}")
+    return statements
+
+
+def _apply_migrations(conn: Connection) -> None:
+    """Apply pending migrations, each atomically and at most once across processes.
+
+    Every step runs in its own ``BEGIN IMMEDIATE`` transaction, re-reads the version once
+    it holds the write lock, and bumps the version in the same commit as its statements.
+    """
+
+    if _schema_version(conn) >= SCHEMA_VERSION:
+        return
+    conn.commit()
+    for version, script in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            if _schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            for statement in _statements(script):
+                conn.execute(statement)
+            conn.execute("UPDATE meta SET version = ?;", (version,))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
@@ -0,0 +1,164 @@
+"""Control state file with cached reads and versioned, atomic updates."""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+StateListener = Callable[[dict[str, Any]], None]
+
+
+def default_state() -> dict[str, Any]:
+    return {"mode": "mock", "mode_mock": True, "paused": False, "version": 0}
+
+
+class StateConflict(RuntimeError):
+    """Raised when a compare-and-swap update sees a newer state version."""
+
+    def __init__(self, expected: int, actual: int) -> None:
+        super().__init__(f"state version is {actual}, expected {expected}")
+        self.expected = expected
+        self.actual = actual
+
+
+class StateStore:
+    """Read-mostly JSON state file shared by all Centrix processes.
+
+    Reads are served from memory while the file's inode, mtime and size are unchanged.
+    Updates run under an advisory lock on a sidecar file, bump ``version`` and replace the
+    file atomically, so concurrent writers never lose each other's fields. Listeners are
+    called whenever this process observes a new version, whoever wrote it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._cache: dict[str, Any] | None = None
+        self._signature: tuple[int, int, int, int] | None = None
+        self._version: int | None = None
+        self._listeners: list[StateListener] = []
+
+    def _stat(self) -> tuple[int, int, int, int] | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load(self) -> dict[str, Any]:
+        state = default_state()
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return state
+        if isinstance(data, dict):
+            state.update(data)
+        return state
+
+    def _remember(self, state: dict[str, Any]) -> bool:
+        """Cache ``state`` and report whether it is a version we had not seen yet."""
+
+        self._cache = state
+        self._signature = self._stat()
+        version = int(state.get("version", 0))
+        changed = version != self._version
+        self._version = version
+        return changed
+
+    def _notify(self, state: dict[str, Any]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(dict(state))
+            except Exception:  # pragma: no cover - listeners must not break readers
+                pass
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        with open(lock_path, "a+", encoding="utf-8") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _write(self, state: dict[str, Any]) -> None:
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(state, handle, separators=(",", ":"))
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def read(self) -> dict[str, Any]:
+        """Return the current state, creating the default file if necessary."""
+
+        signature = self._stat()
+        if signature is None:
+            return self.update()
+        with self._lock:
+            if self._cache is not None and signature == self._signature:
+                return dict(self._cache)
+            state = self._load()
+            changed = self._remember(state)
+        if changed:
+            self._notify(state)
+        return dict(state)
+
+    def update(
+        self,
+        fields: Mapping[str, Any] | None = None,
+        *,
+        apply: Callable[[dict[str, Any]], Mapping[str, Any]] | None = None,
+        expected_version: int | None = None,
+    ) -> dict[str, Any]:
+        """Merge ``fields`` (and the result of ``apply(current)``) into the state.
+
+        ``expected_version`` turns the update into a compare-and-swap that raises
+        :class:`StateConflict` if another writer got there first.
+        """
+
+        with self._lock, self._file_lock():
+            current = self._load()
+            version = int(current.get("version", 0))
+            if expected_version is not None and version != expected_version:
+                raise StateConflict(expected_version, version)
+            changes = dict(fields or {})
+            if apply is not None:
+                changes.update(apply(dict(current)))
+            exists = self.path.exists()
+            if exists and all(current.get(key) == value for key, value in changes.items()):
+                state = current
+            else:
+                state = {**current, **changes, "version": version + 1}
+                self._write(state)
+            changed = self._remember(state)
+        if changed:
+            self._notify(state)
+        return dict(state)
+
+    def subscribe(self, listener: StateListener) -> Callable[[], None]:
+        """Register ``listener`` for state changes and return an unsubscribe callable."""
+
+        self._listeners.append(listener)
+
+        def _unsubscribe() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _unsubscribe
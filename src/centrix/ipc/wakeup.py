@@ -0,0 +1,64 @@
+"""Best-effort cross-process wake-ups over a Unix datagram socket."""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import select
+import socket
+
+log = logging.getLogger(__name__)
+
+
+def notify(path: str) -> None:
+    """Wake whoever listens on ``path``; does nothing if nobody does."""
+
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        # A full queue already holds a wake-up, and a stale socket has no listener.
+        with contextlib.suppress(OSError):
+            sock.sendto(b"\x01", path)
+
+
+class Wakeup:
+    """Listening end of :func:`notify`: ``wait`` returns early when notified."""
+
+    def __init__(self, sock: socket.socket, path: str) -> None:
+        self._sock = sock
+        self.path = path
+
+    @classmethod
+    def listen(cls, path: str) -> Wakeup | None:
+        """Bind ``path``, replacing a socket left by an earlier listener; ``None`` on failure."""
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            sock.bind(path)
+        except OSError as exc:
+            sock.close()
+            log.warning("Cannot listen for wake-ups on %s: %s", path, exc)
+            return None
+        sock.setblocking(False)
+        return cls(sock, path)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds; returns ``True`` if woken by a notification."""
+
+        readable, _, _ = select.select([self._sock], [], [], max(0.0, timeout))
+        if not readable:
+            return False
+        # Notifications sent while we were busy collapse into this one wake-up.
+        with contextlib.suppress(BlockingIOError):
+            while self._sock.recv(64):
+                pass
+        return True
+
+    def close(self) -> None:
+        self._sock.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
@@ -0,0 +1,125 @@
+"""Asynchronous delivery of alerts queued in the IPC outbox."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from centrix.core.logging import log_event
+from centrix.core.metrics import METRICS
+from centrix.core.ratelimit import BucketMap, TokenBucket
+from centrix.ipc.bus import Bus
+from centrix.settings import AppSettings, get_settings
+
+PostFn = Callable[..., dict[str, Any]]
+
+
+def format_alert(alert: dict[str, Any]) -> str:
+    """Return the single-alert message text."""
+
+    return f"[{str(alert['level']).upper()}] {alert['topic']}: {alert['message']}"
+
+
+def format_batch(alerts: list[dict[str, Any]]) -> str:
+    """Return one message text covering several alerts for the same channel."""
+
+    if len(alerts) == 1:
+        return format_alert(alerts[0])
+    lines = [f"{len(alerts)} alerts"]
+    lines.extend(f"• {format_alert(alert)}" for alert in alerts)
+    return "\n".join(lines)
+
+
+class AlertSender:
+    """Drain the alert outbox with batching, backoff and per-channel rate limits."""
+
+    def __init__(
+        self,
+        bus: Bus,
+        post: PostFn,
+        *,
+        settings: AppSettings | None = None,
+        time_fn: Callable[[], float] = time.time,
+    ) -> None:
+        self._bus = bus
+        self._post = post
+        self._settings = settings or get_settings()
+        self._time = time_fn
+        rate = max(0.01, float(self._settings.alert_channel_rate_per_sec))
+        burst = max(1, int(self._settings.alert_channel_burst))
+        self._buckets: BucketMap[str] = BucketMap(lambda now: TokenBucket(rate, burst, now))
+
+    def _backoff_ms(self, attempts: int) -> int:
+        base = max(0.0, float(self._settings.alert_retry_base_sec))
+        cap = max(base, float(self._settings.alert_retry_max_sec))
+        return int(min(cap, base * (2**attempts)) * 1000)
+
+    def run_once(self) -> int:
+        """Deliver due alerts and return how many were acknowledged."""
+
+        now = self._time()
+        now_ms = int(now * 1000)
+        batch_size = max(1, int(self._settings.alert_outbox_batch_size))
+        due = self._bus.due_alerts(now_ms, limit=batch_size * 10)
+        if not due:
+            return 0
+
+        by_channel: dict[str, list[dict[str, Any]]] = {}
+        for alert in due:
+            by_channel.setdefault(str(alert["channel"]), []).append(alert)
+
+        delivered = 0
+        for channel, alerts in by_channel.items():
+            bucket = self._buckets.get(channel, now)
+            for start in range(0, len(alerts), batch_size):
+                if not bucket.try_take(now):
+                    METRICS.increment_counter("alerts_outbox_rate_limited_total")
+                    break
+                chunk = alerts[start : start + batch_size]
+                delivered += self._deliver(channel, chunk, now_ms)
+        return delivered
+
+    def _deliver(self, channel: str, alerts: list[dict[str, Any]], now_ms: int) -> int:
+        ids = [int(alert["id"]) for alert in alerts]
+        if len(alerts) == 1:
+            alert = alerts[0]
+            metadata: dict[str, Any] = {
+                "fields": alert["fields"],
+                "topic": alert["topic"],
+                "level": alert["level"],
+            }
+        else:
+            metadata = {
+                "type": "alert-batch",
+                "count": len(alerts),
+                "fingerprints": [alert.get("fingerprint") for alert in alerts],
+            }
+        start = time.monotonic()
+        try:
+            response = self._post(channel, format_batch(alerts), metadata=metadata)
+            error = None if response.get("ok") else str(response.get("error") or "not ok")
+        except Exception as exc:  # pragma: no cover - defensive
+            error = str(exc) or exc.__class__.__name__
+        METRICS.observe("alert_delivery_ms", (time.monotonic() - start) * 1000.0)
+
+        if error is None:
+            self._bus.ack_alerts(ids)
+            METRICS.increment_counter("alerts_delivered_total", len(ids))
+            return len(ids)
+
+        attempts = min(int(alert.get("attempts", 0)) for alert in alerts)
+        max_attempts = max(1, int(self._settings.alert_retry_max_attempts))
+        self._bus.retry_alerts(ids, error, now_ms + self._backoff_ms(attempts), max_attempts)
+        METRICS.increment_counter("alerts_delivery_failures_total", len(ids))
+        log_event(
+            "slack",
+            "alerts.retry",
+            "alert delivery failed",
+            level="WARN",
+            channel=channel,
+            count=len(ids),
+            attempts=attempts + 1,
+            error=error,
+        )
+        return 0
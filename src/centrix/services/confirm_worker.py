@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
+import heapq
 import signal
 import sys
 import time
+from typing import Any
 
+from centrix.core.alerts import flush_digests
 from centrix.core.logging import ensure_runtime_dirs, log_event, warn_on_local_env
-from centrix.core.metrics import METRICS
+from centrix.core.metrics import METRICS, publish_kpis
 from centrix.ipc.bus import Bus, read_state
 from centrix.ipc.migrate import epoch_ms
+from centrix.ipc.wakeup import Wakeup
 from centrix.settings import get_settings
 
 
@@ -18,55 +22,138 @@ def _install_signal_handlers() -> None:
         signal.signal(sig, lambda *_: sys.exit(0))
 
 
+class ExpiryScheduler:
+    """Keep pending approval deadlines in a heap and expire them exactly when due.
+
+    With a ``wakeup`` listening on the bus's approvals socket, new approvals are picked up
+    as soon as they are committed instead of after the current sleep.
+    """
+
+    def __init__(self, bus: Bus, wakeup: Wakeup | None = None) -> None:
+        self._bus = bus
+        self._wakeup = wakeup
+        self._heap: list[tuple[int, int]] = []
+        self._last_id = 0
+
+    def sync(self) -> int:
+        """Pick up approvals created since the last sync; returns how many were added."""
+
+        added = 0
+        while True:
+            rows = self._bus.pending_approvals_after(self._last_id)
+            for row in rows:
+                heapq.heappush(self._heap, (int(row["expires_at"]), int(row["id"])))
+                self._last_id = max(self._last_id, int(row["id"]))
+            added += len(rows)
+            if len(rows) < 1000:
+                return added
+
+    def next_due(self) -> int | None:
+        """Return the earliest tracked deadline in epoch ms."""
+
+        return self._heap[0][0] if self._heap else None
+
+    def wait(self, timeout: float) -> None:
+        """Sleep until the next deadline, a new approval or ``timeout`` seconds, if earlier."""
+
+        due = self.next_due()
+        if due is not None:
+            timeout = min(timeout, (due - epoch_ms()) / 1000.0)
+        if self._wakeup is None:
+            time.sleep(max(0.0, timeout))
+            self.sync()
+        elif self._wakeup.wait(timeout):
+            self.sync()
+
+    def expire_due(self, now_ms: int) -> list[dict[str, Any]]:
+        """Expire every tracked approval due by ``now_ms`` and emit ``approval.expired``."""
+
+        due: list[int] = []
+        while self._heap and self._heap[0][0] <= now_ms:
+            due.append(heapq.heappop(self._heap)[1])
+        if not due:
+            return []
+        # Approvals decided in the meantime are skipped by the PENDING guard; their orders
+        # and the ``approval.expired`` events are written in the same transaction.
+        return self._bus.expire_approval_ids(due, now_ms)
+
+
 def run() -> None:
-    """Run the worker loop, logging a heartbeat once per second."""
+    """Run the worker loop, logging a heartbeat once per second.
+
+    Between heartbeats the loop sleeps until the next approval deadline or until a new
+    approval wakes it, so expiry fires on time without rescanning the approvals table.
+    """
 
     ensure_runtime_dirs()
     warn_on_local_env("worker")
     settings = get_settings()
     bus = Bus(settings.ipc_db)
+    # Listen before the first sync so no approval committed in between is missed.
+    wakeup = Wakeup.listen(bus.approvals_wakeup)
+    scheduler = ExpiryScheduler(bus, wakeup)
+    scheduler.sync()
     _install_signal_handlers()
 
     log_event("worker", "startup", "confirm worker starting")
 
+    tick_interval = 1.0
     heartbeat_interval = 5.0
+    try:
+        _loop(bus, scheduler, tick_interval, heartbeat_interval)
+    finally:
+        if wakeup is not None:
+            wakeup.close()
+
+
+def _loop(
+    bus: Bus, scheduler: ExpiryScheduler, tick_interval: float, heartbeat_interval: float
+) -> None:
+    next_tick = time.monotonic()
     next_heartbeat = time.monotonic()
+    expired = 0
 
     while True:
         now_ms = epoch_ms()
-        expired = bus.expire_approvals(now_ms)
-        if expired:
-            log_event("worker", "approvals", "expired approvals", count=expired)
-
-        state = read_state()
-        paused = bool(state.get("paused"))
-        open_approvals = bus.count_pending_approvals()
-        queue_depth = bus.count_pending_commands()
-        METRICS.update_open_approvals(open_approvals)
-        METRICS.update_queue_depth(queue_depth)
-
-        log_event(
-            "worker",
-            "heartbeat",
-            "worker alive",
-            expired=expired,
-            paused=paused,
-            open_approvals=open_approvals,
-            queue_depth=queue_depth,
-        )
-        if paused:
-            log_event("worker", "state", "holding", level="INFO")
-
-        if time.monotonic() >= next_heartbeat:
-            bus.emit(
-                "svc.worker.alive",
-                "INFO",
-                {"component": "confirm", "expired": expired, "ts": now_ms},
+        lapsed = scheduler.expire_due(now_ms)
+        if lapsed:
+            expired += len(lapsed)
+            log_event("worker", "approvals", "expired approvals", count=len(lapsed))
+
+        if time.monotonic() >= next_tick:
+            next_tick = time.monotonic() + tick_interval
+            state = read_state()
+            paused = bool(state.get("paused"))
+            open_approvals = bus.count_pending_approvals()
+            queue_depth = bus.count_pending_commands()
+            METRICS.update_open_approvals(open_approvals)
+            METRICS.update_queue_depth(queue_depth)
+            publish_kpis("worker")
+            flush_digests()
+
+            log_event(
+                "worker",
+                "heartbeat",
+                "worker alive",
+                expired=expired,
+                paused=paused,
+                open_approvals=open_approvals,
+                queue_depth=queue_depth,
             )
-            next_heartbeat = time.monotonic() + heartbeat_interval
-        bus.record_heartbeat("worker", now_ms)
-
-        time.sleep(1)
+            if paused:
+                log_event("worker", "state", "holding", level="INFO")
+
+            if time.monotonic() >= next_heartbeat:
+                bus.emit(
+                    "svc.worker.alive",
+                    "INFO",
+                    {"component": "confirm", "expired": expired, "ts": now_ms},
+                )
+                next_heartbeat = time.monotonic() + heartbeat_interval
+            bus.record_heartbeat("worker", now_ms)
+            expired = 0
+
+        scheduler.wait(next_tick - time.monotonic())
 
 
 def main() -> None:
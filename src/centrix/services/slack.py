@@ -23,13 +23,17 @@ from slack_sdk.socket_mode import SocketModeClient
 from slack_sdk.web import WebClient
 from slack_sdk.web.slack_response import SlackResponse
 
+from centrix.core.alerts import flush_digests
 from centrix.core.approvals import confirm as approve_order
 from centrix.core.approvals import reject as reject_order
 from centrix.core.logging import ensure_runtime_dirs, log_event, warn_on_local_env
+from centrix.core.metrics import publish_kpis
 from centrix.core.rbac import allow, role_of
 from centrix.ipc import epoch_ms
 from centrix.ipc.bus import Bus
+from centrix.services.alert_outbox import AlertSender
 from centrix.settings import get_settings
+from centrix.shared.locks import list_lock_files
 
 SIM_LOG = Path("runtime/reports/slack_sim.jsonl")
 _SLACK_OUT: SlackOut | None = None
@@ -930,10 +934,24 @@ def _help_text() -> str:
         "• /cx mode [mock|real]\n"
         "• /cx restart <service>\n"
         "• /cx order <SYMBOL> <QTY> <PX>\n"
+        "• /cx locks\n"
         "• /cx help"
     )
 
 
+def _format_locks(entries: list[dict[str, Any]]) -> str:
+    if not entries:
+        return "no locks held"
+    now_ms = epoch_ms()
+    lines = ["Locks:"]
+    for entry in entries:
+        age_s = max(0.0, (now_ms - int(entry["acquired_at"])) / 1000)
+        state = "expired" if entry["expired"] else "held"
+        holder = entry.get("owner") or f"pid {entry['pid']}"
+        lines.append(f"• {entry['name']}: {state} by {holder} for {age_s:.1f}s")
+    return "\n".join(lines)
+
+
 def _ephemeral_payload(
     text: str, *, blocks: list[dict[str, Any]] | None = None
 ) -> dict[str, Any]:
@@ -995,6 +1013,13 @@ def handle_slash_command(
             "http_status": status_code,
         }
 
+    if command == "locks":
+        return _ephemeral_payload(_format_locks(list_lock_files())), {
+            "ok": True,
+            "action": "locks",
+            "http_status": 200,
+        }
+
     if command in {"pause", "resume", "mode", "restart", "order"}:
         if not allow(command if command != "order" else "order", role):
             return _role_denied(command)
@@ -1205,7 +1230,11 @@ def handle_button(
 
 
 def route_alert(level: str, topic: str, message: str, **fields: Any) -> None:
-    """Dispatch alerts to Slack once minimum level is met."""
+    """Queue alerts for Slack delivery once minimum level is met.
+
+    Alerts go to the IPC outbox and are posted by the Slack service's sender, so callers
+    (often holding the control lock) never wait on the Slack API.
+    """
     settings = get_settings()
     levels = ["DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"]
     if not settings.slack_enabled:
@@ -1217,9 +1246,15 @@ def route_alert(level: str, topic: str, message: str, **fields: Any) -> None:
         return
     if level_idx < min_idx:
         return
-    payload = f"[{level.upper()}] {topic}: {message}"
-    metadata = {"fields": fields, "topic": topic, "level": level}
-    get_slack_out().post_message(channel_for("alerts"), payload, metadata=metadata)
+    fingerprint = fields.get("fingerprint")
+    Bus(settings.ipc_db).enqueue_alert(
+        channel_for("alerts"),
+        level.upper(),
+        topic,
+        message,
+        fields,
+        fingerprint=str(fingerprint) if fingerprint is not None else None,
+    )
 
 
 def process_slash_command_request(
@@ -1359,12 +1394,15 @@ class SlackService:
         self.bus = Bus(self.settings.ipc_db)
         self._stop_event = Event()
         self._last_notify_id = 0
+        self._alert_sender = AlertSender(self.bus, self.out.post_message, settings=self.settings)
         existing = self.bus.tail_events(limit=1, topic="slack.notify")
         if existing:
             self._last_notify_id = existing[-1]["id"]
 
     def _background_tick(self) -> None:
         self._last_notify_id = dispatch_notifications(self.out, self.bus, self._last_notify_id)
+        flush_digests()
+        self._alert_sender.run_once()
 
     def _background_loop(self) -> None:
         run_selftest_cycle(self.out, self.bus)
@@ -1372,6 +1410,7 @@ class SlackService:
         next_heartbeat = time.monotonic()
         while not self._stop_event.is_set():
             self._background_tick()
+            publish_kpis("slack")
             now = time.monotonic()
             if now >= next_selftest:
                 run_selftest_cycle(self.out, self.bus)
@@ -18,6 +18,7 @@ class AppSettings(BaseSettings):
 
     ipc_db: str = "runtime/ctl.db"
     order_approval_ttl_sec: int = 300
+    control_lock_wait_sec: float = 10.0
     confirm_strict: bool = True
 
     slack_enabled: bool = False
@@ -43,12 +44,47 @@ class AppSettings(BaseSettings):
     ibkr_client_id: int = 7
     ibkr_req_timeout_ms: int = 4_000
     ibkr_md_snapshot_sec: int = 10
+    ibkr_md_max_lines: int = 100
+    ibkr_pacing_enabled: bool = True
+    ibkr_max_msgs_per_sec: float = 45.0
+    ibkr_heartbeat_sec: float = 10.0
+    ibkr_portfolio_max_age_sec: float = 5.0
+    ibkr_history_dir: str = "runtime/history"
+    ibkr_gateways: str = ""
+    ibkr_reconnect_base_sec: float = 0.5
+    ibkr_reconnect_max_sec: float = 30.0
+    # Run the async client stack (market data, portfolio, order routing) in the adapter.
+    # It needs a named frame transport: "jsonl" speaks the JSON-lines protocol of ibkr_sim.
+    # There is no TWS API transport, so the session does not start against a real gateway.
+    ibkr_session_enabled: bool = False
+    ibkr_session_transport: str = ""
+    ibkr_md_symbols: str = ""
+
+    risk_max_order_qty: int = 0
+    risk_max_order_notional: float = 0.0
+    risk_max_position_qty: int = 0
+    risk_max_gross_notional: float = 0.0
+    risk_max_margin_used_pct: float = 0.0
+    # How often order-entry processes reload the published portfolio and open orders.
+    risk_refresh_sec: float = 1.0
 
     approval_token_length: int = 6
     state_file: str = "runtime/state.json"
+    # Beats are written at least this often; twice it must stay under the dashboard's
+    # 10 second health window.
+    heartbeat_max_interval_sec: float = 4.0
 
     alert_dedup_window_sec: int = 60
     alert_rate_per_min: int = 20
+    alert_topic_rate_per_min: int = 10
+    alert_dedup_max_entries: int = 10_000
+    alert_digest_interval_sec: int = 60
+    alert_outbox_batch_size: int = 20
+    alert_channel_rate_per_sec: float = 1.0
+    alert_channel_burst: int = 3
+    alert_retry_base_sec: float = 2.0
+    alert_retry_max_sec: float = 300.0
+    alert_retry_max_attempts: int = 8
     alert_min_level: str = "WARN"
 
 
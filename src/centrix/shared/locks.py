@@ -1,124 +1,335 @@
-"""File-based lock helpers used for control operations."""
+"""Lease-based lock manager backed by the IPC database."""
 
 from __future__ import annotations
 
-import json
 import os
+import threading
 import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any
 
-from centrix.core.logging import ensure_runtime_dirs
+from centrix.core.logging import log_event
+from centrix.core.metrics import METRICS
+from centrix.ipc.bus import Bus
+from centrix.settings import get_settings
 
-LOCK_DIR = Path("runtime/locks")
+CONTROL_LOCK = "svc.control"
+CONTROL_LOCK_TTL = 30
 
 
-def _lock_path(name: str) -> Path:
-    safe = name.replace("/", "_")
-    return LOCK_DIR / f"{safe}.lock"
+@dataclass(slots=True)
+class Lease:
+    """A held lock; ``token`` is a fencing token that increases with every grant."""
 
+    name: str
+    owner: str
+    token: int
+    pid: int
+    acquired_at: int
+    expires_at: int
+    action: str | None = None
 
-def acquire_lock(name: str, ttl: int = 30) -> bool:
+    @property
+    def ttl_ms(self) -> int:
+        return max(0, self.expires_at - self.acquired_at)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class LockBusyError(RuntimeError):
+    """Raised when a lock could not be acquired within the allowed wait."""
+
+    def __init__(self, name: str, holder: dict[str, Any] | None) -> None:
+        super().__init__(f"lock {name} is busy")
+        self.name = name
+        self.holder = holder or {}
+
+
+class LockManager:
+    """Grant leases per lock name, waking waiters on release.
+
+    The ``locks`` table in the IPC database is the single source of truth shared by all
+    processes; leases held by this process are mirrored in memory so local waiters are
+    woken on release, while leases held elsewhere are polled until they free up or expire.
+
+    Waiters in one process are served in FIFO order: only the head of the queue claims the
+    row. Across processes there is no queue, so whichever process claims first after a
+    release or expiry wins and ordering is not FIFO.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        *,
+        poll_interval: float = 0.05,
+        reap_batch: int = 500,
+        time_fn: Callable[[], float] = time.time,
+    ) -> None:
+        self._db_path = db_path
+        self._poll_interval = max(0.001, poll_interval)
+        self._reap_batch = max(1, reap_batch)
+        self._time = time_fn
+        self._cond = threading.Condition()
+        self._held: dict[str, Lease] = {}
+        self._waiters: dict[str, deque[object]] = {}
+        self._buses: dict[Path, Bus] = {}
+
+    def _now_ms(self) -> int:
+        return int(self._time() * 1000)
+
+    def _bus(self) -> Bus:
+        db_path = self._db_path or get_settings().ipc_db
+        key = Path(db_path).resolve()
+        bus = self._buses.get(key)
+        if bus is None:
+            bus = Bus(db_path)
+            self._buses[key] = bus
+        return bus
+
+    def _live(self, name: str) -> Lease | None:
+        # Caller holds the condition; drops the local lease once it expired.
+        current = self._held.get(name)
+        if current is not None and current.expires_at <= self._now_ms():
+            del self._held[name]
+            return None
+        return current
+
+    def _claim(self, name: str, owner: str, ttl: int, action: str | None) -> Lease | None:
+        # Runs without the condition held: the SQLite claim may wait on other processes.
+        row = self._bus().claim_lock(name, owner, ttl, self._now_ms(), os.getpid())
+        if row is None:
+            return None
+        lease = Lease(
+            name=name,
+            owner=owner,
+            token=int(row["token"]),
+            pid=int(row["pid"]),
+            acquired_at=int(row["acquired_at"]),
+            expires_at=int(row["expires_at"]),
+            action=action,
+        )
+        with self._cond:
+            self._held[name] = lease
+        return lease
+
+    def acquire(
+        self,
+        name: str,
+        *,
+        owner: str | None = None,
+        ttl: int = 30,
+        wait: float = 0.0,
+        action: str | None = None,
+    ) -> Lease | None:
+        """Acquire ``name`` waiting up to ``wait`` seconds; return the lease or ``None``.
+
+        ``action`` labels the lease in the hold-time metrics.
+        """
+
+        holder = owner or f"pid:{os.getpid()}"
+        started = time.monotonic()
+        deadline = started + max(0.0, wait)
+        contended = False
+        ticket = object()
+        with self._cond:
+            queue = self._waiters.setdefault(name, deque())
+            queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    if queue[0] is not ticket or self._live(name) is not None:
+                        contended = True
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        local = self._held.get(name)
+                        if local is not None:
+                            expires_in = max(0.0, local.expires_at / 1000 - self._time())
+                            remaining = min(remaining, expires_in)
+                        self._cond.wait(max(remaining, 0.001))
+                        continue
+                # Only the head of the queue gets here, so the claim needs no lock of ours.
+                lease = self._claim(name, holder, ttl, action)
+                if lease is not None:
+                    if contended:
+                        waited_ms = (time.monotonic() - started) * 1000.0
+                        METRICS.record_lock_wait(waited_ms, acquired=True)
+                    return lease
+                contended = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                with self._cond:
+                    # Held by another process: nobody here will notify us.
+                    self._cond.wait(max(min(remaining, self._poll_interval), 0.001))
+        finally:
+            with self._cond:
+                queue.remove(ticket)
+                if not queue:
+                    del self._waiters[name]
+                self._cond.notify_all()
+        METRICS.record_lock_wait((time.monotonic() - started) * 1000.0, acquired=False)
+        return None
+
+    def release(
+        self, name: str, token: int | None = None, *, owner: str | None = None
+    ) -> bool:
+        """Release ``name`` if it still matches ``token``/``owner``.
+
+        Without either, only a lease held by this process is released.
+        """
+
+        with self._cond:
+            lease = self._held.get(name)
+            if lease is not None and token in (None, lease.token) and owner in (None, lease.owner):
+                del self._held[name]
+                token = lease.token
+                METRICS.record_lock_hold(max(0, self._now_ms() - lease.acquired_at), lease.action)
+            elif token is None and owner is None:
+                return False
+        released = self._bus().release_lock(name, token=token, owner=owner)
+        with self._cond:
+            self._cond.notify_all()
+        return released
+
+    def renew(self, lease: Lease, ttl: int) -> bool:
+        """Extend a held lease by ``ttl`` seconds from now."""
+
+        expires_at = self._now_ms() + ttl * 1000
+        renewed = self._bus().renew_lock(lease.name, lease.token, expires_at)
+        with self._cond:
+            if not renewed:
+                current = self._held.get(lease.name)
+                if current is not None and current.token == lease.token:
+                    del self._held[lease.name]
+                return False
+            lease.expires_at = expires_at
+            current = self._held.get(lease.name)
+            if current is not None and current.token == lease.token:
+                current.expires_at = expires_at
+            return True
+
+    @contextmanager
+    def hold(
+        self,
+        name: str,
+        *,
+        owner: str | None = None,
+        ttl: int = 30,
+        wait: float = 0.0,
+        action: str | None = None,
+    ) -> Iterator[Lease]:
+        """Hold ``name`` for the duration of the block or raise :class:`LockBusyError`."""
+
+        lease = self.acquire(name, owner=owner, ttl=ttl, wait=wait, action=action)
+        if lease is None:
+            raise LockBusyError(name, self.owner(name))
+        try:
+            yield lease
+        finally:
+            self.release(name, lease.token)
+
+    def owner(self, name: str) -> dict[str, Any] | None:
+        """Return the current holder of ``name`` if any."""
+
+        with self._cond:
+            lease = self._held.get(name)
+            if lease is not None:
+                return lease.to_dict()
+        return self._bus().get_lock(name)
+
+    def waiting(self, name: str) -> int:
+        """Return how many callers in this process are queued for ``name``."""
+
+        with self._cond:
+            return len(self._waiters.get(name, ()))
+
+    def leases(self, now_ms: int | None = None) -> list[dict[str, Any]]:
+        """Return every stored lease annotated for inspection."""
+
+        current = now_ms if now_ms is not None else self._now_ms()
+        entries: list[dict[str, Any]] = []
+        for row in self._bus().list_locks():
+            acquired = int(row["acquired_at"])
+            expires = int(row["expires_at"])
+            entries.append(
+                {
+                    "name": str(row["name"]),
+                    "pid": int(row["pid"]),
+                    "owner": str(row["owner"]),
+                    "token": int(row["token"]),
+                    "acquired_at": acquired,
+                    "expires_at": expires,
+                    "ttl_ms": max(0, expires - acquired),
+                    "expired": expires <= current,
+                    "waiting": self.waiting(str(row["name"])),
+                }
+            )
+        return entries
+
+    def reap(self, now_ms: int | None = None) -> int:
+        """Drop expired leases in batches, returning how many were removed."""
+
+        current = now_ms if now_ms is not None else self._now_ms()
+        reaped: list[dict[str, Any]] = []
+        with self._cond:
+            for name, lease in list(self._held.items()):
+                if lease.expires_at <= current:
+                    del self._held[name]
+        bus = self._bus()
+        while True:
+            batch = bus.reap_locks(current, limit=self._reap_batch)
+            reaped.extend(batch)
+            if len(batch) < self._reap_batch:
+                break
+        if reaped:
+            with self._cond:
+                self._cond.notify_all()
+        if reaped:
+            METRICS.increment_counter("locks_reaped_total", len(reaped))
+            log_event(
+                "locks",
+                "reap",
+                "expired locks reaped",
+                count=len(reaped),
+                names=sorted({str(row["name"]) for row in reaped}),
+            )
+        return len(reaped)
+
+
+LOCKS = LockManager()
+
+
+def acquire_lock(name: str, ttl: int = 30, *, wait: float = 0.0, owner: str | None = None) -> bool:
     """Attempt to acquire a cooperative lock returning ``True`` on success."""
 
-    ensure_runtime_dirs()
-    path = _lock_path(name)
-    now = int(time.time() * 1000)
-    payload = {
-        "name": name,
-        "pid": os.getpid(),
-        "acquired_at": now,
-        "expires_at": now + ttl * 1000,
-        "ttl_sec": ttl,
-    }
-    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
-    try:
-        fd = os.open(path, flags, 0o644)
-    except FileExistsError:
-        owner = lock_owner(name)
-        if owner and owner.get("expires_at", 0) < now:
-            try:
-                path.unlink()
-            except FileNotFoundError:
-                pass
-            return acquire_lock(name, ttl=ttl)
-        return False
-
-    with os.fdopen(fd, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle)
-    return True
+    return LOCKS.acquire(name, owner=owner, ttl=ttl, wait=wait) is not None
 
 
 def release_lock(name: str) -> None:
     """Release a previously acquired lock if still held."""
 
-    path = _lock_path(name)
-    try:
-        path.unlink()
-    except FileNotFoundError:
-        return
+    LOCKS.release(name)
 
 
 def lock_owner(name: str) -> dict[str, Any] | None:
     """Return the stored lock payload, if any."""
 
-    path = _lock_path(name)
-    if not path.exists():
-        return None
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return None
-    return data if isinstance(data, dict) else None
+    return LOCKS.owner(name)
 
 
 def list_lock_files(now_ms: int | None = None) -> list[dict[str, Any]]:
-    """Return lock file metadata for inspection."""
+    """Return lock metadata for inspection."""
 
-    ensure_runtime_dirs()
-    current = now_ms if now_ms is not None else int(time.time() * 1000)
-    locks: list[dict[str, Any]] = []
-    for path in sorted(LOCK_DIR.glob("*.lock")):
-        try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-        except json.JSONDecodeError:
-            continue
-        if not isinstance(data, dict):
-            continue
-        name = data.get("name") or path.stem.replace(".lock", "")
-        acquired = int(data.get("acquired_at", current))
-        expires = int(data.get("expires_at", acquired))
-        ttl = max(0, expires - acquired)
-        locks.append(
-            {
-                "name": str(name),
-                "pid": int(data.get("pid", 0)),
-                "acquired_at": acquired,
-                "expires_at": expires,
-                "ttl_ms": ttl,
-                "expired": expires <= current,
-                "path": str(path),
-            }
-        )
-    return locks
+    return LOCKS.leases(now_ms)
 
 
 def reaper_sweep(now_ms: int | None = None) -> int:
     """Remove expired locks returning the number of entries deleted."""
 
-    ensure_runtime_dirs()
-    current = now_ms if now_ms is not None else int(time.time() * 1000)
-    removed = 0
-    for path in list(LOCK_DIR.glob("*.lock")):
-        try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-        except json.JSONDecodeError:
-            continue
-        expires_at = int(data.get("expires_at", current))
-        if expires_at <= current:
-            try:
-                path.unlink()
-            except FileNotFoundError:
-                continue
-            removed += 1
-    return removed
+    return LOCKS.reap(now_ms)
@@ -15,7 +15,7 @@ from textual.binding import Binding
 from textual.widgets import Footer, Header, Input, Log, Static
 
 from centrix.core.logging import ensure_runtime_dirs, log_event, warn_on_local_env
-from centrix.core.metrics import snapshot_kpis
+from centrix.core.metrics import aggregate_kpis
 from centrix.ipc import is_running, pidfile, read_state
 from centrix.ipc.bus import Bus
 from centrix.settings import get_settings
@@ -81,7 +81,7 @@ class ControlApp(App[None]):
         paused_bool = bool(state.get("paused", False))
         paused_value = "1" if paused_bool else "0"
         running = self._running_services()
-        kpi = snapshot_kpis()
+        kpi = aggregate_kpis()
         errors_1m = kpi.get("errors_1m", 0)
         alerts_dedup = kpi.get("alerts_dedup_1m", 0)
         status_text = (
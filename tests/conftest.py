@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from centrix.settings import get_settings
+
+
+@pytest.fixture(autouse=True)
+def _isolated_runtime(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """Keep every test out of the repository's ``runtime/`` directory.
+
+    Runtime paths (IPC database, logs, metrics spool, state file) are relative, so each
+    test runs from its own ``tmp_path`` with the IPC database pointed there as well.
+    """
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("IPC_DB", str(tmp_path / "runtime" / "ctl.db"))
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    yield
+    get_settings.cache_clear()  # type: ignore[attr-defined]
@@ -56,6 +56,7 @@ class FakeIbkrGateway:
         self.connection_attempts = 0
         self.last_connection_params: dict[str, Any] | None = None
         self.orders: list[FakeOrder] = []
+        self.history_requests: list[tuple[str, str, float, float]] = []
         self._next_order_id = 1
 
     def connect(self, *, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
@@ -114,3 +115,12 @@ class FakeIbkrGateway:
             "timestamp": snapshot.timestamp,
         }
 
+    def fetch_history(
+        self, symbol: str, bar_size: str, start: float, end: float
+    ) -> list[dict[str, Any]]:
+        """Return one synthetic bar per minute in ``[start, end)``."""
+
+        self.history_requests.append((symbol, bar_size, start, end))
+        first = int(start // 60 + (start % 60 > 0)) * 60
+        bar = {"open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5, "volume": 10.0}
+        return [{"ts": float(ts), **bar} for ts in range(first, int(end), 60) if ts < end]
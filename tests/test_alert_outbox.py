@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from centrix.ipc.bus import Bus
+from centrix.services.alert_outbox import AlertSender
+from centrix.settings import AppSettings
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _bus(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Bus:
+    monkeypatch.chdir(tmp_path)
+    return Bus("runtime/ctl.db")
+
+
+def test_sender_batches_per_channel(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    bus = _bus(tmp_path, monkeypatch)
+    posts: list[tuple[str, str, dict[str, Any]]] = []
+
+    def post(channel: str, text: str, *, metadata: dict[str, Any]) -> dict[str, Any]:
+        posts.append((channel, text, metadata))
+        return {"ok": True}
+
+    for idx in range(3):
+        bus.enqueue_alert("#alerts", "ERROR", "svc.test", f"boom {idx}", fingerprint=f"fp-{idx}")
+    bus.enqueue_alert("#ops", "WARN", "svc.other", "single")
+
+    clock = Clock()
+    clock.now = max(a["created_at"] for a in bus.due_alerts(10**15)) / 1000
+    sender = AlertSender(bus, post, time_fn=clock)
+    assert sender.run_once() == 4
+    assert bus.count_outbox() == 0
+
+    by_channel = {channel: (text, meta) for channel, text, meta in posts}
+    assert by_channel["#alerts"][0].startswith("3 alerts")
+    assert by_channel["#alerts"][1]["count"] == 3
+    assert by_channel["#ops"][0] == "[WARN] svc.other: single"
+
+
+def test_sender_retries_with_backoff(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    bus = _bus(tmp_path, monkeypatch)
+    bus.enqueue_alert("#alerts", "ERROR", "svc.test", "boom")
+    responses = [{"ok": False, "error": "ratelimited"}, {"ok": True}]
+    calls: list[str] = []
+
+    def post(channel: str, text: str, *, metadata: dict[str, Any]) -> dict[str, Any]:
+        calls.append(text)
+        return responses.pop(0)
+
+    clock = Clock()
+    clock.now = max(a["created_at"] for a in bus.due_alerts(10**15)) / 1000
+    settings = AppSettings(alert_retry_base_sec=5.0, alert_retry_max_attempts=3)
+    sender = AlertSender(bus, post, settings=settings, time_fn=clock)
+
+    assert sender.run_once() == 0
+    assert bus.count_outbox() == 1
+    clock.now += 1
+    assert sender.run_once() == 0
+    assert len(calls) == 1
+
+    clock.now += 5
+    assert sender.run_once() == 1
+    assert bus.count_outbox() == 0
+
+
+def test_sender_dead_letters_after_max_attempts(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    bus = _bus(tmp_path, monkeypatch)
+    bus.enqueue_alert("#alerts", "ERROR", "svc.test", "boom")
+    clock = Clock()
+    clock.now = max(a["created_at"] for a in bus.due_alerts(10**15)) / 1000
+    settings = AppSettings(alert_retry_base_sec=0.0, alert_retry_max_attempts=2)
+    sender = AlertSender(bus, lambda *_, **__: {"ok": False}, settings=settings, time_fn=clock)
+
+    sender.run_once()
+    clock.now += 1
+    sender.run_once()
+    assert bus.count_outbox() == 0
+    assert bus.count_outbox("DEAD") == 1
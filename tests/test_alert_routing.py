@@ -32,6 +32,17 @@ def test_alerts_written_to_sim(tmp_path: Path, monkeypatch: pytest.MonkeyPatch)
         sim_file.unlink()
     alerts = importlib.import_module("centrix.core.alerts")
     alerts.emit_alert("WARN", "svc.test", "something happened", "fp-test")
+    assert not sim_file.exists()
+
+    from centrix.ipc.bus import Bus
+    from centrix.services.alert_outbox import AlertSender
+    from centrix.settings import get_settings
+
+    bus = Bus(get_settings().ipc_db)
+    assert bus.count_outbox() == 1
+    sender = AlertSender(bus, slack.get_slack_out().post_message)
+    assert sender.run_once() == 1
+    assert bus.count_outbox() == 0
     assert sim_file.exists()
     lines = sim_file.read_text(encoding="utf-8").splitlines()
     entries = [json.loads(line) for line in lines if line.strip()]
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from centrix.core.alerts import alert_counters, emit_alert, reset_alerts
+from centrix.core.alerts import alert_counters, emit_alert, flush_digests, reset_alerts
 from centrix.core.metrics import METRICS, snapshot_kpis
 from centrix.settings import get_settings
 
@@ -32,3 +32,69 @@ def test_alert_throttle(monkeypatch) -> None:
     finally:
         monkeypatch.delenv("ALERT_RATE_PER_MIN", raising=False)
         get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+def test_alert_topic_throttle(monkeypatch) -> None:
+    reset_alerts()
+    METRICS.reset()
+    monkeypatch.setenv("ALERT_TOPIC_RATE_PER_MIN", "2")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        assert emit_alert("ERROR", "svc.flap", "one", "fp-1") is True
+        assert emit_alert("ERROR", "svc.flap", "two", "fp-2") is True
+        assert emit_alert("ERROR", "svc.flap", "three", "fp-3") is False
+        assert emit_alert("ERROR", "svc.other", "four", "fp-4") is True
+        assert alert_counters()["throttled"] == 1
+    finally:
+        monkeypatch.delenv("ALERT_TOPIC_RATE_PER_MIN", raising=False)
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+def test_alert_dedup_bounded_lru(monkeypatch) -> None:
+    reset_alerts()
+    METRICS.reset()
+    monkeypatch.setenv("ALERT_DEDUP_MAX_ENTRIES", "2")
+    monkeypatch.setenv("ALERT_TOPIC_RATE_PER_MIN", "100")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        assert emit_alert("ERROR", "svc.test", "a", "fp-a") is True
+        assert emit_alert("ERROR", "svc.test", "b", "fp-b") is True
+        assert emit_alert("ERROR", "svc.test", "a", "fp-a") is False
+        assert emit_alert("ERROR", "svc.test", "c", "fp-c") is True
+        counters = alert_counters()
+        assert counters["tracked"] == 2
+        assert counters["evicted"] == 1
+        # fp-b was least recently seen and got evicted; fp-a is still deduped.
+        assert emit_alert("ERROR", "svc.test", "a", "fp-a") is False
+    finally:
+        monkeypatch.delenv("ALERT_DEDUP_MAX_ENTRIES", raising=False)
+        monkeypatch.delenv("ALERT_TOPIC_RATE_PER_MIN", raising=False)
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+def test_alert_digest_summarises_suppressed(monkeypatch) -> None:
+    reset_alerts()
+    METRICS.reset()
+    clock = {"now": 1_000.0}
+    monkeypatch.setattr("centrix.core.alerts.time.time", lambda: clock["now"])
+    monkeypatch.setenv("ALERT_DIGEST_INTERVAL_SEC", "60")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        assert emit_alert("ERROR", "svc.flap", "down", "fp-a") is True
+        for _ in range(3):
+            clock["now"] += 1
+            assert emit_alert("ERROR", "svc.flap", "down", "fp-a") is False
+        assert flush_digests(clock["now"]) == []
+
+        clock["now"] += 60
+        digests = flush_digests()
+        assert len(digests) == 1
+        assert digests[0]["topic"] == "svc.flap"
+        assert digests[0]["occurrences"] == 3
+        assert digests[0]["fingerprints"] == {"fp-a": 3}
+        assert "3 suppressed occurrence(s) of svc.flap" in digests[0]["message"]
+        assert flush_digests(force=True) == []
+        assert alert_counters()["digests"] == 1
+    finally:
+        monkeypatch.delenv("ALERT_DIGEST_INTERVAL_SEC", raising=False)
+        get_settings.cache_clear()  # type: ignore[attr-defined]
@@ -47,3 +47,22 @@ def test_mode_and_state_commands(tmp_path, monkeypatch) -> None:
     )
     assert result.exit_code == 0
     assert '"symbol":"TEST"' in result.stdout
+
+
+def test_control_lock_only_guards_acquisition(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    _reload_cli()
+    from centrix import cli  # type: ignore
+    from centrix.shared.locks import LOCKS, LockBusyError
+
+    try:
+        with cli._control_lock("svc.start", ["worker"]):
+            assert LOCKS.owner(cli.LOCK_NAME)["owner"] == "cli:svc.start"
+            raise LockBusyError("inner", None)
+    except LockBusyError as exc:
+        assert exc.name == "inner"
+    else:  # pragma: no cover - the action's own error must not be swallowed
+        raise AssertionError("LockBusyError from the action was swallowed")
+    assert LOCKS.owner(cli.LOCK_NAME) is None
+    retained = json.loads(Path("runtime/metrics/cli.retained.json").read_text(encoding="utf-8"))
+    assert 'lock_hold_ms{action="svc.start"}' in retained["histograms"]
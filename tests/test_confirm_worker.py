@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from centrix.core.orders import OrderBook, OrderTransition
+from centrix.ipc.bus import Bus
+from centrix.ipc.migrate import epoch_ms
+from centrix.ipc.wakeup import Wakeup
+from centrix.services.confirm_worker import ExpiryScheduler
+
+
+def test_expiry_scheduler_expires_due_approvals(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    bus = Bus("runtime/ctl.db")
+    order_id = bus.enqueue("order.submit", {"symbol": "DEMO"})
+    book = OrderBook()
+    book.add([{"symbol": "DEMO", "qty": 1, "px": 1.0, "command_id": order_id}])
+    book.transition([OrderTransition("PENDING_APPROVAL", command_id=order_id)])
+    lapsing = bus.new_approval(order_id, ttl_sec=0, initiator="U_INIT")
+    settled = bus.new_approval(order_id, ttl_sec=0)
+    later = bus.new_approval(order_id, ttl_sec=60)
+    assert bus.fulfill_approval(settled["token"], "U_CONF") is False
+
+    scheduler = ExpiryScheduler(bus)
+    assert scheduler.sync() == 2
+    assert scheduler.next_due() == lapsing["expires_at"]
+
+    expired = scheduler.expire_due(epoch_ms())
+    assert [row["id"] for row in expired] == [lapsing["id"]]
+    assert scheduler.next_due() == later["expires_at"]
+    assert scheduler.sync() == 0
+
+    events = bus.tail_events(topic="approval.expired")
+    assert len(events) == 1
+    assert events[0]["data"]["order_id"] == order_id
+    assert events[0]["data"]["initiator"] == "U_INIT"
+    assert book.open_orders() == []
+    assert book.list()[0]["status"] == "EXPIRED"
+
+
+def test_expiry_scheduler_wakes_up_for_new_approvals(tmp_path) -> None:
+    bus = Bus(str(tmp_path / "ctl.db"))
+    wakeup = Wakeup.listen(bus.approvals_wakeup)
+    assert wakeup is not None
+    scheduler = ExpiryScheduler(bus, wakeup)
+    order_id = bus.enqueue("order.submit", {"symbol": "DEMO"})
+    timer = threading.Timer(0.1, bus.new_approval, (order_id,), {"ttl_sec": 30})
+    timer.start()
+    try:
+        started = time.monotonic()
+        scheduler.wait(10.0)
+        assert time.monotonic() - started < 5.0
+        assert scheduler.next_due() is not None
+    finally:
+        timer.cancel()
+        wakeup.close()
@@ -59,6 +59,11 @@ def test_status_payload_and_control(monkeypatch: pytest.MonkeyPatch, tmp_path: P
     assert required.issubset(status.keys())
     assert status["last_action"] is None
     assert status["connectivity"].get("dashboard") == "up"
+    assert status["portfolio"]["positions"] == []
+    Bus(server.settings.ipc_db).set_portfolio(
+        {"version": 3, "account": {"equity": 1.0}, "positions": [{"symbol": "AAPL"}]}
+    )
+    assert server.status_payload()["portfolio"]["version"] == 3
 
     pause_snapshot = server.api_control("pause", identity=identity, body={})
     assert pause_snapshot["paused"] is True
@@ -152,3 +157,44 @@ def test_control_endpoint_handles_client_disconnect(
     assert response.status_code == 499
     payload = json.loads(response.body.decode("utf-8"))
     assert payload == {"ok": False, "error": "client_disconnected"}
+
+
+def test_metrics_endpoint_serves_openmetrics(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    server = _load_server(monkeypatch, tmp_path, token=None)
+    METRICS.increment_counter("control.actions_total", 2)
+
+    request = SimpleNamespace(headers={"accept": "application/openmetrics-text; version=1.0.0"})
+    response = asyncio.run(server.metrics(request))
+    assert response.media_type.startswith("application/openmetrics-text")
+    body = response.body.decode("utf-8")
+    assert 'centrix_control_actions_total{component="dashboard"} 2' in body
+    assert body.endswith("# EOF\n")
+
+    json_request = SimpleNamespace(headers={"accept": "application/json"})
+    payload = asyncio.run(server.metrics(json_request))
+    assert payload["ok"] is True
+
+
+def test_test_order_runs_risk_checks(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("RISK_MAX_POSITION_QTY", "10")
+    server = _load_server(monkeypatch, tmp_path, token=None)
+    identity = server.ControlIdentity(principal="test", user="tester", role="admin")
+    from centrix.core import risk
+    from centrix.core.risk import RISK
+
+    # The risk module may hold a settings module imported before the reload above.
+    risk.get_settings.cache_clear()  # type: ignore[attr-defined]
+    RISK.reset()
+    try:
+        Bus(server.settings.ipc_db).set_portfolio(
+            {"version": 1, "positions": [{"symbol": "DEMO", "quantity": 9, "avg_price": 1.0}]}
+        )
+        with pytest.raises(server.HTTPException) as excinfo:
+            server.api_control("test-order", identity=identity, body={"symbol": "DEMO", "qty": 2})
+        assert excinfo.value.status_code == 422
+        assert "position limit" in excinfo.value.detail
+        assert list_orders() == []
+    finally:
+        RISK.reset()
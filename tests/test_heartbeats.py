@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from centrix import bus
+
+
+@pytest.fixture()
+def status_db(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    path = tmp_path / "ctl.db"
+    monkeypatch.setattr(bus, "_DB_PATH", path)
+    return path
+
+
+def _rows(publisher: bus.HeartbeatPublisher) -> dict[str, tuple[float, str, str | None]]:
+    assert publisher._conn is not None
+    rows = publisher._conn.execute("SELECT service, last_seen, state, details FROM svc_status")
+    return {name: (seen, state, details) for name, seen, state, details in rows}
+
+
+def test_unchanged_beats_wait_for_flush(status_db: Path) -> None:
+    clock = [100.0]
+    publisher = bus.HeartbeatPublisher(max_interval=5.0, time_fn=lambda: clock[0], background=False)
+    try:
+        publisher.beat("ibkr", "up", {"pid": 1})
+        assert publisher.writes == 1
+        for _ in range(4):
+            clock[0] += 1.0
+            publisher.beat("ibkr", "up")
+        assert publisher.writes == 1
+        assert _rows(publisher)["ibkr"][0] == 100.0
+
+        assert publisher.flush() == 1
+        seen, state, details = _rows(publisher)["ibkr"]
+        assert (seen, state) == (104.0, "up")
+        assert json.loads(details or "{}") == {"pid": 1}
+        assert publisher.flush() == 0
+    finally:
+        publisher.close()
+
+
+def test_due_beat_is_written_without_waiting_for_the_thread(status_db: Path) -> None:
+    clock = [100.0]
+    publisher = bus.HeartbeatPublisher(max_interval=5.0, time_fn=lambda: clock[0], background=False)
+    try:
+        publisher.beat("worker")
+        # A caller beating slower than max_interval: every beat goes straight through,
+        # so last_seen is never older than the caller's own interval.
+        for _ in range(3):
+            clock[0] += 5.05
+            publisher.beat("worker")
+            assert _rows(publisher)["worker"][0] == clock[0]
+        assert publisher.writes == 4
+    finally:
+        publisher.close()
+
+
+def test_state_change_writes_immediately_and_batches_pending(status_db: Path) -> None:
+    clock = [10.0]
+    publisher = bus.HeartbeatPublisher(max_interval=5.0, time_fn=lambda: clock[0], background=False)
+    try:
+        publisher.beat("worker")
+        publisher.beat("slack")
+        clock[0] = 12.0
+        publisher.beat("worker")
+        publisher.beat("slack")
+        writes = publisher.writes
+
+        publisher.beat("ibkr", "down", {"error": "timeout"})
+        assert publisher.writes == writes + 1
+        rows = _rows(publisher)
+        assert rows["ibkr"][1] == "down"
+        assert rows["worker"][0] == rows["slack"][0] == 12.0
+    finally:
+        publisher.close()
+
+
+def test_touch_service_feeds_get_services(status_db: Path) -> None:
+    bus.touch_service("tests-heartbeat", "up", {"port": 8080})
+    services = bus.get_services()
+    assert services["tests-heartbeat"]["state"] == "up"
+    assert services["tests-heartbeat"]["details"] == {"port": 8080}
+    bus.HEARTBEATS.forget("tests-heartbeat")
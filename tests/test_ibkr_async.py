@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from centrix.adapters.ibkr_async import (
+    AsyncIbkrClient,
+    GatewayTransport,
+    IbkrRequestError,
+    IbkrTimeoutError,
+)
+from centrix.core.metrics import KPIStore
+from centrix.settings import AppSettings
+from tests.fakes.fake_ibkr import FakeIbkrGateway
+
+
+class ScriptedTransport:
+    """In-memory transport answering requests out of order after per-symbol delays."""
+
+    def __init__(self, delays: dict[str, float] | None = None) -> None:
+        self.delays = delays or {}
+        self.sent: list[dict[str, Any]] = []
+        self.inbox: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        self.connected = False
+
+    async def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
+        self.connected = True
+        return True
+
+    async def close(self) -> None:
+        self.connected = False
+        self.inbox.put_nowait(None)
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def send(self, frame: dict[str, Any]) -> None:
+        self.sent.append(frame)
+        if "id" in frame:
+            asyncio.get_running_loop().create_task(self._reply(frame))
+
+    async def _reply(self, frame: dict[str, Any]) -> None:
+        symbol = frame["args"].get("symbol", "")
+        await asyncio.sleep(self.delays.get(symbol, 0.001))
+        if symbol == "BAD":
+            self.inbox.put_nowait({"id": frame["id"], "ok": False, "code": 200, "message": "no"})
+        else:
+            result = {"op": frame["op"], "symbol": symbol}
+            self.inbox.put_nowait({"id": frame["id"], "ok": True, "result": result})
+
+    async def recv(self) -> dict[str, Any]:
+        frame = await self.inbox.get()
+        if frame is None:
+            raise ConnectionError("closed")
+        return frame
+
+
+def test_async_client_multiplexes_requests() -> None:
+    metrics = KPIStore()
+
+    async def scenario() -> None:
+        transport = ScriptedTransport({"SLOW": 0.3, "HANG": 5.0})
+        settings = AppSettings(ibkr_pacing_enabled=False)
+        client = AsyncIbkrClient(settings=settings, transport=transport, metrics=metrics)
+        assert await client.connect() is True
+
+        slow = asyncio.create_task(client.watch("SLOW"))
+        account = await client.account()
+        assert account["op"] == "account" and not slow.done()
+
+        snapshots = await client.watch_many([f"S{idx}" for idx in range(200)] + ["BAD"])
+        assert len(snapshots) == 201 and snapshots["BAD"] is None
+        assert snapshots["S7"] == {"op": "market_data", "symbol": "S7"}
+
+        with pytest.raises(IbkrTimeoutError):
+            await client.watch("HANG", timeout=0.05)
+        hung = asyncio.create_task(client.watch("HANG"))
+        await asyncio.sleep(0.01)
+        hung.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await hung
+        cancels = [frame for frame in transport.sent if frame["op"] == "cancel"]
+        assert len(cancels) == 2
+
+        assert (await slow)["symbol"] == "SLOW"
+        assert client.pending == 0
+        await client.close()
+        with pytest.raises(ConnectionError):
+            await client.account()
+
+    asyncio.run(scenario())
+    assert metrics.get_counter("ibkr_timeouts_total") == 1
+    assert metrics.get_counter("ibkr_errors_total") == 1
+
+
+def test_gateway_transport_over_blocking_gateway() -> None:
+    gateway = FakeIbkrGateway(time_provider=lambda: 0.0)
+    settings = AppSettings(ibkr_enabled=True)
+
+    async def scenario() -> None:
+        client = AsyncIbkrClient(
+            settings=settings, transport=GatewayTransport(gateway), metrics=KPIStore()
+        )
+        try:
+            assert await client.connect() is True
+            assert (await client.account())["cash"] == 125_000.0
+            assert [item["symbol"] for item in await client.positions()] == ["AAPL", "MSFT"]
+            assert (await client.watch("AAPL"))["bid"] == 170.0
+            reply = await client.send_order({"symbol": "AAPL"}, {"qty": 1})
+            assert reply["status"] == "accepted"
+            with pytest.raises(IbkrRequestError):
+                await client.request("bogus")
+        finally:
+            await client.close()
+
+    asyncio.run(scenario())
+    assert gateway.is_connected() is False
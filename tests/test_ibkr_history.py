@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from centrix.adapters.ibkr import IbkrClient
+from centrix.adapters.ibkr_history import (
+    HistoryCache,
+    HistoryPacer,
+    bar_seconds,
+    load_history,
+    missing_ranges,
+)
+from centrix.adapters.ibkr_pacing import PacingLimits
+from centrix.core.metrics import KPIStore
+from centrix.settings import AppSettings
+from tests.fakes.fake_ibkr import FakeIbkrGateway
+
+
+def test_bar_size_and_gap_helpers() -> None:
+    assert bar_seconds("5 mins") == 300
+    assert bar_seconds("1d") == 86_400
+    with pytest.raises(ValueError):
+        bar_seconds("fortnight")
+    covered = [(0.0, 100.0), (200.0, 300.0)]
+    assert missing_ranges(covered, 50.0, 350.0) == [(100.0, 200.0), (300.0, 350.0)]
+    assert missing_ranges(covered, 10.0, 90.0) == []
+
+
+def test_history_fetches_only_missing_ranges(tmp_path: Path) -> None:
+    now = [100_000.0]
+    gateway = FakeIbkrGateway(time_provider=lambda: now[0])
+    metrics = KPIStore()
+    client = IbkrClient(
+        settings=AppSettings(ibkr_enabled=True),
+        gateway=gateway,
+        metrics=metrics,
+        time_provider=lambda: now[0],
+        sleep_fn=lambda _: None,
+        history_cache=HistoryCache(tmp_path),
+    )
+    assert client.connect(retries=1)
+    try:
+        bars = client.history("aapl", "1 min", 0.0, 6_000.0)
+        assert len(bars) == 100
+        assert bars[0]["ts"] == 0.0 and bars[-1]["close"] == 100.5
+        assert len(gateway.history_requests) == 1
+
+        assert client.history("AAPL", "1 min", 600.0, 1_200.0) == bars[10:20]
+        assert len(gateway.history_requests) == 1
+
+        extended = client.history("AAPL", "1 min", 3_000.0, 9_000.0)
+        assert len(extended) == 100
+        assert gateway.history_requests[-1][2:] == (6_000.0, 9_000.0)
+        assert metrics.get_counter("ibkr_history_cache_hits_total") == 1
+
+        columns = client.history_cache.columns("AAPL", "1 min")
+        assert len(columns["ts"]) == 150
+    finally:
+        client.disconnect()
+
+    # Disconnected clients serve what is already on disk.
+    reopened = HistoryCache(tmp_path)
+    assert len(reopened.query("AAPL", "1 min", 0.0, 9_000.0)) == 150
+
+
+def test_unfinished_bar_is_not_marked_covered(tmp_path: Path) -> None:
+    cache = HistoryCache(tmp_path)
+    gateway = FakeIbkrGateway(time_provider=lambda: 0.0)
+    client = IbkrClient(
+        settings=AppSettings(ibkr_enabled=True),
+        gateway=gateway,
+        metrics=KPIStore(),
+        time_provider=lambda: 1_230.0,
+        history_cache=cache,
+    )
+    client.connect(retries=1)
+    try:
+        client.history("MSFT", "1 min", 0.0, 1_230.0)
+        assert cache.coverage("MSFT", "1 min") == [(0.0, 1_170.0)]
+        client.history("MSFT", "1 min", 0.0, 1_230.0)
+        assert gateway.history_requests[-1][2:] == (1_170.0, 1_230.0)
+    finally:
+        client.disconnect()
+
+
+def test_history_pacer_spaces_requests_per_contract() -> None:
+    clock = [0.0]
+    slept: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        slept.append(seconds)
+        clock[0] += seconds
+
+    pacer = HistoryPacer(
+        PacingLimits(
+            hist_requests=4,
+            hist_window_sec=10.0,
+            hist_contract_requests=2,
+            hist_contract_window_sec=2.0,
+        ),
+        clock=lambda: clock[0],
+        sleep=sleep,
+    )
+    assert pacer.acquire("AAPL") == 0.0
+    assert pacer.acquire("aapl") == 0.0
+    assert pacer.acquire("MSFT") == 0.0
+    # The contract window only reopens once the oldest request leaves it.
+    assert pacer.acquire("AAPL") == pytest.approx(2.0)
+    # The overall cap is a hard window too: no refill until the first request ages out.
+    assert pacer.acquire("ES") == pytest.approx(8.0)
+    assert slept == [pytest.approx(2.0), pytest.approx(8.0)]
+
+
+def test_chunked_loads_publish_one_version_each(tmp_path: Path) -> None:
+    cache = HistoryCache(tmp_path)
+    calls: list[tuple[float, float]] = []
+
+    def fetch(symbol: str, bar_size: str, start: float, end: float) -> list[dict[str, float]]:
+        calls.append((start, end))
+        return [{"ts": float(ts), "close": float(ts)} for ts in range(int(start), int(end), 60)]
+
+    bars, requests = load_history(
+        cache, fetch, "ES", "1 min", 0.0, 6_000.0, now=10_000.0, max_bars=10
+    )
+    assert requests == len(calls) == 10 and len(bars) == 100
+    series = tmp_path / "ES" / "1min"
+    assert (series / "CURRENT").read_text() == "v1"
+    held = cache.columns("ES", "1 min")["close"]
+
+    load_history(cache, fetch, "ES", "1 min", 6_000.0, 7_200.0, now=10_000.0, max_bars=10)
+    load_history(cache, fetch, "ES", "1 min", 7_200.0, 7_800.0, now=10_000.0, max_bars=10)
+    assert (series / "CURRENT").read_text() == "v3"
+    assert sorted(path.name for path in series.glob("v*")) == ["v2", "v3"]
+    # Columns mapped from an older version stay readable after it is replaced.
+    assert len(held) == 100 and held[-1] == 5_940.0
+    columns = cache.columns("ES", "1 min")
+    assert {len(column) for column in columns.values()} == {130}
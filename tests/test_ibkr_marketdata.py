@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from centrix.adapters.ibkr_async import AsyncIbkrClient, GatewayTransport
+from centrix.adapters.ibkr_marketdata import MarketDataLimitError, MarketDataManager, QuoteCache
+from centrix.core.metrics import KPIStore
+from centrix.settings import AppSettings
+from tests.fakes.fake_ibkr import FakeIbkrGateway
+
+
+class StreamingTransport:
+    """Transport acknowledging (un)subscribe requests; ticks are pushed by the test."""
+
+    def __init__(self) -> None:
+        self.ops: list[tuple[str, str]] = []
+        self.inbox: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+
+    async def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
+        return True
+
+    async def close(self) -> None:
+        self.inbox.put_nowait(None)
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def send(self, frame: dict[str, Any]) -> None:
+        self.ops.append((frame["op"], frame["args"].get("symbol", "")))
+        self.inbox.put_nowait({"id": frame["id"], "ok": True, "result": None})
+
+    def tick(self, symbol: str, **values: Any) -> None:
+        self.inbox.put_nowait({"event": "tick", "symbol": symbol, **values})
+
+    async def recv(self) -> dict[str, Any]:
+        frame = await self.inbox.get()
+        if frame is None:
+            raise ConnectionError("closed")
+        return frame
+
+
+def test_quote_cache_reuses_slots() -> None:
+    cache = QuoteCache()
+    assert cache.update("AAPL", {"bid": 1.0, "ask": 1.1}) == 1
+    assert cache.update("AAPL", {"last": 1.05}) == 2
+    quote = cache.get("AAPL")
+    assert quote is not None
+    assert (quote["seq"], quote["bid"], quote["ask"], quote["last"]) == (2, 1.0, 1.1, 1.05)
+    assert quote["bid_size"] is None and quote["ts"] is None
+    cache.discard("AAPL")
+    cache.update("MSFT", {"bid": 2.0})
+    assert cache.get("AAPL") is None and cache.get("MSFT")["ask"] is None
+    assert len(cache) == 1
+
+
+def test_streams_are_shared_and_reference_counted() -> None:
+    metrics = KPIStore()
+
+    async def scenario() -> None:
+        transport = StreamingTransport()
+        client = AsyncIbkrClient(settings=AppSettings(), transport=transport, metrics=metrics)
+        await client.connect()
+        manager = MarketDataManager(client, max_lines=2, metrics=metrics)
+
+        seen: list[dict[str, Any]] = []
+        first, second = await asyncio.gather(
+            manager.subscribe("aapl", seen.append), manager.subscribe("AAPL")
+        )
+        assert manager.refs("AAPL") == 2
+        transport.tick("AAPL", bid=10.0, ask=10.2)
+        quote = await manager.watch("AAPL")
+        assert quote["bid"] == 10.0 and seen[0]["ask"] == 10.2
+        for _ in range(50):
+            assert (await manager.watch("AAPL"))["seq"] == 1
+        assert transport.ops == [("subscribe_md", "AAPL")]
+
+        await manager.subscribe("MSFT")
+        with pytest.raises(MarketDataLimitError):
+            await manager.subscribe("IBM")
+
+        await manager.unsubscribe(first)
+        await manager.unsubscribe(second)
+        assert manager.active == ["AAPL", "MSFT"]  # still held by the watch reference
+        assert await manager.release_idle() == []
+        manager._watch_idle = 0.0
+        assert await manager.release_idle() == ["AAPL"]
+        assert manager.active == ["MSFT"]
+        assert transport.ops[-1] == ("unsubscribe_md", "AAPL")
+        await manager.close()
+        await client.close()
+
+    asyncio.run(scenario())
+    assert metrics.get_counter("md_streams_opened_total") == 2
+    assert metrics.get_counter("md_line_limit_total") == 1
+
+
+def test_blocking_gateway_streams_by_polling() -> None:
+    async def scenario() -> None:
+        gateway = FakeIbkrGateway(time_provider=lambda: 5.0)
+        transport = GatewayTransport(gateway, poll_interval=0.01)
+        client = AsyncIbkrClient(settings=AppSettings(), transport=transport, metrics=KPIStore())
+        await client.connect()
+        manager = MarketDataManager(client, metrics=KPIStore())
+        quote = await manager.watch("AAPL", timeout=1.0)
+        assert quote["bid"] == 170.0 and quote["ts"] is None
+        await manager.close()
+        await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_watchers_share_one_reference_and_quotes_are_published() -> None:
+    published: list[list[dict[str, Any]]] = []
+
+    async def scenario() -> None:
+        transport = StreamingTransport()
+        client = AsyncIbkrClient(settings=AppSettings(), transport=transport, metrics=KPIStore())
+        await client.connect()
+        manager = MarketDataManager(
+            client,
+            metrics=KPIStore(),
+            watch_idle_sec=0.0,
+            publisher=published.append,
+            publish_interval=0.01,
+        )
+        watchers = [asyncio.create_task(manager.watch("AAPL", timeout=1.0)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        transport.tick("AAPL", bid=1.0)
+        transport.tick("AAPL", bid=2.0)
+        quotes = await asyncio.gather(*watchers)
+        assert {quote["bid"] for quote in quotes} <= {1.0, 2.0}
+        assert manager.refs("AAPL") == 1
+
+        await asyncio.sleep(0.05)
+        assert await manager.release_idle() == ["AAPL"]
+        assert manager.active == []
+        await manager.close()
+        await client.close()
+
+    asyncio.run(scenario())
+    assert published and published[0][0]["symbol"] == "AAPL"
+    assert published[-1][-1]["bid"] == 2.0
+    assert sum(len(batch) for batch in published) == 1
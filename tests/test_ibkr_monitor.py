@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+from typing import Any
+
+from centrix.adapters.ibkr import GatewayEndpoint, GatewayMonitor, parse_gateways
+from centrix.core.metrics import KPIStore
+from centrix.settings import AppSettings
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def test_parse_gateways_keeps_failover_order() -> None:
+    settings = AppSettings(
+        tws_port=4002, ibkr_client_id=7, ibkr_gateways="10.0.0.2:4002:9, bad, 127.0.0.1:4002"
+    )
+    endpoints = parse_gateways(settings)
+    assert [(item.name, item.address, item.client_id) for item in endpoints] == [
+        ("primary", "127.0.0.1:4002", 7),
+        ("backup1", "10.0.0.2:4002", 9),
+    ]
+
+
+def test_monitor_publishes_transitions_and_fails_over() -> None:
+    published: list[tuple[str, str, dict[str, Any]]] = []
+    metrics = KPIStore()
+    clock = [0.0]
+
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.close()
+
+    async def scenario() -> GatewayMonitor:
+        primary = await asyncio.start_server(handler, "127.0.0.1", 0)
+        backup = await asyncio.start_server(handler, "127.0.0.1", 0)
+        endpoints = [
+            GatewayEndpoint("primary", "127.0.0.1", primary.sockets[0].getsockname()[1], 1),
+            GatewayEndpoint("backup1", "127.0.0.1", backup.sockets[0].getsockname()[1], 2),
+            GatewayEndpoint("backup2", "127.0.0.1", _free_port(), 3),
+        ]
+        monitor = GatewayMonitor(
+            endpoints,
+            timeout=0.5,
+            summary_every=10.0,
+            metrics=metrics,
+            publish=lambda *args: published.append(args),
+            clock=lambda: clock[0],
+        )
+        assert [item.name for item in await monitor.probe_once()] == [
+            "primary",
+            "backup1",
+            "backup2",
+        ]
+        assert monitor.active is endpoints[0]
+        for _ in range(3):
+            clock[0] += 1.0
+            assert await monitor.probe_once() == []
+        assert len(published) == 1
+
+        primary.close()
+        await primary.wait_closed()
+        clock[0] += 1.0
+        assert await monitor.probe_once() == [endpoints[0]]
+        assert monitor.active is endpoints[1]
+
+        clock[0] += 10.0
+        await monitor.probe_once()
+        backup.close()
+        await backup.wait_closed()
+        clock[0] += 1.0
+        await monitor.probe_once()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert monitor.active is None
+    assert [(name, state) for name, state, _ in published] == [
+        ("ibkr", "up"),
+        ("ibkr", "up"),
+        ("ibkr", "up"),
+        ("ibkr", "down"),
+    ]
+    failover = published[1][2]
+    assert failover["active"] == "backup1" and failover["gateways"]["primary"]["up"] is False
+    assert "error" in published[-1][2]["gateways"]["backup2"]
+    assert metrics.get_counter("ibkr_failovers_total") == 2
+    histograms = metrics.export_state()["histograms"]
+    assert sum(histograms['ibkr_connect_ms{gateway="primary"}']["counts"]) == 4
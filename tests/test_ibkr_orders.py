@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from centrix.adapters.ibkr_async import AsyncIbkrClient, GatewayTransport
+from centrix.adapters.ibkr_orders import OrderRouter, RoutedOrder
+from centrix.adapters.ibkr_sim import LatencyModel, SimConfig, SimIbkrGateway
+from centrix.core.metrics import KPIStore
+from centrix.core.orders import OrderTransition
+from centrix.core.risk import RiskEngine
+from centrix.settings import AppSettings
+
+
+class OrderTransport:
+    """Acknowledges orders after a short delay, then reports fills as status events."""
+
+    def __init__(self) -> None:
+        self.inbox: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        self.connected = False
+        self.next_id = 100
+
+    async def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
+        self.connected = True
+        return True
+
+    async def close(self) -> None:
+        self.connected = False
+        self.inbox.put_nowait(None)
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def send(self, frame: dict[str, Any]) -> None:
+        if "id" in frame:
+            asyncio.get_running_loop().create_task(self._reply(frame))
+
+    async def _reply(self, frame: dict[str, Any]) -> None:
+        await asyncio.sleep(0.01)
+        args = frame["args"]
+        if frame["op"] == "cancel_order":
+            self.inbox.put_nowait({"id": frame["id"], "ok": True, "result": {}})
+            self.inbox.put_nowait(
+                {"event": "order_status", "order_id": args["order_id"], "status": "Cancelled"}
+            )
+            return
+        order = args["order"]
+        if order.get("qty", 0) <= 0:
+            self.inbox.put_nowait({"id": frame["id"], "ok": False, "code": 201, "message": "qty"})
+            return
+        self.next_id += 1
+        order_id = self.next_id
+        self.inbox.put_nowait(
+            {"id": frame["id"], "ok": True, "result": {"order_id": order_id, "status": "Submitted"}}
+        )
+        if order.get("type") == "LMT":
+            return
+        await asyncio.sleep(0.01)
+        half = order["qty"] / 2
+        for filled, status in ((half, "Submitted"), (order["qty"], "Filled")):
+            self.inbox.put_nowait(
+                {
+                    "event": "order_status",
+                    "order_id": order_id,
+                    "client_order_id": order["client_order_id"],
+                    "status": status,
+                    "filled": filled,
+                    "avg_price": 10.0,
+                }
+            )
+
+    async def recv(self) -> dict[str, Any]:
+        frame = await self.inbox.get()
+        if frame is None:
+            raise ConnectionError("closed")
+        return frame
+
+
+def test_router_tracks_orders_to_final_state() -> None:
+    metrics = KPIStore()
+    risk = RiskEngine(metrics=metrics)
+    published: list[list[OrderTransition]] = []
+    events: list[tuple[str, str]] = []
+
+    def record(kind: str) -> Any:
+        return lambda routed: events.append((kind, routed.client_order_id))
+
+    async def scenario() -> list[RoutedOrder]:
+        client = AsyncIbkrClient(
+            settings=AppSettings(ibkr_pacing_enabled=False),
+            transport=OrderTransport(),
+            metrics=metrics,
+        )
+        await client.connect()
+        router = OrderRouter(
+            client,
+            risk=risk,
+            publisher=published.append,
+            on_ack=record("ack"),
+            on_fill=record("fill"),
+            on_cancel=record("cancel"),
+            on_reject=record("reject"),
+            metrics=metrics,
+        )
+        market = [
+            router.submit({"symbol": "AAPL"}, {"qty": 4, "side": "BUY"}, book_id=idx)
+            for idx in range(1, 21)
+        ]
+        assert all(order.state == "submitted" for order in market)
+        limit = router.submit({"symbol": "MSFT"}, {"qty": 1, "type": "LMT"}, book_id=21)
+        bad = router.submit({"symbol": "MSFT"}, {"qty": 0}, book_id=22)
+
+        await asyncio.wait_for(asyncio.gather(*(order.done for order in market)), 2.0)
+        await router.cancel(limit.client_order_id)
+        assert limit.done is not None and bad.done is not None
+        await asyncio.wait_for(asyncio.gather(limit.done, bad.done), 2.0)
+        await router.close()
+        await client.close()
+        return [*market, limit, bad]
+
+    orders = asyncio.run(scenario())
+    market, limit, bad = orders[:20], orders[20], orders[21]
+    assert len({order.client_order_id for order in orders}) == 22
+    assert all(order.state == "filled" and order.filled == 4 for order in market)
+    assert limit.state == "cancelled" and bad.state == "rejected"
+    assert ("fill", market[0].client_order_id) in events
+    assert ("cancel", limit.client_order_id) in events
+    assert ("reject", bad.client_order_id) in events
+
+    transitions = [change for batch in published for change in batch]
+    assert len(published) < len(transitions)
+    statuses = {(change.order_id, change.status) for change in transitions}
+    assert (1, "SENT") in statuses and (1, "FILLED") in statuses
+    assert (21, "CANCELLED") in statuses and (22, "REJECTED") in statuses
+
+    assert risk.snapshot()["positions"]["AAPL"]["qty"] == 80
+    histograms = metrics.export_state()["histograms"]
+    assert sum(histograms["ibkr_order_ack_ms"]["counts"]) == 21
+    assert sum(histograms["ibkr_order_fill_ms"]["counts"]) == 20
+    assert sum(histograms["ibkr_order_total_ms"]["counts"]) == 20
+
+
+def test_timed_out_order_is_reconciled_not_rejected() -> None:
+    fast = LatencyModel("fixed", 0.0, 0.0)
+    gateway = SimIbkrGateway(
+        SimConfig(latency=fast, fill_latency=LatencyModel("fixed", 300.0, 0.0)),
+    )
+    metrics = KPIStore()
+    risk = RiskEngine(metrics=metrics)
+    published: list[list[OrderTransition]] = []
+
+    async def scenario() -> RoutedOrder:
+        client = AsyncIbkrClient(
+            settings=AppSettings(ibkr_req_timeout_ms=100),
+            transport=GatewayTransport(gateway),
+            metrics=metrics,
+        )
+        await client.connect()
+        router = OrderRouter(
+            client,
+            risk=risk,
+            publisher=published.append,
+            reconcile_interval=0.05,
+            metrics=metrics,
+        )
+        routed = router.submit({"symbol": "AAPL"}, {"qty": 10, "side": "BUY"}, book_id=1)
+        await asyncio.sleep(0.15)
+        assert routed.state in ("unknown", "acknowledged")
+        assert routed.done is not None
+        await asyncio.wait_for(routed.done, 3.0)
+        await router.close()
+        await client.close()
+        return routed
+
+    routed = asyncio.run(scenario())
+    assert routed.state == "filled" and routed.filled == 10
+    assert [change.status for batch in published for change in batch] == ["SENT", "FILLED"]
+    assert risk.snapshot()["positions"]["AAPL"]["qty"] == 10
+    assert metrics.get_counter("ibkr_order_unknown_total") == 1
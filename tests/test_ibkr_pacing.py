@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from centrix.adapters.ibkr_pacing import PacingLimits, PacingScheduler
+from centrix.core.metrics import KPIStore
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    async def __call__(self, op: str, args: dict[str, Any], timeout: float | None) -> Any:
+        self.calls.append((op, args))
+        await asyncio.sleep(0.001)
+        return {"op": op, **args}
+
+
+def test_orders_jump_the_queue_and_duplicates_coalesce() -> None:
+    metrics = KPIStore()
+
+    async def scenario() -> None:
+        pacer = PacingScheduler(PacingLimits(msgs_per_sec=100.0), metrics=metrics)
+        send = Recorder()
+        data = [
+            asyncio.create_task(pacer.submit("market_data", {"symbol": f"S{idx}"}, send))
+            for idx in range(110)
+        ]
+        dupes = [
+            asyncio.create_task(pacer.submit("market_data", {"symbol": "S105"}, send))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        order = await pacer.submit("order", {"symbol": "AAPL"}, send)
+        assert order["op"] == "order"
+        assert send.calls.index(("order", {"symbol": "AAPL"})) <= 101
+
+        results = await asyncio.gather(*data, *dupes)
+        assert {item["symbol"] for item in results[-5:]} == {"S105"}
+        assert len(send.calls) == 111
+        await pacer.close()
+
+    asyncio.run(scenario())
+    assert metrics.get_counter("ibkr_coalesced_total") == 5
+    assert metrics.get_counter("ibkr_paced_total") > 0
+
+
+def test_historical_pacing_windows() -> None:
+    now = [0.0]
+    metrics = KPIStore()
+    limits = PacingLimits(msgs_per_sec=1000.0, hist_contract_requests=2)
+
+    async def scenario() -> None:
+        pacer = PacingScheduler(limits, metrics=metrics, clock=lambda: now[0])
+        send = Recorder()
+        args = {"symbol": "ES", "bar_size": "1 min", "start": 0}
+        first = await pacer.submit("history", args, send)
+        assert await pacer.submit("history", dict(args), send) == first
+        assert len(send.calls) == 1
+
+        await pacer.submit("history", {**args, "bar_size": "5 mins"}, send)
+        blocked = asyncio.create_task(pacer.submit("history", {**args, "start": 2}, send))
+        other = await pacer.submit("history", {"symbol": "NQ", "bar_size": "1 min"}, send)
+        assert other["symbol"] == "NQ" and not blocked.done()
+        assert await pacer.submit("account", {}, send) == {"op": "account"}
+
+        now[0] = 1.0
+        pacer._wake.set()  # type: ignore[union-attr]
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        now[0] = 2.0
+        pacer._wake.set()  # type: ignore[union-attr]
+        assert (await asyncio.wait_for(blocked, 1.0))["start"] == 2
+
+        now[0] = 20.0
+        await pacer.submit("history", args, send)
+        assert len([call for call in send.calls if call[0] == "history"]) == 5
+
+        queued = asyncio.create_task(pacer.submit("history", {**args, "start": 9}, send))
+        await asyncio.sleep(0)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert pacer.queued == 0
+        await pacer.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from centrix.adapters.ibkr import IbkrClient
+from centrix.adapters.ibkr_portfolio import PortfolioCache, Position, bus_publisher
+from centrix.core.metrics import KPIStore
+from centrix.core.risk import RiskEngine
+from centrix.ipc.bus import Bus
+from centrix.settings import AppSettings
+from tests.fakes.fake_ibkr import FakeIbkrGateway
+
+
+class CountingGateway(FakeIbkrGateway):
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(time_provider=lambda: 0.0, **kwargs)
+        self.fetches = 0
+
+    def fetch_positions(self) -> list[dict[str, Any]]:
+        self.fetches += 1
+        return super().fetch_positions()
+
+
+class StreamingGateway(CountingGateway):
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.subscriptions = 0
+
+    def subscribe_portfolio(
+        self,
+        on_position: Callable[[dict[str, Any]], None],
+        on_account: Callable[[dict[str, Any]], None],
+    ) -> Callable[[], None]:
+        self.on_position = on_position
+        self.on_account = on_account
+        self.subscriptions += 1
+
+        def unsubscribe() -> None:
+            self.subscriptions -= 1
+
+        return unsubscribe
+
+
+def test_client_serves_account_and_positions_from_cache() -> None:
+    gateway = CountingGateway()
+    client = IbkrClient(settings=AppSettings(ibkr_enabled=True), gateway=gateway)
+    assert client.connect(retries=1) is True
+
+    for _ in range(20):
+        assert client.positions()[0] == {"symbol": "AAPL", "quantity": 10.0, "avg_price": 170.25}
+        assert client.account()["equity"] == 150_000.0
+    assert gateway.fetches == 1
+    assert client.portfolio.version == 1
+
+    stale = IbkrClient(
+        settings=AppSettings(ibkr_enabled=True, ibkr_portfolio_max_age_sec=0),
+        gateway=CountingGateway(),
+    )
+    stale.connect(retries=1)
+    stale.positions()
+    stale.positions()
+    assert stale._gateway.fetches == 2  # type: ignore[union-attr]
+    assert stale.portfolio.version == 1  # reloading identical data is not a change
+
+
+def test_gateway_callbacks_update_cache_incrementally() -> None:
+    gateway = StreamingGateway()
+    settings = AppSettings(ibkr_enabled=True, ibkr_portfolio_max_age_sec=0)
+    client = IbkrClient(settings=settings, gateway=gateway)
+    client.connect(retries=1)
+    seen: list[int] = []
+    client.portfolio.subscribe(lambda cache: seen.append(cache.version))
+
+    assert len(client.positions()) == 2
+    gateway.on_position({"symbol": "MSFT", "quantity": 0, "avg_price": 0})
+    gateway.on_position({"symbol": "ES", "quantity": -1, "avg_price": 5000.0})
+    gateway.on_position({"symbol": "ES", "quantity": -1, "avg_price": 5000.0})
+    gateway.on_account({"equity": 151_000.0, "cash": 125_000.0})
+
+    assert [item["symbol"] for item in client.positions()] == ["AAPL", "ES"]
+    assert client.account()["equity"] == 151_000.0
+    assert gateway.fetches == 1
+    assert seen == [1, 2, 3, 4]
+    assert client.portfolio.position("es") == Position("ES", -1.0, 5000.0)
+
+
+def test_cache_applies_async_event_frames() -> None:
+    cache = PortfolioCache(time_provider=lambda: 100.0)
+    cache.handle_frame({"event": "position", "symbol": "nq", "quantity": 2, "avg_price": 1.5})
+    cache.handle_frame({"event": "account", "values": {"cash": 10.0}})
+    cache.handle_frame({"event": "tick", "symbol": "NQ", "bid": 1.0})
+    snapshot = cache.snapshot()
+    assert snapshot["version"] == 2 and snapshot["updated_at"] == 100.0
+    assert snapshot["positions"] == [{"symbol": "NQ", "quantity": 2.0, "avg_price": 1.5}]
+    assert cache.changed_since(2) is False
+
+
+def test_positions_are_keyed_by_account_and_contract() -> None:
+    cache = PortfolioCache(time_provider=lambda: 0.0)
+    cache.load(
+        {"equity": 1.0},
+        [
+            {
+                "account": "U1",
+                "con_id": 265598,
+                "symbol": "AAPL",
+                "quantity": 10,
+                "currency": "USD",
+            },
+            {"account": "U2", "con_id": 265598, "symbol": "AAPL", "quantity": 4},
+            {"account": "U1", "conId": 495512552, "symbol": "ES", "quantity": -1, "multiplier": 50},
+            {"account": "U1", "conId": 551601561, "symbol": "ES", "quantity": 2, "multiplier": 50},
+        ],
+    )
+    assert len(cache.positions()) == 4
+    assert cache.position("aapl", account="U2") == Position(
+        "AAPL", 4.0, 0.0, account="U2", con_id=265598
+    )
+    first = cache.positions()[0]
+    assert first["currency"] == "USD" and first["account"] == "U1" and first["con_id"] == 265598
+
+    assert cache.apply_position({"account": "U1", "con_id": 495512552, "quantity": 0}) is True
+    assert [(p["account"], p["symbol"], p["quantity"]) for p in cache.positions()] == [
+        ("U1", "AAPL", 10.0),
+        ("U2", "AAPL", 4.0),
+        ("U1", "ES", 2.0),
+    ]
+
+
+def test_reconnect_replaces_portfolio_subscription() -> None:
+    gateway = StreamingGateway()
+    client = IbkrClient(settings=AppSettings(ibkr_enabled=True), gateway=gateway)
+    client.connect(retries=1)
+    stale_position = gateway.on_position
+    client.connect(retries=1)
+    assert gateway.subscriptions == 1
+
+    client.positions()
+    version = client.portfolio.version
+    stale_position({"symbol": "NQ", "quantity": 1, "avg_price": 1.0})
+    assert client.portfolio.version == version
+
+    client.disconnect()
+    assert gateway.subscriptions == 0
+    gateway.on_position({"symbol": "NQ", "quantity": 1, "avg_price": 1.0})
+    assert client.portfolio.version == version
+
+
+def test_cache_feeds_bus_snapshot_and_risk_engine(tmp_path) -> None:
+    bus = Bus(tmp_path / "bus.db")
+    cache = PortfolioCache(time_provider=lambda: 0.0)
+    cache.subscribe(bus_publisher(bus))
+    risk = RiskEngine(metrics=KPIStore())
+    risk.attach(cache)
+
+    cache.load({"equity": 50_000.0}, [{"symbol": "AAPL", "quantity": 10, "avg_price": 100.0}])
+    assert bus.get_portfolio()["positions"] == cache.snapshot()["positions"]
+    assert risk.snapshot()["equity"] == 50_000.0
+    cache.apply_position({"symbol": "AAPL", "quantity": 15, "avg_price": 100.0})
+    assert risk.snapshot()["positions"]["AAPL"]["qty"] == 15
+    assert bus.get_portfolio()["version"] == cache.version == 2
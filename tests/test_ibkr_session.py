@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any
+
+from centrix.adapters.ibkr_async import Frame, GatewayTransport, JsonLineTransport
+from centrix.adapters.ibkr_session import IbkrSession, parse_symbols, session_transport
+from centrix.adapters.ibkr_sim import LatencyModel, SimConfig, SimIbkrGateway
+from centrix.core.metrics import KPIStore
+from centrix.core.risk import RiskEngine, RiskLimits
+from centrix.ipc.bus import Bus
+from centrix.settings import AppSettings
+
+
+class RecordingTransport(GatewayTransport):
+    """Log sent ``order`` frames; ``crash`` loses order replies as if the process died."""
+
+    def __init__(self, gateway: SimIbkrGateway, sent: list[Frame], crash: bool = False) -> None:
+        super().__init__(gateway, poll_interval=0.01)
+        self._sent = sent
+        self._crash = crash
+        self.delivered = asyncio.Event()
+
+    async def send(self, frame: Frame) -> None:
+        if frame.get("op") == "order":
+            self._sent.append(frame)
+        await super().send(frame)
+
+    async def _run(self, frame: Frame) -> None:
+        if self._crash and frame["op"] == "order":
+            await asyncio.to_thread(self._call, frame["op"], frame["args"])
+            self.delivered.set()
+            return
+        if self._crash and frame["op"] == "order_status":
+            return
+        await super()._run(frame)
+
+
+def test_session_routes_approved_orders_and_publishes_portfolio(tmp_path: Path) -> None:
+    fast = LatencyModel("fixed", 0.0, 0.0)
+    gateway = SimIbkrGateway(SimConfig(latency=fast, fill_latency=fast))
+    bus = Bus(tmp_path / "bus.db")
+    approved, pending = bus.insert_orders(
+        [{"symbol": "AAPL", "qty": 3, "px": 0}, {"symbol": "MSFT", "qty": 1, "px": 0}]
+    )
+    bus.transition_orders(
+        [{"id": approved["id"], "status": "APPROVED", "allowed_from": ("NEW",), "fields": {}}]
+    )
+    quotes: list[list[dict[str, Any]]] = []
+
+    async def scenario() -> IbkrSession:
+        session = IbkrSession(
+            AppSettings(ibkr_pacing_enabled=False),
+            transport=GatewayTransport(gateway, poll_interval=0.01),
+            bus=bus,
+            symbols=parse_symbols("aapl, AAPL,"),
+            quote_publisher=quotes.append,
+            metrics=KPIStore(),
+        )
+        await session.start()
+        assert session.supervisor.state == "connected"
+        assert session.market_data.active == ["AAPL"]
+        assert await session.route_approved() == 1
+        assert await session.route_approved() == 0
+        for _ in range(200):
+            if bus.get_order(approved["id"])["status"] == "FILLED":
+                break
+            await asyncio.sleep(0.01)
+        await session.stop()
+        return session
+
+    session = asyncio.run(scenario())
+    assert bus.get_order(approved["id"])["status"] == "FILLED"
+    assert bus.get_order(pending["id"])["status"] == "NEW"
+    snapshot = bus.get_portfolio()
+    assert snapshot is not None and snapshot["version"] == session.portfolio.version
+    assert snapshot["account"]["equity"] > 0
+
+
+def test_session_rechecks_approved_orders_against_live_risk(tmp_path: Path) -> None:
+    fast = LatencyModel("fixed", 0.0, 0.0)
+    gateway = SimIbkrGateway(SimConfig(latency=fast, fill_latency=fast))
+    bus = Bus(tmp_path / "bus.db")
+    (record,) = bus.insert_orders([{"symbol": "AAPL", "qty": 500, "px": 0}])
+    bus.transition_orders(
+        [{"id": record["id"], "status": "APPROVED", "allowed_from": ("NEW",), "fields": {}}]
+    )
+    risk = RiskEngine(RiskLimits(max_order_qty=100), metrics=KPIStore())
+
+    async def scenario() -> None:
+        session = IbkrSession(
+            AppSettings(ibkr_pacing_enabled=False),
+            transport=GatewayTransport(gateway),
+            bus=bus,
+            risk=risk,
+            quote_publisher=None,
+            metrics=KPIStore(),
+        )
+        await session.start()
+        assert risk.snapshot()["equity"] == session.portfolio.account()["equity"]
+        assert await session.route_approved() == 0
+        await session.stop()
+
+    asyncio.run(scenario())
+    order = bus.get_order(record["id"])
+    assert order["status"] == "REJECTED"
+    assert order["data"]["reason"] == "risk: order qty limit"
+
+
+def test_restarted_session_reconciles_claimed_orders_without_resending(tmp_path: Path) -> None:
+    fast = LatencyModel("fixed", 0.0, 0.0)
+    gateway = SimIbkrGateway(SimConfig(latency=fast, fill_latency=fast))
+    bus = Bus(tmp_path / "bus.db")
+    (record,) = bus.insert_orders([{"symbol": "AAPL", "qty": 2, "px": 0}])
+    bus.transition_orders(
+        [{"id": record["id"], "status": "APPROVED", "allowed_from": ("NEW",), "fields": {}}]
+    )
+    sent: list[Frame] = []
+
+    def session(transport: RecordingTransport) -> IbkrSession:
+        return IbkrSession(
+            AppSettings(ibkr_pacing_enabled=False),
+            transport=transport,
+            bus=bus,
+            quote_publisher=None,
+            metrics=KPIStore(),
+        )
+
+    async def crashed() -> None:
+        transport = RecordingTransport(gateway, sent, crash=True)
+        first = session(transport)
+        await first.start()
+        assert await first.route_approved() == 1
+        await asyncio.wait_for(transport.delivered.wait(), timeout=2.0)
+        await first.stop()
+
+    async def restarted() -> None:
+        second = session(RecordingTransport(gateway, sent))
+        await second.start()
+        assert await second.route_approved() == 0
+        for _ in range(200):
+            if bus.get_order(record["id"])["status"] == "FILLED":
+                break
+            await asyncio.sleep(0.01)
+        await second.stop()
+
+    asyncio.run(crashed())
+    assert bus.get_order(record["id"])["status"] == "ROUTING"
+    asyncio.run(restarted())
+    order = bus.get_order(record["id"])
+    assert order["status"] == "FILLED"
+    assert len(sent) == 1
+    assert order["data"]["client_order_id"] == sent[0]["args"]["order"]["client_order_id"]
+
+
+def test_session_transport_must_be_named() -> None:
+    assert session_transport("") is None
+    assert session_transport("tws") is None
+    assert isinstance(session_transport(" JSONL "), JsonLineTransport)
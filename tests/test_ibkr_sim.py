@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import random
+
+import pytest
+
+from centrix.adapters.ibkr import IbkrClient
+from centrix.adapters.ibkr_async import AsyncIbkrClient, IbkrRequestError, JsonLineTransport
+from centrix.adapters.ibkr_marketdata import MarketDataManager
+from centrix.adapters.ibkr_orders import OrderRouter
+from centrix.adapters.ibkr_sim import (
+    CODE_PACING,
+    LatencyModel,
+    SimConfig,
+    SimGatewayError,
+    SimGatewayServer,
+    SimIbkrGateway,
+)
+from centrix.core.metrics import KPIStore
+from centrix.settings import AppSettings
+
+FAST = LatencyModel("fixed", 0.0, 0.0)
+
+
+def test_latency_models_are_seeded_and_bounded() -> None:
+    model = LatencyModel("lognormal", 10.0, 5.0)
+    first = [model.sample(random.Random(1)) for _ in range(3)]
+    assert first == [model.sample(random.Random(1)) for _ in range(3)]
+    samples = [model.sample(random.Random(seed)) for seed in range(500)]
+    assert all(value >= 0 for value in samples)
+    assert 0.008 < sum(samples) / len(samples) < 0.012
+    assert LatencyModel.parse(3).sample(random.Random()) == 0.003
+    with pytest.raises(ValueError):
+        SimConfig.from_mapping({"bogus": 1})
+
+
+def test_blocking_sim_gateway_drives_the_adapter() -> None:
+    clock = [1_000.0]
+    config = SimConfig(latency=FAST, fill_latency=FAST, max_msgs_per_sec=5, fill_model="partial")
+    gateway = SimIbkrGateway(config, sleep=lambda _: None, clock=lambda: clock[0])
+    client = IbkrClient(
+        settings=AppSettings(ibkr_enabled=True, ibkr_portfolio_max_age_sec=0.0),
+        gateway=gateway,
+        metrics=KPIStore(),
+        time_provider=lambda: clock[0],
+    )
+    assert client.connect(retries=1)
+    try:
+        quote = client.watch("AAPL")
+        assert quote["bid"] < quote["ask"]
+        result = client.send_order({"symbol": "AAPL"}, {"qty": 8, "side": "BUY"})
+        assert result["status"] == "Submitted" and result["filled"] == 2
+        clock[0] += 1.0
+        for _ in range(3):
+            gateway.broker.quote("AAPL")
+        assert gateway.broker.order_status(result["order_id"])["status"] == "Filled"
+        assert client.positions()[0]["quantity"] == 8
+        with pytest.raises(SimGatewayError) as excinfo:
+            for _ in range(10):
+                client.watch("MSFT")
+        assert excinfo.value.code == CODE_PACING
+    finally:
+        client.disconnect()
+
+
+def test_sim_server_speaks_the_async_protocol() -> None:
+    config = SimConfig(
+        latency=LatencyModel("uniform", 2.0, 1.0),
+        fill_latency=FAST,
+        tick_rates={"AAPL": 200.0},
+        max_msgs_per_sec=1_000,
+    )
+
+    async def scenario() -> None:
+        server = SimGatewayServer(config)
+        port = await server.start()
+        settings = AppSettings(tws_host="127.0.0.1", tws_port=port, ibkr_pacing_enabled=False)
+        transport = JsonLineTransport()
+        client = AsyncIbkrClient(settings=settings, transport=transport, metrics=KPIStore())
+        try:
+            assert await client.connect()
+            assert (await client.account())["cash"] == 1_000_000.0
+            bars = await client.history("SPY", "1 hour", 0.0, 36_000.0)
+            assert len(bars) == 10
+
+            market = MarketDataManager(client)
+            ticks: list[dict[str, object]] = []
+            await market.subscribe("AAPL", ticks.append)
+            quote = await market.watch("AAPL", timeout=2.0)
+            assert quote["bid"] is not None
+
+            router = OrderRouter(client, publisher=lambda batch: None, metrics=KPIStore())
+            orders = [router.submit({"symbol": "AAPL"}, {"qty": 5}) for _ in range(10)]
+            await asyncio.wait_for(asyncio.gather(*(order.done for order in orders)), 5.0)
+            assert all(order.state == "filled" and order.filled == 5 for order in orders)
+            assert len(ticks) > 1
+
+            with pytest.raises(IbkrRequestError):
+                await client.request("bogus")
+            await router.close()
+            await market.close()
+        finally:
+            await client.close()
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_sim_server_drops_connections() -> None:
+    config = SimConfig(latency=FAST, disconnect_every_sec=0.02, seed=3)
+
+    async def scenario() -> list[dict[str, object]]:
+        server = SimGatewayServer(config)
+        port = await server.start()
+        settings = AppSettings(tws_host="127.0.0.1", tws_port=port, ibkr_pacing_enabled=False)
+        transport = JsonLineTransport()
+        client = AsyncIbkrClient(settings=settings, transport=transport, metrics=KPIStore())
+        frames: list[dict[str, object]] = []
+        client.add_event_handler(frames.append)
+        await client.connect()
+        for _ in range(100):
+            if any(frame.get("event") == "disconnected" for frame in frames):
+                break
+            await asyncio.sleep(0.01)
+        await client.close()
+        await server.close()
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert {"code": 1100, "message": "Connectivity lost"} in frames
+    assert any(frame.get("event") == "disconnected" for frame in frames)
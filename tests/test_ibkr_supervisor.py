@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from centrix.adapters.ibkr import backoff_delay
+from centrix.adapters.ibkr_async import AsyncIbkrClient
+from centrix.adapters.ibkr_marketdata import MarketDataManager
+from centrix.adapters.ibkr_supervisor import ReconnectSupervisor
+from centrix.core.metrics import KPIStore
+from centrix.settings import AppSettings
+
+
+class FlakyTransport:
+    """Transport that can be dropped, refuse connections and stop answering heartbeats."""
+
+    def __init__(self) -> None:
+        self.refuse = 0
+        self.mute_health = False
+        self.connects = 0
+        self.ops: list[tuple[str, Any]] = []
+        self.inbox: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        self.connected = False
+
+    async def connect(self, host: str, port: int, client_id: int, timeout_ms: int) -> bool:
+        self.connects += 1
+        if self.refuse:
+            self.refuse -= 1
+            raise ConnectionRefusedError("gateway restarting")
+        self.inbox = asyncio.Queue()
+        self.connected = True
+        return True
+
+    async def close(self) -> None:
+        self.connected = False
+        self.inbox.put_nowait(None)
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def drop(self) -> None:
+        self.inbox.put_nowait(None)
+
+    def push(self, frame: dict[str, Any]) -> None:
+        self.inbox.put_nowait(frame)
+
+    async def send(self, frame: dict[str, Any]) -> None:
+        if "id" not in frame:
+            return
+        args = frame["args"]
+        self.ops.append((frame["op"], args.get("symbol", args.get("order_id"))))
+        if frame["op"] == "health" and self.mute_health:
+            return
+        self.inbox.put_nowait({"id": frame["id"], "ok": True, "result": {}})
+
+    async def recv(self) -> dict[str, Any]:
+        frame = await self.inbox.get()
+        if frame is None:
+            raise ConnectionError("dropped")
+        return frame
+
+
+def test_backoff_delay_is_jittered_and_capped() -> None:
+    assert backoff_delay(1, 0.5, rng=lambda: 0.0) == 0.25
+    assert backoff_delay(3, 0.5, rng=lambda: 1.0) == 2.0
+    assert backoff_delay(20, 0.5, 30.0, rng=lambda: 1.0) == 30.0
+
+
+def test_supervisor_reconnects_and_replays_session() -> None:
+    metrics = KPIStore()
+    delays: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        delays.append(delay)
+        await asyncio.sleep(0)
+
+    async def scenario() -> None:
+        transport = FlakyTransport()
+        settings = AppSettings(ibkr_pacing_enabled=False)
+        client = AsyncIbkrClient(settings=settings, transport=transport, metrics=metrics)
+        await client.connect()
+        market_data = MarketDataManager(client, metrics=metrics)
+        await market_data.subscribe("AAPL")
+        supervisor = ReconnectSupervisor(
+            client,
+            market_data=market_data,
+            heartbeat_sec=0.05,
+            heartbeat_timeout=0.02,
+            base_delay=1.0,
+            metrics=metrics,
+            rng=lambda: 1.0,
+            sleep=fake_sleep,
+        )
+        replays: list[int] = []
+
+        async def hook() -> None:
+            replays.append(supervisor.reconnects)
+
+        supervisor.add_replay(hook)
+        supervisor.track_order(42)
+        supervisor.start()
+
+        transport.refuse = 2
+        transport.drop()
+        for _ in range(100):
+            if supervisor.reconnects:
+                break
+            await asyncio.sleep(0.01)
+        assert supervisor.state == "connected" and client.is_connected()
+        assert delays == [1.0, 2.0]
+        assert transport.connects == 4
+        assert ("subscribe_md", "AAPL") in transport.ops[1:]
+        assert ("order_status", 42) in transport.ops
+        assert replays == [1]
+
+        transport.push({"code": 1100, "message": "lost"})
+        await asyncio.sleep(0.01)
+        assert supervisor.state == "degraded"
+        transport.push({"code": 1101, "message": "restored, data lost"})
+        await asyncio.sleep(0.01)
+        assert supervisor.state == "connected" and replays == [1, 1]
+
+        transport.mute_health = True
+        for _ in range(100):
+            if supervisor.reconnects == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert supervisor.reconnects == 2
+        await supervisor.stop()
+        await client.close()
+
+    asyncio.run(scenario())
+    assert metrics.get_counter("ibkr_reconnects_total") == 2
+    assert metrics.get_counter("ibkr_heartbeat_failures_total") >= 1
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import threading
+import time
 from pathlib import Path
+from typing import Any
 
 from centrix.core.locks import acquire, list_locks, reap, release
 from centrix.core.logging import ensure_runtime_dirs
+from centrix.core.metrics import METRICS
 from centrix.ipc.bus import Bus
 from centrix.ipc.migrate import epoch_ms
 from centrix.settings import get_settings
+from centrix.shared.locks import LockManager
 
 
 def test_lock_lifecycle(tmp_path, monkeypatch) -> None:
@@ -44,3 +49,82 @@ def test_lock_reap(tmp_path, monkeypatch) -> None:
 
     lock_path = Path("runtime/locks/beta.lock")
     assert lock_path.exists() is False
+
+
+def test_lock_store_shared_between_managers(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    clock = {"now": 1_000.0}
+    first = LockManager(time_fn=lambda: clock["now"])
+    second = LockManager(time_fn=lambda: clock["now"])
+
+    lease = first.acquire("gamma", owner="a", ttl=1)
+    assert lease is not None
+    assert second.acquire("gamma", owner="b", ttl=1) is None
+    assert second.owner("gamma")["owner"] == "a"
+
+    clock["now"] += 2
+    taken = second.acquire("gamma", owner="b", ttl=1)
+    assert taken is not None
+    assert taken.token > lease.token
+    assert first.release("gamma", lease.token) is False
+    assert first.renew(lease, 5) is False
+    assert second.release("gamma", taken.token) is True
+
+
+def test_lock_reap_batches_and_metrics(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    METRICS.reset()
+    clock = {"now": 1_000.0}
+    manager = LockManager(reap_batch=2, time_fn=lambda: clock["now"])
+    other = LockManager(time_fn=lambda: clock["now"])
+
+    for idx in range(5):
+        assert other.acquire(f"stale-{idx}", owner="gone", ttl=1) is not None
+    lease = manager.acquire("ctl", owner="cli", ttl=30, action="svc.start")
+    assert lease is not None
+    assert other.acquire("ctl", owner="dash", ttl=30, wait=0.01) is None
+
+    clock["now"] += 2
+    assert manager.reap() == 5
+    assert [entry["name"] for entry in manager.leases()] == ["ctl"]
+
+    clock["now"] += 1.5
+    assert manager.release("ctl", lease.token) is True
+    state = METRICS.export_state()
+    assert state["counters"]["locks_reaped_total"] == 5
+    assert state["counters"]["lock_contention_total"] == 1
+    assert state["counters"]["lock_timeouts_total"] == 1
+    assert state["histograms"]["lock_wait_ms"]["counts"]
+    hold = state["histograms"]['lock_hold_ms{action="svc.start"}']
+    assert sum(hold["counts"]) == 1
+    assert hold["sum"] == 3500.0
+
+
+def test_database_claim_runs_outside_the_manager_condition(tmp_path) -> None:
+    manager = LockManager(str(tmp_path / "ctl.db"))
+    bus = manager._bus()
+    entered, proceed = threading.Event(), threading.Event()
+    claim = bus.claim_lock
+
+    def slow_claim(name: str, *args: Any) -> Any:
+        if name == "slow":
+            entered.set()
+            proceed.wait(timeout=2.0)
+        return claim(name, *args)
+
+    bus.claim_lock = slow_claim  # type: ignore[method-assign]
+    worker = threading.Thread(target=manager.acquire, args=("slow",), kwargs={"owner": "a"})
+    worker.start()
+    try:
+        assert entered.wait(timeout=2.0)
+        # Another lock is granted while the first claim is still inside SQLite.
+        started = time.monotonic()
+        lease = manager.acquire("fast", owner="b")
+        assert lease is not None and time.monotonic() - started < 1.0
+        assert manager.waiting("slow") == 1
+    finally:
+        proceed.set()
+        worker.join(timeout=2.0)
+    assert manager.owner("slow")["owner"] == "a"
@@ -1,7 +1,18 @@
 from __future__ import annotations
 
+import threading
+import time
+
+import pytest
+
 from centrix.core.logging import ensure_runtime_dirs
-from centrix.shared.locks import acquire_lock, list_lock_files, reaper_sweep
+from centrix.shared.locks import (
+    LockBusyError,
+    LockManager,
+    acquire_lock,
+    list_lock_files,
+    reaper_sweep,
+)
 
 
 def test_lock_reaper_removes_expired(tmp_path, monkeypatch) -> None:
@@ -16,3 +27,53 @@ def test_lock_reaper_removes_expired(tmp_path, monkeypatch) -> None:
     removed = reaper_sweep(expires_at + 1)
     assert removed == 1
     assert not list_lock_files(expires_at + 1)
+
+
+def test_lock_manager_waits_fifo_and_fences(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    ensure_runtime_dirs()
+    manager = LockManager()
+
+    first = manager.acquire("ctl", owner="a", ttl=5)
+    assert first is not None
+    assert manager.acquire("ctl", owner="b", ttl=5) is None
+
+    order: list[str] = []
+    tokens: list[int] = []
+
+    def worker(owner: str) -> None:
+        lease = manager.acquire("ctl", owner=owner, ttl=5, wait=5.0)
+        assert lease is not None
+        order.append(owner)
+        tokens.append(lease.token)
+        manager.release("ctl", lease.token)
+
+    threads = []
+    for owner in ("b", "c"):
+        thread = threading.Thread(target=worker, args=(owner,))
+        thread.start()
+        threads.append(thread)
+        while manager.waiting("ctl") < len(threads):
+            time.sleep(0.001)
+
+    assert manager.release("ctl", first.token + 1) is False
+    assert manager.release("ctl", first.token) is True
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["b", "c"]
+    assert first.token < tokens[0] < tokens[1]
+    assert manager.owner("ctl") is None
+
+
+def test_lock_manager_hold_raises_when_busy(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    ensure_runtime_dirs()
+    manager = LockManager()
+
+    with manager.hold("ctl", owner="a", ttl=5):
+        with pytest.raises(LockBusyError) as excinfo:
+            with manager.hold("ctl", owner="b", ttl=5, wait=0.05):
+                pass
+        assert excinfo.value.holder["owner"] == "a"
+    assert manager.acquire("ctl", owner="b", ttl=5) is not None
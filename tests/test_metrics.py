@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import json
+import os
+
 import pytest
 
-from centrix.core.metrics import METRICS, snapshot_kpis
+from centrix.core.metrics import METRICS, KPIStore, aggregate_kpis, read_spool, snapshot_kpis
 
 
 def test_metrics_sliding_window(monkeypatch) -> None:
@@ -57,3 +60,58 @@ def test_metrics_ibkr_latency_and_counters() -> None:
     assert snapshot["ibkr_latency_ms_median"] == pytest.approx(20.0)
     assert snapshot["counters"]["ibkr_errors_total"] == 2
     assert snapshot["counters"]["ibkr_pacing_violations_total"] == 1
+
+
+def test_metrics_spool_aggregates_across_processes(tmp_path) -> None:
+    METRICS.reset()
+    METRICS.increment_counter("control.actions_total", 2)
+
+    worker = KPIStore()
+    worker.update_queue_depth(7)
+    worker.update_open_approvals(2)
+    worker.increment_counter("control.actions_total", 3)
+    state = worker.export_state()
+    state["component"] = "worker"
+    state["pid"] = os.getpid() + 1
+    (tmp_path / "worker.json").write_text(json.dumps(state), encoding="utf-8")
+
+    snapshot = aggregate_kpis(directory=tmp_path)
+    assert snapshot["queue_depth"] == 7
+    assert snapshot["open_approvals"] == 2
+    assert snapshot["counters"]["control.actions_total"] == 5
+    assert snapshot["components"] == ["worker"]
+
+    state["ts"] -= 120
+    (tmp_path / "worker.json").write_text(json.dumps(state), encoding="utf-8")
+    assert aggregate_kpis(directory=tmp_path)["queue_depth"] == 0
+
+
+def test_metrics_publish_skips_own_spool(tmp_path) -> None:
+    METRICS.reset()
+    METRICS.update_queue_depth(4)
+    path = METRICS.publish("worker", directory=tmp_path)
+    assert path.exists()
+    assert read_spool(directory=tmp_path) == {}
+    assert path.stem in read_spool(directory=tmp_path, include_self=True)
+    assert aggregate_kpis(directory=tmp_path)["queue_depth"] == 4
+
+
+def test_metrics_retain_survives_the_process(tmp_path) -> None:
+    cli = KPIStore()
+    cli.record_lock_hold(120.0, "svc.start")
+    cli.increment_counter("control.actions_total")
+    path = cli.retain("cli", directory=tmp_path)
+    assert cli.export_state()["histograms"] == {}
+
+    cli.record_lock_hold(80.0, "svc.start")
+    cli.retain("cli", directory=tmp_path)
+    state = json.loads(path.read_text(encoding="utf-8"))
+    state["ts"] -= 3_600
+    path.write_text(json.dumps(state), encoding="utf-8")
+
+    spool = read_spool(directory=tmp_path)
+    assert list(spool) == ["cli.retained"]
+    hold = spool["cli.retained"]["histograms"]['lock_hold_ms{action="svc.start"}']
+    assert sum(hold["counts"]) == 2 and hold["sum"] == 200.0
+    assert spool["cli.retained"]["counters"]["control.actions_total"] == 1
+    assert path.exists()
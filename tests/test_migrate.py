@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from centrix.ipc import migrate
+
+
+def _version_one(path: Path) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.executescript(migrate.SCHEMA_FILE.read_text(encoding="utf-8"))
+
+
+def test_concurrent_migrations_apply_each_step_once(tmp_path: Path) -> None:
+    path = tmp_path / "ctl.db"
+    _version_one(path)
+    barrier = threading.Barrier(4)
+    errors: list[BaseException] = []
+
+    def upgrade() -> None:
+        conn = sqlite3.connect(path, timeout=10)
+        try:
+            barrier.wait()
+            migrate._apply_migrations(conn)
+        except BaseException as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=upgrade) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT version FROM meta").fetchall() == [(migrate.SCHEMA_VERSION,)]
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(locks)")]
+    assert columns.count("token") == 1
+
+
+def test_failed_migration_rolls_back_with_its_version(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "ctl.db"
+    _version_one(path)
+    broken = (
+        migrate.SCHEMA_VERSION + 1,
+        """
+        CREATE TABLE extra(id INTEGER PRIMARY KEY); -- a comment; with a semicolon
+        INSERT INTO missing_table VALUES (1);
+        """,
+    )
+    monkeypatch.setattr(migrate, "MIGRATIONS", (*migrate.MIGRATIONS, broken))
+    monkeypatch.setattr(migrate, "SCHEMA_VERSION", broken[0])
+
+    conn = sqlite3.connect(path)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            migrate._apply_migrations(conn)
+        assert conn.execute("SELECT version FROM meta").fetchone() == (broken[0] - 1,)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    finally:
+        conn.close()
+    assert "extra" not in tables and "orders" in tables
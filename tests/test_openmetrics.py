@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from centrix.core import openmetrics
+from centrix.core.metrics import KPIStore
+
+
+def test_render_counters_gauges_and_histograms() -> None:
+    store = KPIStore()
+    store.increment_counter("control.actions_total", 3)
+    store.update_queue_depth(4)
+    store.observe("lock_hold_ms", 3.0)
+    store.observe("lock_hold_ms", 40.0)
+
+    text = openmetrics.render({"worker": store.export_state()})
+    lines = text.splitlines()
+
+    assert lines[-1] == "# EOF"
+    assert "# TYPE centrix_control_actions counter" in lines
+    assert 'centrix_control_actions_total{component="worker"} 3' in lines
+    assert "# TYPE centrix_queue_depth gauge" in lines
+    assert 'centrix_queue_depth{component="worker"} 4' in lines
+    assert "# TYPE centrix_lock_hold_ms histogram" in lines
+    assert 'centrix_lock_hold_ms_bucket{component="worker",le="5"} 1' in lines
+    assert 'centrix_lock_hold_ms_bucket{component="worker",le="+Inf"} 2' in lines
+    assert 'centrix_lock_hold_ms_count{component="worker"} 2' in lines
+    assert 'centrix_lock_hold_ms_sum{component="worker"} 43' in lines
+
+
+def test_render_groups_components_under_one_family() -> None:
+    first = KPIStore()
+    second = KPIStore()
+    first.update_queue_depth(1)
+    second.update_queue_depth(2)
+
+    text = openmetrics.render({"worker": first.export_state(), "slack": second.export_state()})
+    lines = text.splitlines()
+
+    assert lines.count("# TYPE centrix_queue_depth gauge") == 1
+    start = lines.index("# TYPE centrix_queue_depth gauge")
+    assert lines[start + 1 : start + 3] == [
+        'centrix_queue_depth{component="slack"} 2',
+        'centrix_queue_depth{component="worker"} 1',
+    ]
+
+
+def test_render_labelled_series_share_one_family() -> None:
+    store = KPIStore()
+    store.record_lock_hold(3.0, "svc.start")
+    store.record_lock_hold(40.0, "svc.stop")
+    store.observe("ibkr_connect_ms", 12.0, labels={"gateway": "primary"})
+
+    lines = openmetrics.render({"cli": store.export_state()}).splitlines()
+
+    assert lines.count("# TYPE centrix_lock_hold_ms histogram") == 1
+    assert not any("lock_hold_ms_svc" in line for line in lines)
+    assert 'centrix_lock_hold_ms_count{component="cli",action="svc.start"} 1' in lines
+    assert 'centrix_lock_hold_ms_sum{component="cli",action="svc.stop"} 40' in lines
+    assert (
+        'centrix_lock_hold_ms_bucket{component="cli",action="svc.start",le="5"} 1' in lines
+    )
+    assert 'centrix_ibkr_connect_ms_count{component="cli",gateway="primary"} 1' in lines
@@ -50,3 +50,75 @@ def test_reject(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     assert ok is False
     ok, _msg = approvals.reject(order_id=order_id, approver="U_CONF")
     assert ok is True
+
+
+def test_approval_metadata_columns(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _reset_env(tmp_path, monkeypatch)
+    approvals = importlib.import_module("centrix.core.approvals")
+    from centrix.ipc.bus import Bus
+    from centrix.settings import get_settings
+
+    bus = Bus(get_settings().ipc_db)
+    first = bus.enqueue("order.submit", {"symbol": "DEMO"})
+    second = bus.enqueue("order.submit", {"symbol": "DEMO"})
+    token = approvals.request_approval(order_id=first, initiator="U_INIT", ttl_s=5)
+    approvals.request_approval(order_id=second, initiator="U_INIT", ttl_s=5)
+
+    assert approvals.confirm(order_id=first, approver="U_CONF", token="WRONG") == (
+        False,
+        "invalid token",
+    )
+    assert approvals.confirm(order_id=first, approver="U_CONF", token=token)[0] is True
+    assert approvals.reject(order_id=second, approver="U_CONF", reason="too big")[0] is True
+    assert approvals.reject(order_id=second, approver="U_OTHER")[0] is False
+
+    approved = approvals.approval_metadata(first)
+    assert approved is not None
+    assert approved["status"] == "APPROVED"
+    assert approved["initiator"] == "U_INIT"
+    assert approved["approver"] == "U_CONF"
+    rejected = approvals.approval_metadata(second)
+    assert rejected is not None
+    assert rejected["status"] == "REJECTED"
+    assert rejected["reason"] == "too big"
+    assert bus.get_kv(f"approval:order:{first}") is None
+
+
+def test_approval_outcomes_move_orders(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _reset_env(tmp_path, monkeypatch)
+    approvals = importlib.import_module("centrix.core.approvals")
+    from centrix.core.orders import OrderBook
+    from centrix.ipc.bus import Bus
+    from centrix.ipc.migrate import epoch_ms
+    from centrix.services.confirm_worker import ExpiryScheduler
+    from centrix.settings import get_settings
+
+    bus = Bus(get_settings().ipc_db)
+    book = OrderBook(get_settings().ipc_db)
+    ids = [bus.enqueue("order.submit", {"symbol": "DEMO"}) for _ in range(3)]
+    book.add([{"symbol": "DEMO", "qty": 1, "command_id": command_id} for command_id in ids])
+    lapsed, approved, rejected = ids
+    token = approvals.request_approval(order_id=lapsed, initiator="U_INIT", ttl_s=0)
+    assert {row["status"] for row in book.open_orders()} == {"NEW", "PENDING_APPROVAL"}
+
+    # Confirming a lapsed token expires the approval and its order together.
+    assert approvals.confirm(order_id=lapsed, approver="U_CONF", token=token) == (
+        False,
+        "token expired or already used",
+    )
+    scheduler = ExpiryScheduler(bus)
+    scheduler.sync()
+    assert scheduler.expire_due(epoch_ms()) == []
+
+    token = approvals.request_approval(order_id=approved, initiator="U_INIT", ttl_s=5)
+    approvals.request_approval(order_id=rejected, initiator="U_INIT", ttl_s=5)
+    assert approvals.confirm(order_id=approved, approver="U_CONF", token=token)[0] is True
+    assert approvals.reject(order_id=rejected, approver="U_CONF", reason="too big")[0] is True
+
+    assert [row["command_id"] for row in book.open_orders()] == [approved]
+    by_command = {row["command_id"]: row for row in book.list()}
+    assert by_command[lapsed]["status"] == "EXPIRED"
+    assert by_command[approved]["status"] == "APPROVED"
+    assert by_command[approved]["approver"] == "U_CONF"
+    assert by_command[rejected]["status"] == "REJECTED"
+    assert by_command[rejected]["reason"] == "too big"
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from centrix import cli
+from centrix.core.order_import import detect_format, parse_text, submit_rows, validate_order
+from centrix.core.orders import OrderBook
+from centrix.settings import get_settings
+
+
+@pytest.fixture(autouse=True)
+def _runtime(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    yield
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+def test_parse_and_validate_rows() -> None:
+    assert detect_format("basket.CSV") == "csv"
+    assert detect_format("basket.txt", "ndjson") == "jsonl"
+    with pytest.raises(ValueError):
+        detect_format("basket.xlsx")
+
+    jsonl = '{"symbol":"aapl","qty":5,"px":1.5}\nnot json\n\n[1]\n{"symbol":"MSFT","qty":0}\n'
+    rows = list(parse_text(jsonl, "jsonl"))
+    assert len(rows) == 4
+
+    results = list(submit_rows(rows, source="test", initiator="alice", batch_size=2))
+    assert [item["row"] for item in results] == [1, 2, 3, 4]
+    assert [item["ok"] for item in results] == [True, False, False, False]
+    assert results[0]["symbol"] == "AAPL"
+    assert results[1]["error"] == "invalid json"
+    assert results[3]["error"] == "qty must be positive"
+    assert validate_order({"symbol": "A", "qty": "2.0"})[0] == {"symbol": "A", "qty": 2, "px": 0.0}
+    assert validate_order({"symbol": "A", "qty": "1.9"}) == (None, "qty must be a whole number")
+    assert validate_order({"symbol": "A", "qty": 0.5}) == (None, "qty must be a whole number")
+
+
+def test_submit_rows_batches_orders_with_approvals() -> None:
+    header = "Symbol,Qty,Px,Side\n"
+    body = "".join(f"S{idx},{idx + 1},{idx}.5,BUY\n" for idx in range(7))
+    rows = parse_text(header + body + "BAD,1,1,HOLD\n", "csv")
+
+    results = list(submit_rows(rows, source="test", initiator="alice", batch_size=3))
+    assert [item["row"] for item in results] == list(range(1, 9))
+    accepted = [item for item in results if item["ok"]]
+    assert len(accepted) == 7
+    assert all(item["status"] == "PENDING_APPROVAL" and item["token"] for item in accepted)
+    assert len({item["command_id"] for item in accepted}) == 7
+    assert results[-1] == {"row": 8, "ok": False, "error": "side must be BUY or SELL"}
+
+    book = OrderBook()
+    assert len(book.open_orders()) == 7
+    assert book.get(accepted[0]["order_id"])["side"] == "BUY"
+
+    plain = list(
+        submit_rows([{"symbol": "X", "qty": 1}], source="t", initiator=None, request_approval=False)
+    )
+    assert plain[0]["status"] == "NEW" and plain[0]["token"] is None
+
+
+def test_cli_order_import_streams_results(tmp_path) -> None:
+    basket = tmp_path / "basket.jsonl"
+    basket.write_text('{"symbol":"AAA","qty":1,"px":1}\n{"symbol":"","qty":1}\n', "utf-8")
+
+    result = CliRunner().invoke(cli.app, ["order", "import", str(basket), "--no-approval"])
+    assert result.exit_code == 1
+    lines = [json.loads(line) for line in result.stdout.strip().splitlines()]
+    assert lines[0]["ok"] is True and lines[0]["status"] == "NEW"
+    assert lines[1] == {"row": 2, "ok": False, "error": "symbol required"}
+    assert lines[-1] == {"status": "done", "accepted": 1, "failed": 1}
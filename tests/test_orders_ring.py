@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from centrix.core.orders import add_order, clear_orders, list_orders
+import pytest
+
+from centrix.core.orders import OrderBook, OrderTransition, add_order, clear_orders, list_orders
 
 
 def test_orders_ring_buffer_behaviour() -> None:
@@ -12,3 +14,57 @@ def test_orders_ring_buffer_behaviour() -> None:
     assert len(orders) == 50
     assert orders[0]["symbol"] == "SYM59"
     assert orders[-1]["symbol"] == "SYM10"
+
+
+def test_orders_shared_between_processes(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    dashboard_book = OrderBook()
+    assert dashboard_book.open_orders() == []
+
+    cli_book = OrderBook()
+    created = cli_book.add(
+        [
+            {"source": "cli", "symbol": "AAA", "qty": 1, "px": 1.0},
+            {"source": "slack", "symbol": "BBB", "qty": 2, "px": 2.0, "command_id": 7},
+        ]
+    )
+    assert [record["status"] for record in created] == ["NEW", "NEW"]
+
+    open_now = dashboard_book.open_orders()
+    assert [record["symbol"] for record in open_now] == ["BBB", "AAA"]
+    assert open_now[0]["command_id"] == 7
+    assert [record["symbol"] for record in dashboard_book.list(symbol="AAA")] == ["AAA"]
+
+
+def test_order_state_machine_batches_transitions(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    book = OrderBook()
+    first, second = book.add(
+        [
+            {"source": "cli", "symbol": "AAA", "qty": 1, "px": 1.0, "command_id": 11},
+            {"source": "cli", "symbol": "BBB", "qty": 1, "px": 1.0, "command_id": 12},
+        ]
+    )
+
+    results = book.transition(
+        [
+            OrderTransition("PENDING_APPROVAL", command_id=11),
+            OrderTransition("FILLED", order_id=second["id"]),
+            OrderTransition("REJECTED", order_id=second["id"], fields={"reason": "risk"}),
+        ]
+    )
+    assert results[0] is not None and results[0]["status"] == "PENDING_APPROVAL"
+    assert results[1] is None
+    assert results[2] is not None and results[2]["reason"] == "risk"
+
+    assert [order["id"] for order in book.open_orders()] == [first["id"]]
+    assert book.get(second["id"])["status"] == "REJECTED"
+
+    with pytest.raises(ValueError):
+        book.transition([OrderTransition("LOST", order_id=first["id"])])
+
+    book.transition([OrderTransition("APPROVED", command_id=11, fields={"approver": "U2"})])
+    book.transition([OrderTransition("SENT", order_id=first["id"])])
+    filled = book.transition([OrderTransition("FILLED", order_id=first["id"])])[0]
+    assert filled is not None and filled["approver"] == "U2"
+    assert book.open_orders() == []
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from centrix.adapters.ibkr import IbkrClient
+from centrix.core import risk as risk_module
+from centrix.core.metrics import KPIStore
+from centrix.core.order_import import submit_rows
+from centrix.core.risk import RISK, RiskEngine, RiskLimits, check_order
+from centrix.ipc.bus import Bus
+from centrix.settings import AppSettings, get_settings
+from tests.fakes.fake_ibkr import FakeIbkrGateway
+
+
+def test_risk_engine_tracks_exposure_and_limits() -> None:
+    metrics = KPIStore()
+    gateway = FakeIbkrGateway(
+        account_snapshot={"cash": 50_000.0, "equity": 100_000.0},
+        positions=[
+            {"symbol": "AAPL", "quantity": 100, "avg_price": 150.0},
+            {"symbol": "MSFT", "quantity": -10, "avg_price": 300.0},
+        ],
+        time_provider=lambda: 0.0,
+    )
+    client = IbkrClient(settings=AppSettings(ibkr_enabled=True), gateway=gateway)
+    assert client.connect(retries=1) is True
+
+    limits = RiskLimits(
+        max_order_qty=500,
+        max_position_qty=300,
+        max_gross_notional=60_000.0,
+        max_margin_used_pct=50.0,
+    )
+    engine = RiskEngine(limits, metrics=metrics)
+    engine.refresh(client)
+    snapshot = engine.snapshot()
+    assert snapshot["gross_notional"] == pytest.approx(18_000.0)
+    assert snapshot["margin_used_pct"] == pytest.approx(18.0)
+
+    assert engine.check({"symbol": "AAPL", "qty": 100, "px": 150.0}).ok
+    assert engine.check({"symbol": "AAPL", "qty": 600, "px": 1.0}).reason == "order qty limit"
+    assert engine.check({"symbol": "aapl", "qty": 250, "px": 1.0}).reason == "position limit"
+    assert engine.check({"symbol": "AAPL", "qty": 250, "px": 1.0, "side": "SELL"}).ok
+    assert engine.check({"symbol": "IBM", "qty": 200, "px": 200.0}).reason == "margin limit"
+
+    engine.update_mark("AAPL", 160.0)
+    engine.apply_fill("MSFT", 10, 290.0)
+    snapshot = engine.snapshot()
+    assert snapshot["pnl_open"] == pytest.approx(1_000.0)
+    assert snapshot["pnl_day"] == pytest.approx(1_100.0)
+    assert "MSFT" not in snapshot["positions"]
+
+    risk = metrics.snapshot()["risk"]
+    assert risk["pnl_open"] == pytest.approx(1_000.0)
+    assert risk["margin_used_pct"] == pytest.approx(16.0)
+    assert metrics.get_counter("risk_checks_total") == 5
+    assert metrics.get_counter("risk_rejects_total") == 3
+
+
+def test_bulk_import_applies_risk_checks(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("RISK_MAX_ORDER_NOTIONAL", "1000")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    RISK.reset()
+    try:
+        rows = [{"symbol": "AAA", "qty": 10, "px": 50}, {"symbol": "BBB", "qty": 10, "px": 500}]
+        results = list(submit_rows(rows, source="test", initiator="alice"))
+    finally:
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+    assert results[0]["ok"] is True
+    assert results[1] == {"row": 2, "ok": False, "error": "risk: order notional limit"}
+
+
+def test_bulk_import_checks_each_row_against_the_rows_before_it(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("RISK_MAX_POSITION_QTY", "100")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    risk_module.get_settings.cache_clear()  # type: ignore[attr-defined]
+    RISK.reset()
+    try:
+        rows = [
+            {"symbol": "AAA", "qty": 60},
+            {"symbol": "AAA", "qty": 60},
+            {"symbol": "AAA", "qty": 40},
+            {"symbol": "AAA", "qty": 30, "side": "SELL"},
+        ]
+        results = list(submit_rows(rows, source="test", initiator="alice", batch_size=1))
+        # The stored orders stay reserved after the import.
+        assert not check_order({"symbol": "AAA", "qty": 31}).ok
+    finally:
+        RISK.reset()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+        risk_module.get_settings.cache_clear()  # type: ignore[attr-defined]
+    assert [item["ok"] for item in results] == [True, False, True, True]
+    assert results[1]["error"] == "risk: position limit"
+
+
+def test_exposure_is_kept_per_account(tmp_path) -> None:
+    engine = RiskEngine(
+        RiskLimits(max_position_qty=100, max_margin_used_pct=50.0), metrics=KPIStore()
+    )
+    bus = Bus(str(tmp_path / "bus.db"))
+    bus.set_portfolio(
+        {
+            "version": 1,
+            "updated_at": 10.0,
+            "account": {"account": "U1", "equity": 10_000.0},
+            "positions": [
+                {"account": "U1", "symbol": "AAPL", "quantity": 90, "avg_price": 50.0},
+                {"account": "U2", "symbol": "AAPL", "quantity": 10, "avg_price": 50.0},
+            ],
+        }
+    )
+    assert engine.load_published(bus) is True
+    assert engine.load_published(bus) is False
+
+    order = {"symbol": "AAPL", "qty": 20, "px": 50.0}
+    assert engine.check({**order, "account": "U1"}).reason == "position limit"
+    assert engine.check({**order, "account": "U2"}).ok
+    # U1 holds 4,500 of gross against 10,000 equity; U2 reports no equity of its own.
+    assert engine.check({**order, "qty": 10, "account": "U1"}).ok
+    msft = {"symbol": "MSFT", "qty": 20, "px": 50.0}
+    assert engine.check({**msft, "account": "U1"}).reason == "margin limit"
+    assert engine.check({**msft, "account": "U2"}).ok
+
+    engine.apply_fill("AAPL", 5, 50.0, account="U2")
+    snapshot = engine.snapshot()
+    assert snapshot["positions"]["AAPL"]["qty"] == 105
+    assert snapshot["accounts"]["U1"]["gross_notional"] == 4_500.0
+    assert snapshot["accounts"]["U2"]["gross_notional"] == 750.0
+
+
+def test_check_order_follows_the_published_portfolio(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("RISK_MAX_POSITION_QTY", "100")
+    monkeypatch.setenv("RISK_REFRESH_SEC", "0.01")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    # Other tests reload the settings module; clear the copy the risk module holds too.
+    risk_module.get_settings.cache_clear()  # type: ignore[attr-defined]
+    RISK.reset()
+    try:
+        bus = Bus(get_settings().ipc_db)
+        assert check_order({"symbol": "ES", "qty": 60}).ok
+        bus.set_portfolio(
+            {"version": 1, "positions": [{"symbol": "ES", "quantity": 50, "avg_price": 1.0}]}
+        )
+        for _ in range(200):
+            if not check_order({"symbol": "ES", "qty": 60}).ok:
+                break
+            time.sleep(0.01)
+        assert check_order({"symbol": "ES", "qty": 60}).reason == "position limit"
+        # Open orders in the book are reserved by the follower as well.
+        bus.set_portfolio({"version": 2, "positions": []})
+        bus.insert_orders([{"symbol": "ES", "qty": 80, "px": 1.0}])
+        for _ in range(200):
+            blocked = check_order({"symbol": "ES", "qty": 30}).reason == "position limit"
+            if blocked and check_order({"symbol": "ES", "qty": 20}).ok:
+                break
+            time.sleep(0.01)
+        assert check_order({"symbol": "ES", "qty": 30}).reason == "position limit"
+        assert check_order({"symbol": "ES", "qty": 20}).ok
+    finally:
+        RISK.reset()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+        risk_module.get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+def test_open_orders_are_reserved_and_netted_against_the_position() -> None:
+    engine = RiskEngine(
+        RiskLimits(max_position_qty=100, max_gross_notional=6_000.0), metrics=KPIStore()
+    )
+    engine.load_positions([{"symbol": "AAPL", "quantity": 100, "avg_price": 50.0}])
+    # At the gross limit and the position limit: buying more is refused, selling is not.
+    assert engine.check({"symbol": "AAPL", "qty": 10, "px": 50.0}).reason == "position limit"
+    assert engine.check({"symbol": "AAPL", "qty": 10, "side": "SELL", "px": 50.0}).ok
+    assert engine.check({"symbol": "MSFT", "qty": 20, "px": 50.0}).ok
+
+    engine.reserve(1, {"symbol": "MSFT", "qty": 20, "px": 50.0})
+    assert engine.check({"symbol": "MSFT", "qty": 20, "px": 50.0}).reason == (
+        "gross exposure limit"
+    )
+    # An order is not counted against its own reservation.
+    assert engine.check({"id": 1, "symbol": "MSFT", "qty": 20, "px": 50.0}).ok
+    # A pending sell nets against the long position and frees gross for other symbols.
+    engine.reserve(2, {"symbol": "AAPL", "qty": 40, "side": "SELL", "px": 50.0})
+    assert engine.check({"symbol": "MSFT", "qty": 20, "px": 50.0}).ok
+    engine.release(2)
+    assert not engine.check({"symbol": "MSFT", "qty": 20, "px": 50.0}).ok
+
+    engine.apply_fill("MSFT", 20, 50.0, order_id=1)
+    assert engine.snapshot()["gross_notional"] == 6_000.0
+    assert engine.check({"symbol": "MSFT", "qty": 1, "px": 50.0}).reason == (
+        "gross exposure limit"
+    )
+    engine.load_orders([])
+    engine.load_orders([{"id": 3, "symbol": "AAPL", "qty": 50, "side": "SELL", "filled_qty": 10}])
+    assert engine.check({"symbol": "MSFT", "qty": 40, "px": 50.0}).ok
+    assert engine.check({"symbol": "MSFT", "qty": 41, "px": 50.0}).reason == (
+        "gross exposure limit"
+    )
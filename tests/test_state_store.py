@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from centrix.ipc.state import StateConflict, StateStore
+
+
+def test_state_store_caches_and_versions(tmp_path) -> None:
+    path = tmp_path / "state.json"
+    store = StateStore(path)
+    seen: list[int] = []
+    store.subscribe(lambda state: seen.append(state["version"]))
+
+    state = store.read()
+    assert state["paused"] is False
+    assert state["version"] == 1
+
+    paused = store.update({"paused": True})
+    assert paused["version"] == 2
+    assert store.update({"paused": True})["version"] == 2
+
+    with pytest.raises(StateConflict):
+        store.update({"mode": "real"}, expected_version=1)
+
+    # Another process rewrites the file: the cache is invalidated by inode/mtime.
+    other = StateStore(path)
+    other.update({"mode": "real", "mode_mock": False})
+    assert store.read()["mode"] == "real"
+    assert seen == [1, 2, 3]
+    assert json.loads(path.read_text(encoding="utf-8"))["version"] == 3
+    assert not list(Path(tmp_path).glob("*.tmp"))
+
+
+def test_state_store_concurrent_updates_do_not_lose_writes(tmp_path) -> None:
+    path = tmp_path / "state.json"
+    stores = [StateStore(path) for _ in range(4)]
+
+    def bump(store: StateStore, key: str) -> None:
+        for _ in range(10):
+            store.update(apply=lambda current, key=key: {key: int(current.get(key, 0)) + 1})
+
+    threads = [
+        threading.Thread(target=bump, args=(store, f"n{idx}")) for idx, store in enumerate(stores)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    final = StateStore(path).read()
+    assert [final[f"n{idx}"] for idx in range(4)] == [10, 10, 10, 10]
+    assert final["version"] == 40